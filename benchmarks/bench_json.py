@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of per-request JSON encoding cost.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps) with the
+pre-serialized tool list and the orjson-backed FastJSONResponse used by
+server.py.
+
+Usage: python benchmarks/bench_json.py [iterations]
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("VENICE_API_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import fast_json
+import server
+
+
+def per_call_us(fn, iterations):
+    """Return the mean CPU time of fn in microseconds."""
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    image_id = str(uuid.uuid4())
+    image_url = "https://example.com/image.png"
+    generate_result = {
+        "image_id": image_id,
+        "image_url": image_url,
+        "thumbs_up_url": f"/mcp/tools/call?tool_name=approve_image&image_id={image_id}",
+        "thumbs_down_url": f"/mcp/tools/call?tool_name=regenerate_image&image_id={image_id}",
+        "html": server.image_widget.render(image_id, image_url)
+    }
+    tools = {"tools": server.MCP_TOOLS}
+
+    cases = [
+        ("tools/list default", lambda: JSONResponse(jsonable_encoder(tools))),
+        ("tools/list pre-serialized", lambda: fast_json.Response(content=server.tools_list.body)),
+        ("generate default", lambda: JSONResponse(jsonable_encoder(generate_result))),
+        ("generate FastJSONResponse", lambda: fast_json.FastJSONResponse(generate_result)),
+    ]
+    print(f"orjson available: {fast_json.orjson is not None}")
+    print(f"tools/list body: {len(server.tools_list.body)} bytes, gzip: {len(server.tools_list.gzip_body)} bytes")
+    for name, fn in cases:
+        print(f"{name:30s} {per_call_us(fn, iterations):8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
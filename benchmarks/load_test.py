@@ -0,0 +1,342 @@
+"""
+Load test of the MCP server against the local Venice stand-in.
+
+Starts benchmarks/mock_venice.py and server.py (pointed at the mock), then
+drives /mcp/tools/call at a fixed concurrency for each workload and reports
+p50/p95/p99 latency, throughput, error rate and server memory growth.
+
+Workloads: generate, regenerate, approve, list_models, batch.
+
+Usage:
+    python benchmarks/load_test.py [--requests 200] [--concurrency 16] [--workloads generate,approve]
+                                   [--latency 0.05] [--jitter 0.01] [--error-rate 0] [--rate-limit 0]
+                                   [--server-env KEY=VALUE ...] [--target http://host:port] [--output results.json]
+
+    # Record a baseline, then fail (exit 1) on regressions against it, e.g. in CI
+    python benchmarks/load_test.py --write-baseline
+    python benchmarks/load_test.py --ci [--baseline benchmarks/baseline.json] [--tolerance 0.5]
+
+In --ci mode the workload settings default to those stored in the baseline,
+so the comparison is like for like. By default the server under test runs
+with VENICE_RATE_LIMIT=0, so the numbers measure the server rather than the
+outbound rate limiter.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchmarks.mock_venice import MockConfig, MockVenice, free_port
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORKLOADS = ("generate", "regenerate", "approve", "list_models", "batch")
+
+# Defaults for settings that --ci may take from the baseline instead
+SETTINGS = {
+    "requests": 200,
+    "concurrency": 16,
+    "warmup": 10,
+    "workloads": ",".join(WORKLOADS),
+    "latency": 0.05,
+    "jitter": 0.01,
+    "error_rate": 0.0,
+    "rate_limit": 0.0,
+    "batch_size": 4
+}
+
+# Environment of the server under test (overridable with --server-env)
+SERVER_ENV = {
+    "VENICE_API_KEY": "load-test",
+    "VENICE_RATE_LIMIT": "0",
+    "LOG_LEVEL": "WARNING"
+}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def rss_kb(pid):
+    """Resident set size of a process in kB, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class ServerProcess:
+    """server.py running in a subprocess, pointed at the mock Venice API."""
+
+    def __init__(self, venice_api_base, env_overrides):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = os.environ.copy()
+        env.update(SERVER_ENV)
+        env["VENICE_API_BASE"] = venice_api_base
+        env.update(env_overrides)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py"), "--host", "127.0.0.1", "--port", str(self.port)],
+            env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server.py exited with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("server.py did not become ready")
+
+    def stop(self):
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class LoadTest:
+    """
+    Runs the workloads against a server.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the server's base URL
+        settings (dict): Workload settings (see SETTINGS)
+        server_pid (int): PID of the server for memory readings (None for remote targets)
+    """
+
+    def __init__(self, client, settings, server_pid=None):
+        self.client = client
+        self.settings = settings
+        self.server_pid = server_pid
+        self.image_ids = []
+
+    async def call(self, tool_name, parameters):
+        response = await self.client.post("/mcp/tools/call", json={"tool_name": tool_name, "parameters": parameters})
+        return response.status_code, response
+
+    def request_for(self, workload, n):
+        """Return the (tool_name, parameters) of the n-th request of a workload."""
+        if workload == "generate":
+            return "generate_venice_image", {"prompt": f"load test {uuid.uuid4().hex}"}
+        if workload == "regenerate":
+            return "regenerate_image", {"image_id": self.image_ids[n % len(self.image_ids)]}
+        if workload == "approve":
+            return "approve_image", {"image_id": self.image_ids[n % len(self.image_ids)]}
+        if workload == "list_models":
+            return "list_available_models", {}
+        if workload == "batch":
+            return "generate_venice_images", {"prompt": f"load test {uuid.uuid4().hex}",
+                                              "count": self.settings["batch_size"]}
+        raise ValueError(f"Unknown workload '{workload}'")
+
+    async def prepare(self):
+        """Generate the images that regenerate and approve operate on."""
+        results = await asyncio.gather(*[
+            self.call("generate_venice_image", {"prompt": f"load test seed {i}"})
+            for i in range(self.settings["concurrency"])
+        ])
+        self.image_ids = [response.json()["image_id"] for status, response in results if status == 200]
+        if not self.image_ids:
+            raise RuntimeError("Could not generate the seed images")
+
+    async def run_workload(self, workload):
+        """Run one workload and return its latency, throughput and memory figures."""
+        for n in range(self.settings["warmup"]):
+            await self.call(*self.request_for(workload, n))
+
+        total = self.settings["requests"]
+        latencies = []
+        errors = 0
+        next_request = iter(range(total))
+        rss_before = rss_kb(self.server_pid) if self.server_pid else None
+
+        async def worker():
+            nonlocal errors
+            for n in next_request:
+                tool_name, parameters = self.request_for(workload, n)
+                started = time.perf_counter()
+                try:
+                    status, _ = await self.call(tool_name, parameters)
+                except httpx.HTTPError:
+                    status = None
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(self.settings["concurrency"])])
+        elapsed = time.perf_counter() - started
+        rss_after = rss_kb(self.server_pid) if self.server_pid else None
+
+        latencies.sort()
+        return {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "rss_growth_kb": rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        }
+
+    async def run(self, workloads):
+        if any(w in ("regenerate", "approve") for w in workloads):
+            await self.prepare()
+        return {workload: await self.run_workload(workload) for workload in workloads}
+
+
+def compare(results, baseline, tolerance, latency_slack_ms=5.0, memory_slack_kb=20480):
+    """
+    Compare results with a baseline.
+
+    Latency may grow and throughput shrink by `tolerance` (a fraction),
+    latency additionally by a fixed slack so fast workloads aren't flagged
+    for noise. The error rate may not grow by more than one point.
+
+    Returns:
+        list: Human-readable regressions (empty if none)
+    """
+    regressions = []
+    for workload, base in baseline.get("workloads", {}).items():
+        current = results["workloads"].get(workload)
+        if current is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            limit = base[key] * (1 + tolerance) + latency_slack_ms
+            if current[key] > limit:
+                regressions.append(f"{workload}: {key} {current[key]} > {limit:.2f} (baseline {base[key]})")
+        limit = base["throughput_rps"] * (1 - tolerance)
+        if current["throughput_rps"] < limit:
+            regressions.append(f"{workload}: throughput {current['throughput_rps']} rps < {limit:.1f} "
+                               f"(baseline {base['throughput_rps']})")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{workload}: error rate {current['error_rate']} > baseline {base['error_rate']}")
+        if current["rss_growth_kb"] is not None and base.get("rss_growth_kb") is not None:
+            limit = max(base["rss_growth_kb"], 0) * (1 + tolerance) + memory_slack_kb
+            if current["rss_growth_kb"] > limit:
+                regressions.append(f"{workload}: memory growth {current['rss_growth_kb']} kB > {limit:.0f} kB")
+    return regressions
+
+
+def print_report(results):
+    header = f"{'workload':<12} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss +kB':>9}"
+    print(header)
+    print("-" * len(header))
+    for workload, r in results["workloads"].items():
+        rss = "-" if r["rss_growth_kb"] is None else r["rss_growth_kb"]
+        print(f"{workload:<12} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>8} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {rss:>9}")
+
+
+async def run_load_test(settings, target=None, server_env=None):
+    """
+    Run the load test and return the results.
+
+    Args:
+        settings (dict): Workload settings (see SETTINGS)
+        target (str): URL of an already running server (starts the mock and server.py when omitted)
+        server_env (dict): Extra environment for the started server
+    """
+    workloads = [w for w in settings["workloads"].split(",") if w]
+    mock = server = None
+    try:
+        if target is None:
+            mock = MockVenice(MockConfig(latency=settings["latency"], jitter=settings["jitter"],
+                                         error_rate=settings["error_rate"], rate_limit=settings["rate_limit"])).start()
+            server = ServerProcess(mock.api_base, server_env or {})
+            server.wait_ready()
+            target = server.url
+        limits = httpx.Limits(max_connections=settings["concurrency"], max_keepalive_connections=settings["concurrency"])
+        async with httpx.AsyncClient(base_url=target, limits=limits, timeout=120) as client:
+            load_test = LoadTest(client, settings, server.pid if server else None)
+            return {"settings": settings, "workloads": await load_test.run(workloads)}
+    finally:
+        if server is not None:
+            server.stop()
+        if mock is not None:
+            mock.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the MCP server against a mock Venice API")
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--warmup", type=int)
+    parser.add_argument("--workloads", help=f"Comma-separated subset of {','.join(WORKLOADS)}")
+    parser.add_argument("--latency", type=float, help="Mock generation latency in seconds")
+    parser.add_argument("--jitter", type=float, help="Mock latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, help="Fraction of mock generations that fail")
+    parser.add_argument("--rate-limit", type=float, help="Mock generations per second before 429s")
+    parser.add_argument("--batch-size", type=int, help="Images per batch request")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the server under test")
+    parser.add_argument("--target", help="Test an already running server instead of starting one")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--ci", action="store_true", help="Exit 1 on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.ci:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    defaults = {**SETTINGS, **(baseline["settings"] if baseline else {})}
+    settings = {key: getattr(args, key) if getattr(args, key) is not None else default
+                for key, default in defaults.items()}
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+
+    results = asyncio.run(run_load_test(settings, args.target, server_env))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.write_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Local stand-in for a Redis server, for tests and load tests.
+
+Speaks RESP2 and implements the commands the shared state backend uses
+(PING, AUTH, SELECT, GET, SET with EX/PX, MGET, DEL, EXISTS, SCAN, DBSIZE,
+FLUSHDB, and WATCH/UNWATCH/MULTI/EXEC transactions) on an in-memory dict
+with key expiry. Pipelined commands are answered in order like the real
+server.
+
+Usage: python benchmarks/mock_redis.py [--port 6380]
+
+Point the server at it with SHARED_STATE_URL=redis://127.0.0.1:6380/0.
+"""
+import argparse
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+
+try:
+    from benchmarks.mock_venice import free_port
+except ImportError:
+    from mock_venice import free_port
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        # Bumped on every write, so EXEC can tell whether a watched key changed
+        self.versions = {}
+        self.lock = threading.RLock()
+        self.commands = 0
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def version(self, key):
+        with self.lock:
+            self._alive(key)
+            return self.versions.get(key, 0)
+
+    def exec(self, watched, queued):
+        """Run queued commands atomically, or return None if a watched key changed."""
+        with self.lock:
+            if any(self.version(key) != version for key, version in watched.items()):
+                return None
+            return [self.run(args) for args in queued]
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+            self._touch(key)
+        return key in self.data
+
+    def run(self, args):
+        command = args[0].upper().decode()
+        self.commands += 1
+        with self.lock:
+            if command == "PING":
+                return "+PONG"
+            if command in ("AUTH", "SELECT"):
+                return "+OK"
+            if command == "GET":
+                return self.data[args[1]] if self._alive(args[1]) else None
+            if command == "MGET":
+                return [self.data[key] if self._alive(key) else None for key in args[1:]]
+            if command == "SET":
+                key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+                self.data[key] = value
+                self.expires.pop(key, None)
+                self._touch(key)
+                if b"PX" in options:
+                    self.expires[key] = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    self.expires[key] = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+                return "+OK"
+            if command == "DEL":
+                removed = 0
+                for key in args[1:]:
+                    if self._alive(key):
+                        del self.data[key]
+                        self.expires.pop(key, None)
+                        self._touch(key)
+                        removed += 1
+                return removed
+            if command == "EXISTS":
+                return sum(1 for key in args[1:] if self._alive(key))
+            if command == "SCAN":
+                # The whole keyspace in one page; real servers page, which clients must handle anyway
+                pattern = None
+                options = [a.upper() for a in args[2:]]
+                if b"MATCH" in options:
+                    pattern = args[2 + options.index(b"MATCH") + 1].decode()
+                keys = [key for key in list(self.data) if self._alive(key)
+                        and (pattern is None or fnmatch.fnmatchcase(key.decode(), pattern))]
+                return [b"0", keys]
+            if command == "DBSIZE":
+                return sum(1 for key in list(self.data) if self._alive(key))
+            if command == "FLUSHDB":
+                for key in self.data:
+                    self._touch(key)
+                self.data.clear()
+                self.expires.clear()
+                return "+OK"
+        return Exception(f"ERR unknown command '{command}'")
+
+
+def _encode(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # Replies are written one by one; don't let Nagle hold them back waiting for ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        # Per-connection transaction state: watched key versions, and commands queued after MULTI
+        watched, queued = {}, None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if not line.startswith(b"*"):
+                self.wfile.write(b"-ERR Protocol error\r\n")
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b"QUIT":
+                self.wfile.write(b"+OK\r\n")
+                return
+            store = self.server.store
+            if command == b"WATCH":
+                watched.update((key, store.version(key)) for key in args[1:])
+                reply = "+OK"
+            elif command == b"UNWATCH":
+                watched.clear()
+                reply = "+OK"
+            elif command == b"MULTI":
+                queued = []
+                reply = "+OK"
+            elif command == b"EXEC":
+                reply = store.exec(watched, queued or [])
+                watched, queued = {}, None
+            elif queued is not None:
+                queued.append(args)
+                reply = "+QUEUED"
+            else:
+                reply = store.run(args)
+            self.wfile.write(_encode(reply))
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockRedis:
+    """
+    Runs the stand-in in a background thread.
+
+    Args:
+        port (int): Port to listen on (a free one when omitted)
+    """
+
+    def __init__(self, port=None):
+        self.port = port or free_port()
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+        self._server = _Server(("127.0.0.1", self.port), _Handler)
+        self._server.store = _Store()
+        self._thread = None
+
+    @property
+    def store(self):
+        return self._server.store
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis stand-in")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    print(f"Serving on redis://127.0.0.1:{args.port}/0")
+    server = _Server(("127.0.0.1", args.port), _Handler)
+    server.store = _Store()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
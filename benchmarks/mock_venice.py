@@ -0,0 +1,194 @@
+"""
+Local stand-in for the Venice AI API, for tests and load tests.
+
+Serves the endpoints the server uses (POST /api/v1/image/generate,
+GET /api/v1/models) plus the generated image files, with configurable
+latency, error rate and rate limiting. GET /_stats reports what the mock
+saw (requests, errors, 429s, peak concurrency); POST /_config changes the
+behaviour of a running mock.
+
+Usage: python benchmarks/mock_venice.py [--port 9100] [--latency 0.05] [--jitter 0.02]
+                                        [--error-rate 0] [--rate-limit 0] [--retry-after 1]
+
+Point the server at it with VENICE_API_BASE=http://127.0.0.1:9100/api/v1.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, asdict, fields
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+import uvicorn
+
+MODELS = [
+    {"id": "fluently-xl", "type": "image", "name": "Fluently XL", "description": "Mock model"},
+    {"id": "fluently-base", "type": "image", "name": "Fluently Base", "description": "Mock model"},
+    {"id": "fluently-creative", "type": "image", "name": "Fluently Creative", "description": "Mock model"}
+]
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock."""
+    latency: float = 0.05  # Mean seconds per generation
+    jitter: float = 0.0  # Uniform +/- seconds around the mean
+    error_rate: float = 0.0  # Fraction of generations answered with a 500
+    rate_limit: float = 0.0  # Generations per second before 429s (0 disables)
+    retry_after: float = 1.0  # Retry-After sent with 429s
+    models_latency: float = 0.0  # Seconds per models request
+
+
+def png_bytes(n):
+    """Return a valid 1x1 PNG whose colour (and so whose bytes) depend on n."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    pixel = b"\x00" + bytes(((n >> 16) & 255, (n >> 8) & 255, n & 255))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(pixel))
+            + chunk(b"IEND", b""))
+
+
+def create_app(config=None):
+    """Build the mock Venice application."""
+    app = FastAPI(title="Mock Venice API")
+    app.state.config = config or MockConfig()
+    stats = {"requests": 0, "generations": 0, "errors": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0,
+             "last_request": None}
+    window = {"second": 0, "count": 0}
+
+    def rate_limited():
+        limit = app.state.config.rate_limit
+        if limit <= 0:
+            return False
+        second = int(time.monotonic())
+        if second != window["second"]:
+            window["second"], window["count"] = second, 0
+        window["count"] += 1
+        return window["count"] > limit
+
+    @app.post("/api/v1/image/generate")
+    async def generate(request: Request):
+        config = app.state.config
+        stats["requests"] += 1
+        if rate_limited():
+            stats["rate_limited"] += 1
+            return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"},
+                                headers={"Retry-After": str(config.retry_after)})
+        payload = await request.json()
+        # Lets tests check what the server asked for (e.g. progressive-mode draft sizes)
+        stats["last_request"] = {key: payload.get(key) for key in ("model", "width", "height", "steps")}
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            delay = config.latency + random.uniform(-config.jitter, config.jitter)
+            await asyncio.sleep(max(0.0, delay))
+        finally:
+            stats["in_flight"] -= 1
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": "Mock upstream failure"})
+
+        stats["generations"] += 1
+        n = stats["generations"]
+        if payload.get("return_binary"):
+            return Response(content=png_bytes(n), media_type="image/png")
+        return {"id": f"mock-{n}", "image_url": f"{request.base_url}images/{n}.png"}
+
+    @app.get("/api/v1/models")
+    async def models():
+        stats["requests"] += 1
+        if app.state.config.models_latency:
+            await asyncio.sleep(app.state.config.models_latency)
+        return {"object": "list", "data": MODELS}
+
+    @app.get("/images/{n}.png")
+    async def image(n: int):
+        return Response(content=png_bytes(n), media_type="image/png")
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {**stats, "config": asdict(app.state.config)}
+
+    @app.post("/_config")
+    async def set_config(request: Request):
+        changes = await request.json()
+        known = {f.name for f in fields(MockConfig)}
+        for key, value in changes.items():
+            if key in known:
+                setattr(app.state.config, key, float(value))
+        return asdict(app.state.config)
+
+    return app
+
+
+def free_port():
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MockVenice:
+    """
+    Runs the mock in a background thread.
+
+    Args:
+        config (MockConfig): Behaviour of the mock
+        port (int): Port to listen on (a free one when omitted)
+    """
+
+    def __init__(self, config=None, port=None):
+        self.config = config or MockConfig()
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.api_base = f"{self.url}/api/v1"
+        self._server = uvicorn.Server(uvicorn.Config(create_app(self.config), host="127.0.0.1", port=self.port,
+                                                     log_level="warning", access_log=False))
+        self._thread = None
+
+    def start(self, timeout=10):
+        """Start serving and wait until the port accepts requests."""
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Mock Venice server did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Venice AI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=MockConfig.latency)
+    parser.add_argument("--jitter", type=float, default=MockConfig.jitter)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--rate-limit", type=float, default=MockConfig.rate_limit)
+    parser.add_argument("--retry-after", type=float, default=MockConfig.retry_after)
+    args = parser.parse_args()
+    config = MockConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        rate_limit=args.rate_limit, retry_after=args.retry_after)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+
+# Root directory of the local image blob store
+DEFAULT_ROOT = os.environ.get("BLOB_STORE_PATH", "blobs")
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    Content-addressed blob store on local disk.
+
+    Blobs are named by the SHA-256 of their bytes and sharded two levels deep
+    (ab/cd/abcd...png) to keep directories small. Writes go to a temporary
+    file and are renamed into place, so readers never see partial files and
+    storing the same bytes twice is a no-op.
+
+    Args:
+        root (str): Directory holding the blobs
+        extension (str): File extension added to every blob
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, extension=".png"):
+        self.root = root
+        self.extension = extension
+
+    def path(self, digest):
+        """
+        Return the file path for a digest.
+
+        Raises:
+            ValueError: If digest is not a lowercase hex SHA-256
+        """
+        if not DIGEST_PATTERN.match(digest):
+            raise ValueError(f"Invalid blob digest '{digest}'")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + self.extension)
+
+    def exists(self, digest):
+        """Whether a blob with this digest is stored."""
+        try:
+            return os.path.isfile(self.path(digest))
+        except ValueError:
+            return False
+
+    def put(self, data):
+        """
+        Store bytes and return their digest.
+
+        Args:
+            data (bytes): Blob contents
+
+        Returns:
+            str: Hex SHA-256 of the data
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.isfile(path):
+            return digest
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    async def put_async(self, data):
+        """Store bytes without blocking the event loop."""
+        return await asyncio.to_thread(self.put, data)
+
+    def read(self, digest):
+        """
+        Return the bytes of a stored blob.
+
+        Raises:
+            ValueError: If digest is not a lowercase hex SHA-256
+            FileNotFoundError: If no blob with this digest is stored
+        """
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    async def read_async(self, digest):
+        """Read a blob without blocking the event loop."""
+        return await asyncio.to_thread(self.read, digest)
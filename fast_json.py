@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import json
+from fastapi.responses import JSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware, DEFAULT_EXCLUDED_CONTENT_TYPES
+
+# orjson is optional; the standard library is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Responses smaller than this aren't worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+# Streams must not be buffered by the compressor
+STREAMING_CONTENT_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+def dumps(content):
+    """Serialize content to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+class PreSerializedJSON:
+    """
+    A static JSON document serialized (and gzip-compressed) once.
+
+    Responses carry a strong ETag derived from the body, and conditional
+    requests with a matching If-None-Match get a 304.
+
+    Args:
+        content: JSON-serializable document
+    """
+
+    def __init__(self, content):
+        self.body = dumps(content)
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+    def response(self, request):
+        """Build the response for a request, honouring If-None-Match and Accept-Encoding."""
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzip_body, media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def add_compression(app):
+    """Gzip large responses, leaving streams and already-encoded bodies untouched."""
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE, compresslevel=6,
+                       exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + STREAMING_CONTENT_TYPES)
@@ -0,0 +1,243 @@
+"""
+Generate multi-view turnarounds for a whole folder (or list) of source images.
+
+Sources are streamed through a bounded pool of workers, so memory stays flat
+however many images there are. Views whose output already exists and is a
+valid image are not requested again, so a crashed or interrupted run picks up
+where it stopped when started again with the same arguments: sources whose
+views all exist are skipped. Nothing is remembered per source, so memory stays
+flat however many sources a run has. Every finished source is appended to a
+progress file (JSON lines) as a log of the run. Throughput and ETA are
+reported as it runs.
+
+Outputs go to <output-dir>/<source path without extension>/<view>_view_output.png.
+
+Usage:
+    python batch_views.py (--input-dir DIR | --manifest FILE) --output-dir OUT
+                          [--angles 0,90,180,270] [--workers 8] [--concurrency 16]
+                          [--progress OUT/progress.jsonl] [--report-interval 10]
+
+A manifest is a text file with one source image path per line.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from PIL import Image
+
+try:
+    from .multi_view import DEFAULT_ANGLES, generate_views, get_client, normalize_angle, parse_angles, view_name
+except ImportError:
+    from multi_view import DEFAULT_ANGLES, generate_views, get_client, normalize_angle, parse_angles, view_name
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+DEFAULT_WORKERS = 8
+
+
+def iter_sources(input_dir=None, manifest=None):
+    """
+    Yield (path, key) for every source image, lazily.
+
+    The key names the source in outputs and in the progress file: the path
+    relative to input_dir, or the path as listed in the manifest.
+    """
+    if input_dir is not None:
+        for root, dirs, files in os.walk(input_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield path, os.path.relpath(path, input_dir)
+    else:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            for line in f:
+                listed = line.strip()
+                if listed and not listed.startswith("#"):
+                    path = listed if os.path.isabs(listed) else os.path.join(base, listed)
+                    yield path, os.path.normpath(listed).lstrip(os.sep)
+
+
+def output_paths_for(output_dir, key, angles):
+    """Return the output path of each view of a source."""
+    directory = os.path.join(output_dir, os.path.splitext(key)[0])
+    return {angle: os.path.join(directory, f"{view_name(angle)}_view_output.png") for angle in angles}
+
+
+def is_valid_image(path):
+    """Return True if path is a complete, readable image."""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+        return True
+    except (OSError, SyntaxError, ValueError):
+        return False
+
+
+def save_atomically(image, path):
+    """Save an image via a temporary file so a crash never leaves a truncated output."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    image.save(tmp_path, format="PNG")
+    os.replace(tmp_path, path)
+
+
+class Progress:
+    """
+    Progress file and throughput reporting.
+
+    The progress file is an append-only log; it is never read back, since
+    whether a source is done is decided from its outputs.
+
+    Args:
+        path (str): Progress file (JSON lines, appended to)
+        total (int): Number of sources, for the ETA (None if unknown)
+    """
+
+    def __init__(self, path, total=None):
+        self.path = path
+        self.total = total
+        self.counts = {"done": 0, "skipped": 0, "failed": 0, "views": 0}
+        self.started = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a")
+
+    def record(self, key, status, **fields):
+        """Checkpoint the outcome of a source."""
+        self.counts[status] += 1
+        if status == "skipped":
+            return
+        self._file.write(json.dumps({"source": key, "status": status, "ts": round(time.time(), 3), **fields}) + "\n")
+        self._file.flush()
+
+    def report(self):
+        """Print processed counts, throughput and ETA."""
+        elapsed = time.monotonic() - self.started
+        worked = self.counts["done"] + self.counts["failed"]
+        processed = worked + self.counts["skipped"]
+        rate = worked / elapsed if elapsed else 0.0
+        line = (f"[{elapsed:7.0f}s] {processed} processed ({self.counts['done']} generated, "
+                f"{self.counts['skipped']} skipped, {self.counts['failed']} failed), "
+                f"{rate:.2f} images/s, {self.counts['views']} views")
+        if self.total is not None:
+            remaining = max(self.total - processed, 0)
+            eta = f"{remaining / rate:.0f}s" if rate else "unknown"
+            line += f", {remaining} remaining, ETA {eta}"
+        print(line, flush=True)
+
+    def close(self):
+        self._file.close()
+
+
+async def process_source(path, key, output_dir, angles, semaphore, client, progress):
+    """Generate the missing views of one source and checkpoint the outcome."""
+    output_paths = output_paths_for(output_dir, key, angles)
+    valid = await asyncio.to_thread(
+        lambda: {angle for angle, out in output_paths.items() if os.path.exists(out) and is_valid_image(out)})
+    missing = [angle for angle in angles if angle not in valid]
+    if not missing:
+        progress.record(key, "skipped")
+        return
+
+    try:
+        views = await generate_views(path, missing, client=client, semaphore=semaphore)
+    except Exception as e:
+        progress.record(key, "failed", error=str(e))
+        return
+    written = [angle for angle, output_image in views.items() if output_image is not None]
+    await asyncio.to_thread(lambda: [save_atomically(views[angle], output_paths[angle]) for angle in written])
+    progress.counts["views"] += len(written)
+
+    failed = [view_name(angle) for angle in missing if angle not in written]
+    if failed:
+        progress.record(key, "failed", error=f"No image returned for: {', '.join(failed)}")
+    else:
+        progress.record(key, "done", views=len(written))
+
+
+async def run_batch(sources, output_dir, angles=DEFAULT_ANGLES, workers=DEFAULT_WORKERS, max_concurrency=16,
+                    progress_path=None, total=None, report_interval=10.0, client=None):
+    """
+    Generate the views of every source.
+
+    Args:
+        sources: Iterable of (path, key), consumed lazily
+        output_dir (str): Root directory of the outputs
+        angles (list): Rotations in degrees
+        workers (int): Sources processed at the same time
+        max_concurrency (int): Gemini requests in flight across all workers
+        progress_path (str): Progress file (defaults to <output_dir>/progress.jsonl)
+        total (int): Number of sources, for the ETA
+        report_interval (float): Seconds between progress reports
+        client (genai.Client): Gemini client (the shared one by default)
+
+    Returns:
+        dict: Counts of done, skipped and failed sources and of generated views
+    """
+    client = client or get_client()
+    angles = list(dict.fromkeys(normalize_angle(angle) for angle in angles))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    progress = Progress(progress_path or os.path.join(output_dir, "progress.jsonl"), total)
+    # Bounded, so the walk never runs far ahead of the workers
+    queue = asyncio.Queue(maxsize=workers * 2)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await process_source(*item, output_dir, angles, semaphore, client, progress)
+            finally:
+                queue.task_done()
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_interval)
+            progress.report()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+    report_task = asyncio.create_task(reporter())
+    try:
+        for path, key in sources:
+            await queue.put((path, key))
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        report_task.cancel()
+        for task in tasks:
+            task.cancel()
+        progress.report()
+        progress.close()
+    return dict(progress.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate multi-view turnarounds for many source images")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", help="Directory walked for source images")
+    source.add_argument("--manifest", help="Text file with one source image path per line")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--angles", type=parse_angles, default=list(DEFAULT_ANGLES),
+                        help="Comma-separated rotations in degrees (default: 0,90,180,270)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Sources processed at the same time")
+    parser.add_argument("--concurrency", type=int, default=16, help="Gemini requests in flight across all workers")
+    parser.add_argument("--progress", help="Progress file (default: <output-dir>/progress.jsonl)")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between progress reports")
+    args = parser.parse_args()
+
+    # Counting first costs one extra walk but gives an ETA without holding the list in memory
+    total = sum(1 for _ in iter_sources(args.input_dir, args.manifest))
+    print(f"{total} source images")
+    counts = asyncio.run(run_batch(iter_sources(args.input_dir, args.manifest), args.output_dir, args.angles,
+                                   args.workers, args.concurrency, args.progress, total, args.report_interval))
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Generate several views of a 3D object from one source image with Gemini.
+
+The source image is loaded once, one client is shared by all requests and
+the views are requested concurrently (up to a concurrency cap), so a full
+turnaround costs about one round trip instead of one per view. Angles are
+degrees of rotation around the vertical axis: 0 is the front, 90 the right
+side, 180 the back and 270 the left side; any other angle is allowed too.
+
+Usage:
+    python multi_view.py <input_image_path> [--angles 0,90,180,270] [--output-dir .] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from io import BytesIO
+from google import genai
+from google.genai import types
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MODEL = "gemini-2.0-flash-exp-image-generation"
+DEFAULT_ANGLES = (0, 90, 180, 270)
+DEFAULT_CONCURRENCY = int(os.environ.get("GEMINI_CONCURRENCY", "4"))
+
+# Names and prompts of the four cardinal views
+VIEWS = {
+    0: ("front", "Create a front view (0°) of this 3D object. Maintain the exact same style, colors, and proportions. "
+                 "Show the object facing directly forward."),
+    90: ("right", "Create a right side view (90°) of this 3D object. Maintain the exact same style, colors, and "
+                  "proportions. Show the object in perfect profile, facing directly to the right."),
+    180: ("back", "Create a back view (180°) of this 3D object. Maintain the exact same style, colors, and proportions. "
+                  "Show the object from directly behind."),
+    270: ("left", "Create a left side view (270°) of this 3D object. Maintain the exact same style, colors, and "
+                  "proportions. Show the object in perfect profile, facing directly to the left.")
+}
+
+_client = None
+
+
+def get_client(api_key=None):
+    """
+    Return the shared Gemini client, creating it on first use.
+
+    Args:
+        api_key (str): API key (defaults to the GOOGLE_API_KEY environment variable)
+    """
+    global _client
+    if api_key is not None:
+        return genai.Client(api_key=api_key)
+    if _client is None:
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise RuntimeError("GOOGLE_API_KEY environment variable is not set")
+        _client = genai.Client(api_key=api_key)
+    return _client
+
+
+def normalize_angle(angle):
+    """Return the angle in degrees within [0, 360)."""
+    angle = float(angle) % 360
+    return int(angle) if angle.is_integer() else angle
+
+
+def view_name(angle):
+    """Return the name of a view, e.g. "front" for 0 or "45deg" for 45."""
+    angle = normalize_angle(angle)
+    return VIEWS[angle][0] if angle in VIEWS else f"{angle}deg"
+
+
+def view_prompt(angle):
+    """Return the prompt asking for the object rotated by the given angle."""
+    angle = normalize_angle(angle)
+    if angle in VIEWS:
+        return VIEWS[angle][1]
+    return (f"Create a view of this 3D object rotated {angle}° clockwise around its vertical axis, as seen from above, "
+            f"relative to the front view. Maintain the exact same style, colors, and proportions.")
+
+
+def load_image(image_path):
+    """Load the source image fully into memory so it can be shared by concurrent requests."""
+    with Image.open(image_path) as image:
+        image.load()
+        return image.copy()
+
+
+def encode_png(image):
+    """Return an image encoded as PNG bytes."""
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _response_image(response, name):
+    """
+    Return the image in a Gemini response (None if it only holds text).
+
+    Raises:
+        ValueError: If the response has no content, e.g. because the prompt was blocked
+    """
+    if not response.candidates:
+        feedback = getattr(response, "prompt_feedback", None)
+        reason = getattr(feedback, "block_reason", None)
+        raise ValueError(f"Gemini returned no candidates for the {name} view"
+                         + (f" (blocked: {reason})" if reason else ""))
+    candidate = response.candidates[0]
+    if candidate.content is None or not candidate.content.parts:
+        reason = getattr(candidate, "finish_reason", None)
+        raise ValueError(f"Gemini returned an empty response for the {name} view"
+                         + (f" (finish reason: {reason})" if reason else ""))
+    output_image = None
+    for part in candidate.content.parts:
+        if part.text is not None:
+            logger.info("Text response (%s view): %s", name, part.text)
+        elif part.inline_data is not None:
+            output_image = Image.open(BytesIO(part.inline_data.data))
+    return output_image
+
+
+async def generate_view(client, image, angle, semaphore=None):
+    """
+    Generate one view of the object in an already loaded image.
+
+    Args:
+        client (genai.Client): Gemini client
+        image (PIL.Image): Source image
+        angle (float): Rotation in degrees
+        semaphore (asyncio.Semaphore): Optional cap on concurrent requests
+
+    Returns:
+        PIL.Image: The generated view (None if Gemini returned no image)
+
+    Raises:
+        ValueError: If Gemini returned no content (e.g. the request was blocked)
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+    async with semaphore:
+        response = await client.aio.models.generate_content(
+            model=MODEL,
+            contents=[view_prompt(angle), image],
+            config=types.GenerateContentConfig(
+                response_modalities=["Text", "Image"]
+            )
+        )
+    return _response_image(response, view_name(angle))
+
+
+def output_path_for(output_dir, angle):
+    """Return the default output path of a view, e.g. front_view_output.png."""
+    return os.path.join(output_dir, f"{view_name(angle)}_view_output.png")
+
+
+def save_views(views, output_paths):
+    """
+    Save generated views.
+
+    Args:
+        views (dict): Angle to PIL.Image (views without an image are skipped)
+        output_paths (dict): Angle to output path
+
+    Returns:
+        dict: Angle to the path written
+    """
+    written = {}
+    for angle, output_image in views.items():
+        if output_image is not None and output_paths.get(angle):
+            output_image.save(output_paths[angle])
+            written[angle] = output_paths[angle]
+            logger.info("%s view image saved to: %s", view_name(angle).capitalize(), output_paths[angle])
+    return written
+
+
+async def generate_views(image_path, angles=DEFAULT_ANGLES, output_dir=None, output_paths=None,
+                         max_concurrency=DEFAULT_CONCURRENCY, client=None, semaphore=None):
+    """
+    Generate several views of the object in the input image concurrently.
+
+    Args:
+        image_path (str): Path to the input image
+        angles (list): Rotations in degrees
+        output_dir (str): Directory to save the views in, with default names (optional)
+        output_paths (dict): Angle to output path, overriding output_dir (optional)
+        max_concurrency (int): Maximum number of requests in flight
+        client (genai.Client): Gemini client (the shared one by default)
+        semaphore (asyncio.Semaphore): Cap shared with other calls, replacing max_concurrency
+
+    Returns:
+        dict: Angle to the generated PIL.Image (None where Gemini returned no image)
+    """
+    client = client or get_client()
+    # Decoding a large source takes long enough to stall other requests on the loop
+    image = await asyncio.to_thread(load_image, image_path)
+    angles = list(dict.fromkeys(normalize_angle(angle) for angle in angles))
+    semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+
+    results = await asyncio.gather(*[generate_view(client, image, angle, semaphore) for angle in angles])
+    views = dict(zip(angles, results))
+
+    # Write all outputs together once every view is in
+    paths = {}
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {angle: output_path_for(output_dir, angle) for angle in angles}
+    if output_paths:
+        paths.update({normalize_angle(angle): path for angle, path in output_paths.items()})
+    if paths:
+        await asyncio.to_thread(save_views, views, paths)
+    return views
+
+
+def generate_multi_view(image_path, angles=DEFAULT_ANGLES, output_dir=None, output_paths=None,
+                        max_concurrency=DEFAULT_CONCURRENCY):
+    """Synchronous version of generate_views for scripts."""
+    return asyncio.run(generate_views(image_path, angles, output_dir, output_paths, max_concurrency))
+
+
+def generate_single_view(image_path, angle, output_path=None):
+    """
+    Generate one view of the object in the input image.
+
+    Args:
+        image_path (str): Path to the input image
+        angle (float): Rotation in degrees
+        output_path (str): Path to save the output image (optional)
+
+    Returns:
+        PIL.Image: The generated view image
+    """
+    output_paths = {angle: output_path} if output_path else None
+    return generate_multi_view(image_path, [angle], output_paths=output_paths)[normalize_angle(angle)]
+
+
+def parse_angles(value):
+    """Parse a comma-separated list of angles."""
+    return [normalize_angle(angle) for angle in value.split(",") if angle.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate several views of a 3D object with Gemini")
+    parser.add_argument("input_image_path")
+    parser.add_argument("--angles", type=parse_angles, default=list(DEFAULT_ANGLES),
+                        help="Comma-separated rotations in degrees (default: 0,90,180,270)")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of Gemini requests in flight")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    views = generate_multi_view(args.input_image_path, args.angles, args.output_dir, max_concurrency=args.concurrency)
+    missing = [view_name(angle) for angle, output_image in views.items() if output_image is None]
+    if missing:
+        logger.error("No image returned for: %s", ", ".join(missing))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    Recent latencies per key (e.g. model and image size), for percentile lookups.
+
+    Args:
+        window (int): Latencies kept per key
+        min_samples (int): Latencies needed before a percentile is reported
+    """
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+
+    def record(self, key, seconds):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key, pct):
+        """Return the pct-th percentile (nearest rank) of recent latencies, or None if too few were seen."""
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def keys(self):
+        return list(self._samples)
+
+
+class HedgePolicy:
+    """
+    Decides when to send a second copy of a slow request.
+
+    A request that hasn't finished after the `percentile`-th percentile of
+    recent latency for its key is hedged: an identical request is sent and
+    whichever answers first wins. Hedges draw on a budget that grows by
+    `max_fraction` per request (up to `burst`), so at most that fraction of
+    traffic is duplicated. No request is hedged before `min_delay` seconds.
+
+    Latency is measured on the first copy only. When it loses to its hedge,
+    the time it had run when it was cancelled is recorded as a censored
+    sample, so slow requests still count and the percentile doesn't drift
+    down as hedges win.
+
+    Args:
+        percentile (float): Latency percentile after which a request is hedged
+        max_fraction (float): Largest share of requests that may be hedged
+        min_samples (int): Latencies needed for a key before its requests are hedged
+        min_delay (float): Shortest wait before hedging, in seconds
+        window (int): Latencies kept per key
+        burst (float): Most hedges that may be sent back to back
+    """
+
+    def __init__(self, percentile=95, max_fraction=0.05, min_samples=20, min_delay=1.0, window=200, burst=5):
+        self.percentile = percentile
+        self.max_fraction = max_fraction
+        self.min_delay = min_delay
+        self.burst = burst
+        self.latency = LatencyTracker(window, min_samples)
+        self.budget = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.budget_exhausted = 0
+        self.skipped = 0
+
+    def delay(self, key):
+        """Return the seconds to wait before hedging a request for key, or None to not hedge it."""
+        threshold = self.latency.percentile(key, self.percentile)
+        return None if threshold is None else max(self.min_delay, threshold)
+
+    def _try_hedge(self, allow):
+        if self.budget < 1:
+            self.budget_exhausted += 1
+            return False
+        if allow is not None and not allow():
+            self.skipped += 1
+            return False
+        self.budget -= 1
+        self.hedged += 1
+        return True
+
+    async def run(self, key, request, allow=None):
+        """
+        Run request(), hedging it with a second call if it is slow.
+
+        Args:
+            key: Latency key of the request, e.g. (model, size)
+            request (callable): Coroutine function sending the request
+            allow (callable): Returns False when a hedge shouldn't be sent right now (optional)
+
+        Returns:
+            The result of whichever call finished first without an error
+        """
+        self.requests += 1
+        self.budget = min(self.burst, self.budget + self.max_fraction)
+        delay = self.delay(key)
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(key, request, started))
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._try_hedge(allow):
+                    tasks.append(asyncio.ensure_future(request()))
+            return await self._first_success(tasks)
+        finally:
+            if len(tasks) > 1 and not primary.done():
+                # The primary took at least this long; record it as a censored sample
+                self.latency.record(key, time.monotonic() - started)
+            # The losing copy (or both, if the caller went away) is cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def _timed(self, key, request, started):
+        result = await request()
+        self.latency.record(key, time.monotonic() - started)
+        return result
+
+    async def _first_success(self, tasks):
+        """Return the first successful result; if every call fails, raise the primary's error."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if len(tasks) > 1:
+                        if task is tasks[0]:
+                            self.primary_wins += 1
+                        else:
+                            self.hedge_wins += 1
+                    return task.result()
+        raise tasks[0].exception()
+
+    def stats(self):
+        """Return hedge counters, and the current hedge delay for each key."""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "skipped": self.skipped,
+            "hedge_fraction": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_win_ratio": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            "delays": {"@".join(map(str, key)) if isinstance(key, tuple) else str(key): self.delay(key)
+                       for key in self.latency.keys()}
+        }
@@ -0,0 +1,262 @@
+import importlib
+import itertools
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields, replace
+
+# Default limits for the in-memory image cache (0 disables a limit)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("IMAGE_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_TTL = float(os.environ.get("IMAGE_CACHE_TTL", str(24 * 60 * 60)))
+
+
+@dataclass(slots=True)
+class ImageRecord:
+    """Parameters and state of one generated image."""
+    prompt: str
+    height: int = 1024
+    width: int = 1024
+    steps: int = 20
+    model: str = "fluently-xl"
+    image_url: str = ""
+    approved: bool = False
+    # image_url is a low-step, low-resolution preview; approving it renders the full image
+    draft: bool = False
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self):
+        """Return the record as a plain dict (the shape exposed by /debug/cache)."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict, ignoring unknown keys."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+    def generation_params(self):
+        """Return the parameters needed to generate this image again."""
+        return {
+            "prompt": self.prompt,
+            "height": self.height,
+            "width": self.width,
+            "steps": self.steps,
+            "model": self.model
+        }
+
+
+def estimate_size(record):
+    """Roughly estimate the memory held by a record, in bytes."""
+    return (sys.getsizeof(record)
+            + sys.getsizeof(record.prompt)
+            + sys.getsizeof(record.model)
+            + sys.getsizeof(record.image_url))
+
+
+class ImageCache:
+    """
+    Interface for image record storage.
+
+    Backends store ImageRecord objects keyed by image ID and keep hit, miss
+    and eviction counters. Records returned by get() must be written back
+    with put() or update() for changes to be visible to other backends'
+    readers, so callers always go through update() to mutate a record.
+
+    Async code calls the *_async variants. They run the sync methods
+    directly here; backends whose calls can block on the network or disk
+    override them to keep that work off the event loop.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, image_id):
+        """Return the record for image_id, or None if it is unknown."""
+        raise NotImplementedError
+
+    def put(self, image_id, record):
+        """Store a record under image_id."""
+        raise NotImplementedError
+
+    def delete(self, image_id):
+        """Remove a record; return True if it existed."""
+        raise NotImplementedError
+
+    def items(self):
+        """Iterate over (image_id, record) pairs without touching counters."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+    def update(self, image_id, **changes):
+        """
+        Apply field changes to a stored record.
+
+        Returns:
+            ImageRecord: The updated record, or None if image_id is unknown
+        """
+        record = self.get(image_id)
+        if record is None:
+            return None
+        record = replace(record, **changes)
+        self.put(image_id, record)
+        return record
+
+    async def get_async(self, image_id):
+        """Like get(), without blocking the event loop."""
+        return self.get(image_id)
+
+    async def put_async(self, image_id, record):
+        """Like put(), without blocking the event loop."""
+        self.put(image_id, record)
+
+    async def update_async(self, image_id, **changes):
+        """Like update(), without blocking the event loop."""
+        return self.update(image_id, **changes)
+
+    def __contains__(self, image_id):
+        return self.get(image_id) is not None
+
+    def stats(self):
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def snapshot(self, limit=None):
+        """Return records (all, or the first limit) as plain dicts keyed by image ID."""
+        return {image_id: record.to_dict() for image_id, record in itertools.islice(self.items(), limit)}
+
+
+class MemoryImageCache(ImageCache):
+    """
+    In-process image cache with LRU eviction, a TTL and a memory budget.
+
+    Args:
+        max_entries (int): Maximum number of records kept (0 for unbounded)
+        max_bytes (int): Approximate memory budget in bytes (0 for unbounded)
+        ttl (float): Seconds a record lives after its last write (0 disables expiry)
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # image_id -> (record, size, expires_at), least recently used first
+        self._entries = OrderedDict()
+        self.current_bytes = 0
+
+    def _expired(self, expires_at, now):
+        return self.ttl and now >= expires_at
+
+    def _remove(self, image_id):
+        _, size, _ = self._entries.pop(image_id)
+        self.current_bytes -= size
+
+    def _evict(self):
+        """Drop expired records, then least recently used ones, until within limits."""
+        now = time.monotonic()
+        while self._entries:
+            oldest_id, (_, _, expires_at) = next(iter(self._entries.items()))
+            if self._expired(expires_at, now):
+                self._remove(oldest_id)
+                self.expirations += 1
+            elif ((self.max_entries and len(self._entries) > self.max_entries)
+                  or (self.max_bytes and self.current_bytes > self.max_bytes)):
+                self._remove(oldest_id)
+                self.evictions += 1
+            else:
+                break
+
+    def get(self, image_id):
+        entry = self._entries.get(image_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        record, _, expires_at = entry
+        if self._expired(expires_at, time.monotonic()):
+            self._remove(image_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(image_id)
+        self.hits += 1
+        return record
+
+    def put(self, image_id, record):
+        if image_id in self._entries:
+            self._remove(image_id)
+        size = estimate_size(record)
+        self._entries[image_id] = (record, size, time.monotonic() + self.ttl)
+        self.current_bytes += size
+        self._evict()
+
+    def delete(self, image_id):
+        if image_id not in self._entries:
+            return False
+        self._remove(image_id)
+        return True
+
+    def items(self):
+        now = time.monotonic()
+        return [(image_id, record) for image_id, (record, _, expires_at) in self._entries.items()
+                if not self._expired(expires_at, now)]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl
+        })
+        return stats
+
+
+# Registered backends ("module:Class"), selected with the IMAGE_CACHE_BACKEND environment variable.
+# Backends are imported lazily so optional ones don't load unless configured.
+BACKENDS = {
+    "memory": "image_cache:MemoryImageCache",
+    "sqlite": "image_store:SQLiteImageCache",
+    # Shared by every worker and host; configured with SHARED_STATE_URL
+    "shared": "shared_state:SharedImageCache"
+}
+
+
+def create_image_cache(backend=None, **kwargs):
+    """
+    Create an image cache for the configured backend.
+
+    Args:
+        backend (str): Backend name (defaults to IMAGE_CACHE_BACKEND or "memory")
+        **kwargs: Backend-specific options
+
+    Returns:
+        ImageCache: The cache instance
+    """
+    backend = backend or os.environ.get("IMAGE_CACHE_BACKEND", "memory")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown image cache backend '{backend}'. Available: {', '.join(sorted(BACKENDS))}")
+    module_name, class_name = BACKENDS[backend].split(":")
+    cache_class = getattr(importlib.import_module(module_name), class_name)
+    return cache_class(**kwargs)
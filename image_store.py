@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from image_cache import ImageRecord, MemoryImageCache
+
+logger = logging.getLogger(__name__)
+
+# Location of the SQLite database and write-behind/warm-start tuning
+DEFAULT_PATH = os.environ.get("IMAGE_STORE_PATH", "images.db")
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("IMAGE_STORE_FLUSH_INTERVAL", "0.5"))
+DEFAULT_BATCH_SIZE = int(os.environ.get("IMAGE_STORE_BATCH_SIZE", "500"))
+DEFAULT_WARM_LIMIT = int(os.environ.get("IMAGE_STORE_WARM_LIMIT", "1000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    image_id TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    image_url TEXT NOT NULL,
+    approved INTEGER NOT NULL DEFAULT 0,
+    draft INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_prompt_hash ON images (prompt_hash);
+CREATE INDEX IF NOT EXISTS idx_images_model ON images (model);
+CREATE INDEX IF NOT EXISTS idx_images_approved ON images (approved);
+CREATE INDEX IF NOT EXISTS idx_images_updated_at ON images (updated_at);
+"""
+
+COLUMNS = "image_id, prompt, height, width, steps, model, image_url, approved, draft, created_at"
+
+UPSERT = """
+INSERT INTO images (image_id, prompt, prompt_hash, height, width, steps, model,
+                    image_url, approved, draft, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (image_id) DO UPDATE SET
+    prompt = excluded.prompt,
+    prompt_hash = excluded.prompt_hash,
+    height = excluded.height,
+    width = excluded.width,
+    steps = excluded.steps,
+    model = excluded.model,
+    image_url = excluded.image_url,
+    approved = excluded.approved,
+    draft = excluded.draft,
+    updated_at = excluded.updated_at
+"""
+
+
+def prompt_hash(prompt):
+    """Return the indexed hash of a prompt."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _connect(path):
+    """Open a connection configured for WAL mode."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only syncs at checkpoints and is still crash-safe
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _row_to_record(row):
+    image_id, prompt, height, width, steps, model, image_url, approved, draft, created_at = row
+    return image_id, ImageRecord(prompt=prompt, height=height, width=width, steps=steps,
+                                 model=model, image_url=image_url, approved=bool(approved),
+                                 draft=bool(draft), created_at=created_at)
+
+
+class SQLiteImageStore:
+    """
+    On-disk image record store using SQLite in WAL mode.
+
+    Writes are queued in memory and flushed in batches by a background thread,
+    so callers never wait on disk I/O. Pending writes, and the batch being
+    flushed, are visible to load() immediately. Flushes are serialized so
+    batches commit in the order they were taken. Reads use their own
+    connection and never wait for a flush. Call close() to flush outstanding
+    writes.
+
+    Args:
+        path (str): Database file path
+        flush_interval (float): Seconds between background flushes
+        batch_size (int): Pending writes that trigger an early flush
+    """
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn = _connect(path)
+        self._conn.executescript(SCHEMA)
+        # Databases created before drafts existed get the column added
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+        if "draft" not in columns:
+            self._conn.execute("ALTER TABLE images ADD COLUMN draft INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        # Readers get their own connection; in WAL mode they don't block on the writer
+        self._read_conn = _connect(path)
+        self._read_lock = threading.Lock()
+        # Held from taking a batch until it commits, so batches can't commit out of order
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        # The batch being flushed, still served by load() until it commits
+        self._flushing = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.flushes = 0
+        self.rows_written = 0
+        self._writer = threading.Thread(target=self._write_loop, name="image-store-writer", daemon=True)
+        self._writer.start()
+
+    def write(self, image_id, record):
+        """Queue a record for writing; later writes to the same ID replace earlier ones."""
+        with self._pending_lock:
+            self._pending[image_id] = (record, time.time())
+            pending = len(self._pending)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all pending records in a single transaction."""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if not batch:
+                return 0
+            rows = [
+                (image_id, r.prompt, prompt_hash(r.prompt), r.height, r.width, r.steps, r.model,
+                 r.image_url, int(r.approved), int(r.draft), r.created_at, updated_at)
+                for image_id, (r, updated_at) in batch.items()
+            ]
+            try:
+                with self._conn:
+                    self._conn.executemany(UPSERT, rows)
+            finally:
+                with self._pending_lock:
+                    self._flushing = {}
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def _write_loop(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error("Error flushing image store: %s", e)
+
+    def _query(self, sql, args=()):
+        with self._read_lock:
+            return self._read_conn.execute(sql, args).fetchall()
+
+    def load(self, image_id):
+        """Return the record for image_id, or None if it was never stored."""
+        with self._pending_lock:
+            pending = self._pending.get(image_id) or self._flushing.get(image_id)
+        if pending is not None:
+            return pending[0]
+        rows = self._query(f"SELECT {COLUMNS} FROM images WHERE image_id = ?", (image_id,))
+        return _row_to_record(rows[0])[1] if rows else None
+
+    def load_hot(self, limit=DEFAULT_WARM_LIMIT):
+        """Return the most recently written records, oldest first."""
+        rows = self._query(f"SELECT {COLUMNS} FROM images ORDER BY updated_at DESC LIMIT ?", (limit,))
+        return [_row_to_record(row) for row in reversed(rows)]
+
+    def find(self, prompt=None, model=None, approved=None, limit=100):
+        """
+        Look up records through the prompt hash, model and approval indexes.
+
+        Args:
+            prompt (str): Exact prompt to match
+            model (str): Model ID to match
+            approved (bool): Approval status to match
+            limit (int): Maximum number of records returned
+
+        Returns:
+            list: (image_id, ImageRecord) pairs, newest first
+        """
+        self.flush()
+        clauses, args = [], []
+        if prompt is not None:
+            clauses.append("prompt_hash = ?")
+            args.append(prompt_hash(prompt))
+        if model is not None:
+            clauses.append("model = ?")
+            args.append(model)
+        if approved is not None:
+            clauses.append("approved = ?")
+            args.append(int(approved))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT {COLUMNS} FROM images {where} ORDER BY updated_at DESC LIMIT ?",
+                           (*args, limit))
+        return [_row_to_record(row) for row in rows]
+
+    def count(self):
+        """Return the number of records on disk (including pending writes)."""
+        self.flush()
+        return self._query("SELECT COUNT(*) FROM images")[0][0]
+
+    def close(self):
+        """Stop the writer thread, flush pending writes and close the database."""
+        self._stopped = True
+        self._wakeup.set()
+        self._writer.join()
+        self.flush()
+        self._conn.close()
+        self._read_conn.close()
+
+
+class SQLiteImageCache(MemoryImageCache):
+    """
+    Memory cache backed by a SQLiteImageStore.
+
+    The bounded in-memory LRU serves hot records; misses fall through to
+    disk, so records survive restarts and memory evictions. At startup only
+    the most recently written records are loaded.
+
+    Args:
+        path (str): Database file path
+        warm_limit (int): Records loaded into memory at startup
+        **kwargs: Limits passed to MemoryImageCache
+    """
+
+    def __init__(self, path=DEFAULT_PATH, warm_limit=DEFAULT_WARM_LIMIT, **kwargs):
+        super().__init__(**kwargs)
+        self.store = SQLiteImageStore(path)
+        self.store_hits = 0
+        for image_id, record in self.store.load_hot(warm_limit):
+            super().put(image_id, record)
+
+    def get(self, image_id):
+        record = super().get(image_id)
+        if record is None:
+            record = self.store.load(image_id)
+            if record is not None:
+                self._promote(image_id, record)
+        return record
+
+    def _promote(self, image_id, record):
+        """Keep a record read from disk in memory."""
+        self.store_hits += 1
+        super().put(image_id, record)
+
+    async def get_async(self, image_id):
+        record = super().get(image_id)
+        if record is None:
+            # Misses read from disk on a worker thread
+            record = await asyncio.to_thread(self.store.load, image_id)
+            if record is not None:
+                self._promote(image_id, record)
+        return record
+
+    async def update_async(self, image_id, **changes):
+        # Bring a record on disk into memory first, so update() doesn't read from disk
+        if await self.get_async(image_id) is None:
+            return None
+        return self.update(image_id, **changes)
+
+    def put(self, image_id, record):
+        super().put(image_id, record)
+        self.store.write(image_id, record)
+
+    def delete(self, image_id):
+        # Deleting only drops the in-memory copy; the record stays on disk
+        return super().delete(image_id)
+
+    def close(self):
+        self.store.close()
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            "store_path": self.store.path,
+            "store_hits": self.store_hits,
+            "store_flushes": self.store.flushes,
+            "store_rows_written": self.store.rows_written
+        })
+        return stats
@@ -0,0 +1,297 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes (lower runs first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+
+# Worker pool and queue defaults
+DEFAULT_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+DEFAULT_MAX_QUEUED = int(os.environ.get("JOB_QUEUE_MAX", "1000"))
+DEFAULT_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "3600"))
+DEFAULT_MAX_FINISHED = int(os.environ.get("JOB_RESULTS_MAX", "10000"))
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass(slots=True)
+class Job:
+    """A unit of work tracked by the job queue."""
+    job_id: str
+    payload: Any
+    priority: int = PRIORITY_NORMAL
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Optional[asyncio.Future] = None
+
+    def to_dict(self):
+        """Return the externally visible job state."""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+    def status_dict(self):
+        """Return the status shared with other workers: state, plus the result or error once finished."""
+        status = {"status": self.status}
+        if self.status == DONE:
+            status["result"] = self.result
+        elif self.status == FAILED:
+            status["error"] = self.error
+        return status
+
+
+class JobQueue:
+    """
+    Priority job queue drained by a pool of asyncio workers.
+
+    Jobs are run by handler(payload) in priority order (FIFO within a lane).
+    Submitting beyond max_queued pending jobs raises QueueFullError so callers
+    can apply backpressure. Finished jobs are kept for result_ttl seconds (at
+    most max_finished of them) so their status can be polled; a job whose
+    result was handed to a caller by wait() is forgotten at once.
+
+    With a shared state backend, every status change is also published
+    there, so a status request that lands on another worker or host can
+    still be answered (see status()). Publishing happens in the background:
+    one task writes the latest status of each changed job in a thread, in
+    batches, so the event loop never waits on the backend.
+
+    Args:
+        handler (callable): Coroutine function run for each job payload
+        workers (int): Number of concurrent workers
+        max_queued (int): Maximum number of jobs waiting to run
+        result_ttl (float): Seconds finished jobs stay queryable
+        max_finished (int): Most finished jobs kept; the oldest are forgotten first
+        state (shared_state.StateBackend): Shared backend job status is published to (optional)
+    """
+
+    def __init__(self, handler, workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED, result_ttl=DEFAULT_RESULT_TTL,
+                 max_finished=DEFAULT_MAX_FINISHED, state=None):
+        self.handler = handler
+        self.state = state
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self.jobs = {}
+        # job_id -> finished Job, in the order they finished (so pruning stops at the first live one)
+        self._finished = OrderedDict()
+        # job_id -> status not yet written to shared state (only the latest one is kept)
+        self._unpublished = {}
+        self._publisher = None
+        self._queue = None
+        self._tasks = []
+        self._sequence = itertools.count()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _ensure_workers(self):
+        """Start the worker pool on the running loop if it isn't running yet."""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def start(self):
+        """Start the worker pool."""
+        self._ensure_workers()
+
+    async def stop(self):
+        """Cancel the workers; jobs still queued are marked failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self.jobs.values():
+            if job.status in (PENDING, RUNNING):
+                self._finish(job, error=RuntimeError("Server shutting down"))
+        await self.flush()
+
+    @property
+    def depth(self):
+        """Number of jobs waiting to run."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _prune(self):
+        """Forget finished jobs older than result_ttl, then the oldest ones beyond max_finished."""
+        cutoff = time.time() - self.result_ttl
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if job.finished_at >= cutoff and len(self._finished) <= self.max_finished:
+                break
+            self._forget(job)
+
+    def _forget(self, job):
+        """Drop a finished job, unless a newer job has taken its ID."""
+        if self._finished.get(job.job_id) is job:
+            del self._finished[job.job_id]
+        if self.jobs.get(job.job_id) is job:
+            del self.jobs[job.job_id]
+
+    def submit(self, job_id, payload, priority=PRIORITY_NORMAL):
+        """
+        Queue a job.
+
+        Args:
+            job_id (str): Identifier used to poll the job
+            payload: Argument passed to the handler
+            priority (int): Lane, one of the PRIORITY_* constants
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        self._ensure_workers()
+        if self.depth >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+        self._prune()
+        job = Job(job_id=job_id, payload=payload, priority=priority,
+                  future=asyncio.get_running_loop().create_future())
+        # A finished job with the same ID (e.g. a draft being refined) is replaced
+        self._finished.pop(job_id, None)
+        self.jobs[job_id] = job
+        self._queue.put_nowait((priority, next(self._sequence), job))
+        self._publish(job)
+        return job
+
+    def get(self, job_id):
+        """Return the job with job_id, or None if it is unknown or expired."""
+        return self.jobs.get(job_id)
+
+    async def status(self, job_id):
+        """
+        Return the status of a job run by this queue or, with shared state, by any worker.
+
+        Returns:
+            dict: status, plus result or error once finished; None if the job is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.status_dict()
+        if self.state is not None:
+            try:
+                data = await asyncio.to_thread(self.state.get, f"job:{job_id}")
+            except Exception as e:
+                logger.warning("Could not read shared job status: %s", e)
+                return None
+            if data is not None:
+                return json.loads(data)
+        return None
+
+    def _publish(self, job):
+        """Queue a job's status to be shared with other workers."""
+        if self.state is None:
+            return
+        self._unpublished[f"job:{job.job_id}"] = json.dumps(job.status_dict(), default=str).encode("utf-8")
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.ensure_future(self._write_published())
+
+    async def _write_published(self):
+        # One writer, so a job's later status is never overtaken by an earlier one
+        while self._unpublished:
+            batch, self._unpublished = self._unpublished, {}
+            try:
+                await asyncio.to_thread(self.state.set_many, batch, self.result_ttl)
+            except Exception as e:
+                # Other workers fall back to the image record once the job is done
+                logger.warning("Could not publish job status: %s", e)
+
+    async def flush(self):
+        """Wait until every status change so far has been written to shared state."""
+        if self._publisher is not None:
+            await asyncio.shield(self._publisher)
+
+    async def wait(self, job):
+        """Wait for a job to finish and return its result (or raise its error)."""
+        # Shield so a caller going away doesn't cancel the job itself
+        result = await asyncio.shield(job.future)
+        # The caller has the result, so it isn't held here any longer; later status
+        # requests are answered from shared state or the image record
+        self._forget(job)
+        return result
+
+    def _finish(self, job, result=None, error=None):
+        job.finished_at = time.time()
+        if self.jobs.get(job.job_id) is job:
+            self._finished[job.job_id] = job
+        if error is None:
+            job.status = DONE
+            job.result = result
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        else:
+            job.status = FAILED
+            job.error = str(error)
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+                # Nobody may be waiting (fire-and-forget jobs); mark the error as seen
+                job.future.exception()
+        self._publish(job)
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self.running += 1
+            self._publish(job)
+            try:
+                result = await self.handler(job.payload)
+            except asyncio.CancelledError:
+                self._finish(job, error=RuntimeError("Job cancelled"))
+                raise
+            except Exception as e:
+                self._finish(job, error=e)
+            else:
+                self._finish(job, result=result)
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    def stats(self):
+        """Return queue depth, in-flight and outcome counters."""
+        return {
+            "workers": self.workers,
+            "queued": self.depth,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "retained": len(self._finished),
+            "max_queued": self.max_queued
+        }
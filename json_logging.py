@@ -0,0 +1,242 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# orjson is optional; the standard library is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Logging configuration
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Fraction of DEBUG records kept; higher levels are never sampled
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# Libraries that log every request; only their warnings are kept
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+# Correlation IDs of the request and image being handled, attached to every record
+request_id_var = contextvars.ContextVar("request_id", default=None)
+image_id_var = contextvars.ContextVar("image_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def new_request_id():
+    """Return a fresh request ID."""
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def correlation(request_id=None, image_id=None):
+    """
+    Attach correlation IDs to every record logged inside the block.
+
+    IDs left as None keep their current value.
+    """
+    tokens = []
+    if request_id is not None:
+        tokens.append((request_id_var, request_id_var.set(request_id)))
+    if image_id is not None:
+        tokens.append((image_id_var, image_id_var.set(image_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """Copies the correlation IDs onto records (runs in the caller, before the record is queued)."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.image_id = image_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of DEBUG records.
+
+    Args:
+        rate (float): Fraction of DEBUG records kept (1 keeps all)
+    """
+
+    def __init__(self, rate=LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+def _json_default(value):
+    return str(value)
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(entry, default=_json_default).decode()
+        return json.dumps(entry, default=_json_default)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never waits: when the queue is full the record is
+    dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message now, since its arguments may change once we return;
+        # formatting (including tracebacks) is left to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class CorrelationMiddleware:
+    """
+    ASGI middleware giving every HTTP request a correlation ID.
+
+    Uses the caller's X-Request-ID when present and echoes the ID back in
+    the response headers.
+
+    Args:
+        app: The wrapped ASGI application
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or new_request_id()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        with correlation(request_id=request_id):
+            await self.app(scope, receive, send_with_id)
+
+
+_listener = None
+_handler = None
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None, sample_rate=LOG_DEBUG_SAMPLE_RATE,
+                  queue_size=LOG_QUEUE_SIZE):
+    """
+    Route the root logger through a bounded queue to a writer thread.
+
+    Callers only pay for building the record and a non-blocking put; the
+    formatting and the write to stderr happen on the listener thread.
+    Calling it again replaces the previous configuration.
+
+    Args:
+        level (str): Minimum level logged
+        fmt (str): "json" for one JSON object per line, anything else for plain text
+        stream: Output stream (stderr by default, keeping stdout free for the stdio transport)
+        sample_rate (float): Fraction of DEBUG records kept
+        queue_size (int): Records buffered before new ones are dropped
+
+    Returns:
+        NonBlockingQueueHandler: The handler attached to the root logger
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if fmt == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s %(image_id)s] %(message)s"))
+
+    _handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(SamplingFilter(sample_rate))
+    _handler.addFilter(CorrelationFilter())
+    _listener = QueueListener(_handler.queue, output)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [h for h in root.handlers if not isinstance(h, NonBlockingQueueHandler)]
+    root.addHandler(_handler)
+    root.setLevel(level)
+    # httpx logs every request at INFO, which would double the volume on the hot path
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+    return _handler
+
+
+def logging_configured():
+    """Return True if setup_logging() is in effect in this process."""
+    return _handler is not None
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        _listener = None
+        _handler = None
+
+
+def stats():
+    """Return queue depth and dropped-record counts."""
+    if _handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,185 @@
+"""
+Production launcher for the MCP server.
+
+Runs the HTTP server under uvicorn with a configurable number of worker
+processes, event loop and HTTP parser, keep-alive, listen backlog,
+SO_REUSEPORT, concurrency limits and reloading, or serves MCP over stdio.
+`python server.py` uses this launcher too, so both accept the same flags.
+
+Usage:
+    python launcher.py [--workers auto] [--loop uvloop] [--http httptools] [--keep-alive 30]
+                       [--backlog 4096] [--reuse-port] [--limit-concurrency 1000] [--reload]
+
+Every option can also be set from the environment (see --help). Multiple
+workers don't share process memory, so set SHARED_STATE_URL (see
+shared_state.py) so that image records and job status are visible to all
+of them. Sending SIGHUP to the launcher replaces the workers one by one
+without dropping the listening socket.
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import socket
+import sys
+import uvicorn
+from uvicorn.supervisors import ChangeReload, Multiprocess
+from json_logging import setup_logging
+
+logger = logging.getLogger("launcher")
+
+# Import string of the application, used when workers run in their own processes
+APP = "server:app"
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _env_flag(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def parse_workers(value):
+    """Parse a worker count; "auto" or 0 means one per CPU."""
+    if str(value).lower() == "auto" or str(value) == "0":
+        return os.cpu_count() or 1
+    workers = int(value)
+    if workers < 0:
+        raise argparse.ArgumentTypeError("workers must be positive")
+    return workers
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Venice AI Image Generator MCP Server")
+    parser.add_argument("--transport", choices=["http", "stdio"], default=os.environ.get("MCP_TRANSPORT", "http"),
+                        help="Serve over HTTP or over stdin/stdout")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"), help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")), help="HTTP port")
+    parser.add_argument("--workers", type=parse_workers, default=parse_workers(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Worker processes, or auto for one per CPU (WEB_CONCURRENCY)")
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default=os.environ.get("SERVER_LOOP", "auto"),
+                        help="Event loop; auto uses uvloop when installed (SERVER_LOOP)")
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], default=os.environ.get("SERVER_HTTP", "auto"),
+                        help="HTTP parser; auto uses httptools when installed (SERVER_HTTP)")
+    parser.add_argument("--keep-alive", type=int, default=int(os.environ.get("KEEP_ALIVE_TIMEOUT", "5")),
+                        help="Seconds an idle keep-alive connection is held open (KEEP_ALIVE_TIMEOUT)")
+    parser.add_argument("--backlog", type=int, default=int(os.environ.get("BACKLOG", "2048")),
+                        help="Pending connections queued by the kernel (BACKLOG)")
+    parser.add_argument("--reuse-port", action=argparse.BooleanOptionalAction, default=_env_flag("REUSE_PORT"),
+                        help="Bind with SO_REUSEPORT so several launchers can share the port (REUSE_PORT)")
+    parser.add_argument("--limit-concurrency", type=int, default=_env_int("LIMIT_CONCURRENCY"),
+                        help="Connections and tasks per worker before answering 503 (LIMIT_CONCURRENCY)")
+    parser.add_argument("--limit-max-requests", type=int, default=_env_int("LIMIT_MAX_REQUESTS"),
+                        help="Requests after which a worker is replaced (LIMIT_MAX_REQUESTS)")
+    parser.add_argument("--graceful-timeout", type=int, default=_env_int("GRACEFUL_TIMEOUT"),
+                        help="Seconds in-flight requests get to finish on shutdown (GRACEFUL_TIMEOUT)")
+    parser.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=_env_flag("ACCESS_LOG", True),
+                        help="Log every request (ACCESS_LOG)")
+    parser.add_argument("--reload", action="store_true", default=_env_flag("RELOAD"),
+                        help="Restart when source files change (development only)")
+    return parser
+
+
+def _require(option, value, module):
+    """Fail early when an optional speed-up is requested but not installed."""
+    if value == module and importlib.util.find_spec(module) is None:
+        raise SystemExit(f"--{option} {module} needs the {module} package (pip install 'uvicorn[standard]')")
+
+
+def bind_socket(host, port, backlog, reuse_port=False):
+    """Bind the listening socket, optionally with SO_REUSEPORT."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise SystemExit("SO_REUSEPORT is not supported on this platform")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    logger.info("Listening", extra={"address": f"{host}:{sock.getsockname()[1]}", "reuse_port": reuse_port})
+    return sock
+
+
+def build_config(args, app=None):
+    """
+    Return the uvicorn configuration for the parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed launcher arguments
+        app: Application object; only used for a single worker without reload,
+             since worker processes import APP themselves
+    """
+    _require("loop", args.loop, "uvloop")
+    _require("http", args.http, "httptools")
+    if args.reload and args.workers > 1:
+        raise SystemExit("--reload runs a single worker; drop --workers")
+    multi_process = args.reload or args.workers > 1
+    return uvicorn.Config(
+        APP if multi_process or app is None else app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency,
+        limit_max_requests=args.limit_max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+        reload=args.reload,
+        reload_dirs=[ROOT] if args.reload else None,
+        # Sends uvicorn's own logs through the structured handler too
+        log_config=None
+    )
+
+
+def main(argv=None, server=None):
+    """
+    Run the server.
+
+    Args:
+        argv (list): Command-line arguments (defaults to sys.argv)
+        server (module): Already imported server module (when started as server.py),
+                         so it isn't imported a second time
+    """
+    args = build_parser().parse_args(argv)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    # Structured logs on stderr (LOG_LEVEL, LOG_FORMAT); workers spawned below set up their own in the lifespan
+    setup_logging()
+
+    if args.transport == "stdio":
+        if server is None:
+            import server
+        asyncio.run(server.serve_stdio())
+        return
+
+    config = build_config(args, server.app if server is not None else None)
+    if args.workers > 1 and not os.environ.get("SHARED_STATE_URL"):
+        logger.warning("Running %d workers without SHARED_STATE_URL; image records and job status are per worker, "
+                       "so approvals and status checks can miss", args.workers)
+
+    # SO_REUSEPORT needs the option set before bind, so the socket is bound here rather than by uvicorn
+    sock = bind_socket(args.host, args.port, args.backlog, args.reuse_port) if args.reuse_port else None
+    try:
+        if config.should_reload:
+            ChangeReload(config, target=uvicorn.Server(config).run, sockets=[sock or config.bind_socket()]).run()
+        elif config.workers > 1:
+            # Workers share the socket; SIGHUP replaces them one at a time, SIGTTIN/SIGTTOU add or remove one
+            Multiprocess(config, sockets=[sock or config.bind_socket()]).run()
+        else:
+            config.load_app()
+            uvicorn.Server(config).run(sockets=[sock] if sock else None)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
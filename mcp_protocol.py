@@ -0,0 +1,353 @@
+import asyncio
+import json
+import sys
+from urllib.parse import urlparse
+from fastapi.responses import Response, StreamingResponse
+from fast_json import dumps
+from tool_registry import ToolNotFoundError, ToolValidationError
+
+# MCP protocol revisions this server understands, newest first
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# Largest single message accepted on stdio
+STDIO_LINE_LIMIT = 16 * 1024 * 1024
+
+# Hosts whose browser origins are always allowed on the HTTP transport
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class JSONRPCError(Exception):
+    """
+    Error reported to the client as a JSON-RPC error object.
+
+    Args:
+        code (int): JSON-RPC error code
+        message (str): Short description of the error
+        data: Optional extra information
+    """
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def _error(request_id, code, message, data=None):
+    """Build a JSON-RPC error response."""
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def origin_allowed(origin, allowed_origins=()):
+    """
+    Check a request's Origin header against an allow-list.
+
+    Requests without an Origin (non-browser clients) and from local pages
+    are allowed; any other origin must be listed, or the list must hold "*".
+
+    Args:
+        origin (str): Value of the Origin header, or None
+        allowed_origins (collection): Allowed origins, e.g. "https://app.example.com"
+    """
+    if origin is None:
+        return True
+    if "*" in allowed_origins or origin.rstrip("/") in allowed_origins:
+        return True
+    try:
+        return urlparse(origin).hostname in LOCAL_HOSTS
+    except ValueError:
+        return False
+
+
+def _tool_result(result):
+    """Wrap a tool's return value in an MCP tools/call result."""
+    return {
+        "content": [{"type": "text", "text": dumps(result).decode()}],
+        "structuredContent": result,
+        "isError": False
+    }
+
+
+def _error_result(response):
+    """Turn a tool's HTTP error response into an MCP tools/call error result."""
+    return {"content": [{"type": "text", "text": bytes(response.body).decode()}], "isError": True}
+
+
+class MCPProtocol:
+    """
+    MCP server methods over JSON-RPC 2.0.
+
+    The protocol is independent of the transport: transports decode messages,
+    pass them to handle_payload() and send back whatever it returns. Batches
+    are run concurrently, so one slow tool call doesn't hold up the rest.
+
+    Args:
+        registry (ToolRegistry): Tools exposed through tools/list and tools/call
+        error_response (callable): Maps an exception raised by a tool to an HTTP error response
+        server_info (dict): Name and version reported by initialize
+        allowed_origins (collection): Browser origins, besides local ones, allowed on the HTTP transport
+    """
+
+    def __init__(self, registry, error_response, server_info, allowed_origins=()):
+        self.registry = registry
+        self.error_response = error_response
+        self.server_info = server_info
+        self.allowed_origins = frozenset(allowed_origins)
+        self._tools = None
+        self.methods = {
+            "initialize": self._initialize,
+            "ping": self._ping,
+            "tools/list": self._list_tools,
+            "tools/call": self._call_tool
+        }
+
+    async def handle_payload(self, payload, notify=None):
+        """
+        Handle one decoded message or a batch of them.
+
+        Args:
+            payload: Decoded JSON-RPC message or list of messages
+            notify (callable): async fn(message) used to send progress notifications
+
+        Returns:
+            The response, a list of responses for a batch, or None when no response is owed
+        """
+        if isinstance(payload, list):
+            if not payload:
+                return _error(None, INVALID_REQUEST, "Empty batch")
+            responses = await asyncio.gather(*[self.handle(message, notify) for message in payload])
+            return [response for response in responses if response is not None] or None
+        return await self.handle(payload, notify)
+
+    async def handle(self, message, notify=None):
+        """Handle a single JSON-RPC message. Notifications and responses return None."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            request_id = message.get("id") if isinstance(message, dict) else None
+            return _error(request_id, INVALID_REQUEST, "Invalid Request")
+        method = message.get("method")
+        # Responses (we never send requests) and notifications get no reply
+        if method is None or "id" not in message:
+            return None
+        request_id = message["id"]
+
+        handler = self.methods.get(method)
+        if handler is None:
+            return _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            return _error(request_id, INVALID_PARAMS, "params must be an object")
+
+        try:
+            result = await handler(params, self._progress_reporter(params, notify))
+        except JSONRPCError as e:
+            return _error(request_id, e.code, e.message, e.data)
+        except Exception as e:
+            return _error(request_id, INTERNAL_ERROR, str(e))
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def _progress_reporter(self, params, notify):
+        """Return an async fn(progress, total) sending notifications/progress, or None."""
+        token = (params.get("_meta") or {}).get("progressToken")
+        if notify is None or token is None:
+            return None
+
+        async def report(progress, total=None):
+            notification = {"progressToken": token, "progress": progress}
+            if total is not None:
+                notification["total"] = total
+            await notify({"jsonrpc": "2.0", "method": "notifications/progress", "params": notification})
+        return report
+
+    async def _initialize(self, params, progress):
+        requested = params.get("protocolVersion")
+        return {
+            "protocolVersion": requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0],
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": self.server_info
+        }
+
+    async def _ping(self, params, progress):
+        return {}
+
+    async def _list_tools(self, params, progress):
+        # The registry is complete by the time the first client connects
+        if self._tools is None:
+            self._tools = {"tools": [
+                {"name": d["name"], "description": d["description"], "inputSchema": d["parameters"]}
+                for d in self.registry.schemas()
+            ]}
+        return self._tools
+
+    async def _call_tool(self, params, progress):
+        name = params.get("name")
+        if not isinstance(name, str):
+            raise JSONRPCError(INVALID_PARAMS, "Missing tool name")
+        try:
+            result = await self.registry.call(name, params.get("arguments") or {})
+        except ToolNotFoundError as e:
+            raise JSONRPCError(INVALID_PARAMS, str(e))
+        except ToolValidationError as e:
+            raise JSONRPCError(INVALID_PARAMS, str(e), e.errors)
+        except Exception as e:
+            # Tool failures are reported in the result so the model can see them
+            result = self.error_response(e)
+
+        if isinstance(result, StreamingResponse):
+            result = await self._collect_stream(result, progress)
+        if isinstance(result, Response):
+            return _error_result(result)
+        return _tool_result(result)
+
+    async def _collect_stream(self, response, progress):
+        """
+        Gather a streamed batch result back into {"results": [...]}.
+
+        Each item is reported as a progress notification as soon as it arrives.
+        """
+        items = {}
+        async for line in response.body_iterator:
+            item = json.loads(line)
+            if "index" in item:
+                items[item["index"]] = item["result"]
+                if progress is not None:
+                    await progress(len(items))
+        return {"results": [items[index] for index in sorted(items)]}
+
+    async def http_response(self, request):
+        """
+        Handle a streamable HTTP POST carrying a message or batch.
+
+        Returns plain JSON, except when the client accepts text/event-stream and
+        asked for progress, in which case notifications and then the response
+        are sent as Server-Sent Events. Posts with only notifications get a 202.
+        Posts from a browser origin that isn't allowed get a 403, so a page on
+        another site can't reach the server through DNS rebinding.
+        """
+        if not origin_allowed(request.headers.get("origin"), self.allowed_origins):
+            return Response(content=dumps(_error(None, INVALID_REQUEST, "Origin not allowed")),
+                            status_code=403, media_type="application/json")
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            return Response(content=dumps(_error(None, PARSE_ERROR, "Parse error")),
+                            status_code=400, media_type="application/json")
+
+        messages = payload if isinstance(payload, list) else [payload]
+        wants_progress = any(
+            isinstance(m, dict) and isinstance(m.get("params"), dict)
+            and (m["params"].get("_meta") or {}).get("progressToken") is not None
+            for m in messages
+        )
+        if not (wants_progress and "text/event-stream" in request.headers.get("accept", "")):
+            response = await self.handle_payload(payload)
+            if response is None:
+                return Response(status_code=202)
+            return Response(content=dumps(response), media_type="application/json")
+
+        async def events():
+            queue = asyncio.Queue()
+            task = asyncio.ensure_future(self.handle_payload(payload, queue.put))
+            task.add_done_callback(lambda t: queue.put_nowait(None))
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                yield b"event: message\ndata: " + dumps(message) + b"\n\n"
+            response = task.result()
+            if response is not None:
+                yield b"event: message\ndata: " + dumps(response) + b"\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+class StdioTransport:
+    """
+    Newline-delimited JSON-RPC over stdin/stdout.
+
+    Every incoming line is dispatched as its own task, so requests are
+    pipelined: many calls can be in flight at once and responses are written
+    as they complete, matched to their request by id. A notifications/cancelled
+    message cancels the in-flight request it names.
+
+    Nothing but protocol messages may reach stdout, so constructing the
+    transport with the default output points sys.stdout at stderr.
+
+    Args:
+        protocol (MCPProtocol): Protocol handling the messages
+        reader (asyncio.StreamReader): Input stream (stdin when omitted)
+        output: Binary file object for responses (stdout when omitted)
+    """
+
+    def __init__(self, protocol, reader=None, output=None):
+        self.protocol = protocol
+        self.reader = reader
+        if output is None:
+            output = sys.stdout.buffer
+            sys.stdout = sys.stderr
+        self.output = output
+        self.in_flight = {}
+        self.tasks = set()
+
+    async def send(self, message):
+        """Write one message; writes happen on the event loop, so lines never interleave."""
+        self.output.write(dumps(message) + b"\n")
+        self.output.flush()
+
+    async def _open_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=STDIO_LINE_LIMIT)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        return reader
+
+    async def _dispatch(self, payload):
+        response = await self.protocol.handle_payload(payload, self.send)
+        if response is not None:
+            await self.send(response)
+
+    def _cancel(self, params):
+        task = self.in_flight.get((params or {}).get("requestId"))
+        if task is not None:
+            task.cancel()
+
+    async def run(self):
+        """Serve until stdin is closed, then let in-flight requests finish."""
+        reader = self.reader or await self._open_stdin()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                await self.send(_error(None, PARSE_ERROR, "Parse error"))
+                continue
+
+            if isinstance(payload, dict) and payload.get("method") == "notifications/cancelled":
+                self._cancel(payload.get("params"))
+                continue
+
+            task = asyncio.ensure_future(self._dispatch(payload))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            # Cancelled requests get no response, as the protocol requires
+            if isinstance(payload, dict) and "id" in payload:
+                request_id = payload["id"]
+                self.in_flight[request_id] = task
+                task.add_done_callback(lambda t, request_id=request_id: self.in_flight.get(request_id) is t
+                                       and self.in_flight.pop(request_id))
+
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,272 @@
+import asyncio
+import bisect
+import math
+import os
+
+# Set METRICS_ENABLED=false to turn off the per-call instrumentation
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() != "false"
+
+# Seconds between event-loop lag probes
+EVENT_LOOP_LAG_INTERVAL = float(os.environ.get("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from fast cache hits to slow generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Label sets beyond this many per metric are folded into "other" to bound memory
+DEFAULT_MAX_SERIES = 200
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class of labelled metrics updated in process."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), max_series=DEFAULT_MAX_SERIES):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self.series = {}
+
+    def _key(self, labelvalues):
+        if labelvalues in self.series or len(self.series) < self.max_series:
+            return labelvalues
+        return ("other",) * len(self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    metric_type = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        key = self._key(labelvalues)
+        self.series[key] = self.series.get(key, 0) + amount
+
+    def value(self, *labelvalues):
+        return self.series.get(labelvalues, 0)
+
+    def collect(self):
+        lines = self.header()
+        for labelvalues, value in self.series.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram with fixed buckets.
+
+    observe() is a bisect and two additions; cumulative counts are only
+    computed when the metrics are rendered.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, max_series=DEFAULT_MAX_SERIES):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        key = self._key(labelvalues)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        # Bucket bounds are inclusive ("le"), which is what bisect_left gives
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labelvalues):
+        series = self.series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def collect(self):
+        lines = self.header()
+        for labelvalues, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class StatsCollector:
+    """
+    Exposes the stats() dict of a component as metrics, read at scrape time.
+
+    Costs nothing between scrapes; stats_fn is called once per scrape.
+
+    Args:
+        prefix (str): Metric name prefix, e.g. "image_cache"
+        stats_fn (callable): Returns the component's stats dict
+        counters (tuple): Keys exported as <prefix>_<key>_total counters
+        gauges (tuple): Keys exported as <prefix>_<key> gauges
+        documentation (str): Help text
+    """
+
+    def __init__(self, prefix, stats_fn, counters=(), gauges=(), documentation=""):
+        self.prefix = prefix
+        self.stats_fn = stats_fn
+        self.counters = counters
+        self.gauges = gauges
+        self.documentation = documentation
+
+    def collect(self):
+        stats = self.stats_fn()
+        lines = []
+        for keys, metric_type, suffix in ((self.counters, "counter", "_total"), (self.gauges, "gauge", "")):
+            for key in keys:
+                value = stats.get(key)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.prefix}_{key}{suffix}"
+                lines.append(f"# HELP {name} {self.documentation} ({key.replace('_', ' ')})")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.collectors = []
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def counter(self, name, documentation, labelnames=(), **kwargs):
+        return self.register(Counter(name, documentation, labelnames, **kwargs))
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def stats(self, prefix, stats_fn, counters=(), gauges=(), documentation=""):
+        return self.register(StatsCollector(prefix, stats_fn, counters, gauges, documentation))
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for collector in self.collectors:
+            try:
+                lines.extend(collector.collect())
+            except Exception:
+                # One broken component shouldn't take down the whole scrape
+                continue
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class EventLoopLagMonitor:
+    """
+    Measures event-loop lag: how late a periodic sleep wakes up.
+
+    Lag means callbacks are blocking the loop, which delays every in-flight
+    request at once.
+
+    Args:
+        histogram (Histogram): Receives each lag sample
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, histogram=None, interval=EVENT_LOOP_LAG_INTERVAL):
+        self.histogram = histogram
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            if self.histogram is not None:
+                self.histogram.observe(self.lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {"current_lag_seconds": self.lag, "max_lag_seconds": self.max_lag}
+
+
+class InFlightMiddleware:
+    """
+    ASGI middleware counting HTTP requests currently being served.
+
+    Streaming responses count until their last byte is sent.
+
+    Args:
+        app: The wrapped ASGI application
+        tracker (RequestTracker): Shared counters
+    """
+
+    def __init__(self, app, tracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.tracker.in_flight += 1
+        self.tracker.requests += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.in_flight -= 1
+
+
+class RequestTracker:
+    """HTTP request counters shared with InFlightMiddleware."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "requests": self.requests}
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Time (seconds) a fetched model list is considered fresh
+DEFAULT_TTL = float(os.environ.get("VENICE_MODELS_TTL", "300"))
+
+# Time (seconds) to wait before retrying after a failed refresh
+DEFAULT_ERROR_TTL = float(os.environ.get("VENICE_MODELS_ERROR_TTL", "30"))
+
+# Static list served when the models endpoint has never been reachable
+FALLBACK_MODELS = [
+    {
+        "id": "fluently-xl",
+        "name": "Fluently XL",
+        "description": "High-quality image generation model with excellent detail and composition"
+    },
+    {
+        "id": "fluently-base",
+        "name": "Fluently Base",
+        "description": "Standard image generation model with good quality and faster generation"
+    },
+    {
+        "id": "fluently-creative",
+        "name": "Fluently Creative",
+        "description": "Model optimized for creative and artistic image generation"
+    }
+]
+
+
+def _normalize(models_data):
+    """Extract the list of model dicts from a models endpoint response."""
+    # The API wraps the list as {"object": "list", "data": [...]}
+    if isinstance(models_data, dict):
+        models_data = models_data.get("data", models_data.get("models", []))
+    return [m for m in models_data if isinstance(m, dict) and "id" in m]
+
+
+class ModelCatalog:
+    """
+    In-process cache of the Venice image model catalog.
+
+    Reads never wait on the network once the catalog has been loaded: a stale
+    catalog is served as-is while a single background refresh runs
+    (stale-while-revalidate). Concurrent refreshes are coalesced into one
+    upstream request, and failed refreshes are retried no more often than
+    error_ttl so an outage of the models endpoint adds no latency.
+
+    Args:
+        client (VeniceClient): Client used to fetch the model list
+        ttl (float): Seconds a fetched catalog is considered fresh
+        error_ttl (float): Seconds to wait before retrying a failed refresh
+        fallback (list): Models served until the first successful fetch
+    """
+
+    def __init__(self, client, ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL, fallback=FALLBACK_MODELS):
+        self.client = client
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.fallback = list(fallback)
+        self._models = None
+        self._model_ids = frozenset(m["id"] for m in self.fallback)
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._refresh_task = None
+        self.last_error = None
+
+    @property
+    def loaded(self):
+        """Whether the catalog holds data fetched from the API."""
+        return self._models is not None
+
+    @property
+    def fresh(self):
+        """Whether the fetched catalog is still within its TTL."""
+        return self.loaded and time.monotonic() < self._expires_at
+
+    async def _fetch(self):
+        """Fetch the catalog from the API and swap it in atomically."""
+        try:
+            models = _normalize(await self.client.list_models("image"))
+        except Exception as e:
+            logger.warning("Error fetching models from API: %s", e)
+            self.last_error = str(e)
+            self._retry_at = time.monotonic() + self.error_ttl
+            raise
+        self._models = models
+        self._model_ids = frozenset(m["id"] for m in models)
+        self._expires_at = time.monotonic() + self.ttl
+        self.last_error = None
+        return models
+
+    def refresh(self):
+        """
+        Start a refresh unless one is already running.
+
+        Returns:
+            asyncio.Task: The in-flight refresh shared by all callers
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._fetch())
+            # Failures are recorded in last_error; keep the task from warning
+            self._refresh_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return self._refresh_task
+
+    def _maybe_refresh_in_background(self):
+        """Kick off a background refresh if the catalog is stale and retrying is allowed."""
+        if not self.fresh and time.monotonic() >= self._retry_at:
+            self.refresh()
+
+    async def get_models(self):
+        """
+        Return the model catalog.
+
+        Only the very first call (before anything was ever fetched) waits for
+        the API; every later call returns immediately. Validation goes through
+        has_model(), which never waits.
+
+        Returns:
+            list: Model dicts with at least an "id" key
+        """
+        if not self.loaded and time.monotonic() >= self._retry_at:
+            try:
+                await asyncio.shield(self.refresh())
+            except Exception:
+                pass
+        else:
+            self._maybe_refresh_in_background()
+        return self._models if self.loaded else self.fallback
+
+    async def has_model(self, model_id):
+        """
+        Check whether a model ID is offered, in O(1) and without waiting on the API.
+
+        The answer comes from whatever catalog is at hand; a stale or missing
+        one is refreshed in the background. Until a fetch from the API has
+        succeeded only the static fallback list is known, so an unknown model
+        is let through (with a warning) rather than rejected.
+
+        Args:
+            model_id (str): Model identifier to look up
+
+        Returns:
+            bool: True if the model is in the current catalog, or the catalog was never fetched
+        """
+        self._maybe_refresh_in_background()
+        if model_id in self._model_ids:
+            return True
+        if not self.loaded:
+            logger.warning("Model catalog unavailable; letting unknown model %r through", model_id)
+            return True
+        return False
+
+    def stats(self):
+        """Return a snapshot of the catalog state for debugging."""
+        return {
+            "loaded": self.loaded,
+            "fresh": self.fresh,
+            "model_count": len(self._model_ids),
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "last_error": self.last_error
+        }
@@ -1,10 +1,8 @@
 #!/usr/bin/env node
 
-const express = require('express');
 const { spawn } = require('child_process');
-const path = require('path');
 const chalk = require('chalk');
-const yargs = require('yargs/helpers');
+const { findServer, SERVER_CANDIDATES } = require('./index');
 const { hideBin } = require('yargs/helpers');
 
 const argv = require('yargs')(hideBin(process.argv))
@@ -19,67 +17,108 @@ const argv = require('yargs')(hideBin(process.argv))
     description: 'Venice AI API key',
     type: 'string'
   })
+  .option('transport', {
+    alias: 't',
+    description: 'Serve MCP over HTTP, or over stdin/stdout for hosts that launch the server themselves',
+    choices: ['http', 'stdio'],
+    default: 'http'
+  })
+  .option('workers', {
+    alias: 'w',
+    description: 'Worker processes, or auto for one per CPU (set SHARED_STATE_URL when above 1)',
+    type: 'string'
+  })
+  .option('loop', {
+    description: 'Event loop; auto uses uvloop when installed',
+    choices: ['auto', 'asyncio', 'uvloop']
+  })
+  .option('http', {
+    description: 'HTTP parser; auto uses httptools when installed',
+    choices: ['auto', 'h11', 'httptools']
+  })
+  .option('keep-alive', {
+    description: 'Seconds an idle keep-alive connection is held open',
+    type: 'number'
+  })
+  .option('backlog', {
+    description: 'Pending connections queued by the kernel',
+    type: 'number'
+  })
+  .option('reuse-port', {
+    description: 'Bind with SO_REUSEPORT so several servers can share the port',
+    type: 'boolean'
+  })
+  .option('limit-concurrency', {
+    description: 'Connections and tasks per worker before answering 503',
+    type: 'number'
+  })
+  .option('reload', {
+    description: 'Restart when source files change (development only)',
+    type: 'boolean'
+  })
+  .option('python', {
+    description: 'Python interpreter used to run the server',
+    type: 'string',
+    default: 'python'
+  })
   .help()
   .alias('help', 'h')
   .argv;
 
-// Create a proxy server to forward requests to the Python server
-const app = express();
 const PORT = argv.port || 8000;
+const stdio = argv.transport === 'stdio';
+
+// In stdio mode stdout carries the protocol, so all messages go to stderr
+const log = stdio ? console.error : console.log;
 
-// Start the Python server
-console.log(chalk.blue('Starting Venice AI MCP Server...'));
+log(chalk.blue('Starting Venice AI MCP Server...'));
 
 // Set environment variables for the Python process
 const env = { ...process.env };
 if (argv.apiKey) {
   env.VENICE_API_KEY = argv.apiKey;
-  console.log(chalk.green('Using provided Venice AI API key'));
+  log(chalk.green('Using provided Venice AI API key'));
 } else if (!process.env.VENICE_API_KEY) {
-  console.log(chalk.yellow('Warning: No Venice API key provided. Set with --api-key or VENICE_API_KEY environment variable'));
+  log(chalk.yellow('Warning: No Venice API key provided. Set with --api-key or VENICE_API_KEY environment variable'));
 }
 
-// Determine the path to the Python script
-// When installed globally, the package will be in node_modules
-// When run with npx, we need to use the current directory
-const serverPath = path.join(__dirname, 'server.py');
-
-// Start the Python server
-const pythonProcess = spawn('python', [serverPath], {
-  env,
-  stdio: ['ignore', 'pipe', 'pipe']
-});
-
-// Handle Python server output
-pythonProcess.stdout.on('data', (data) => {
-  console.log(chalk.cyan(`[Python] ${data.toString().trim()}`));
-});
-
-pythonProcess.stderr.on('data', (data) => {
-  console.error(chalk.red(`[Python Error] ${data.toString().trim()}`));
-});
+// Determine the path to the Python script: a repository checkout, or the copy bundled at pack time
+const serverPath = findServer();
+if (!serverPath) {
+  console.error(chalk.red(`Python server not found (looked for ${SERVER_CANDIDATES.join(', ')}).`));
+  console.error(chalk.red('Reinstall the package, or run `npm run prepack` in a repository checkout.'));
+  process.exit(1);
+}
 
-// Handle Python server exit
-pythonProcess.on('close', (code) => {
-  if (code !== 0) {
-    console.error(chalk.red(`Python server exited with code ${code}`));
-    process.exit(code);
+// Server tuning flags are forwarded only when given, so the Python side's environment defaults still apply
+const serverArgs = [serverPath, '--transport', argv.transport, '--port', String(PORT)];
+for (const name of ['workers', 'loop', 'http', 'keep-alive', 'backlog', 'limit-concurrency']) {
+  if (argv[name] !== undefined) {
+    serverArgs.push(`--${name}`, String(argv[name]));
   }
-});
+}
+if (argv.reusePort !== undefined) {
+  serverArgs.push(argv.reusePort ? '--reuse-port' : '--no-reuse-port');
+}
+if (argv.reload) {
+  serverArgs.push('--reload');
+}
 
-// Forward all requests to the Python server
-app.all('*', (req, res) => {
-  res.status(404).send('Please use the Python server directly at http://localhost:' + PORT);
+// The Python server speaks MCP itself; this process only launches it
+const pythonProcess = spawn(argv.python, serverArgs, {
+  env,
+  // With stdio the host talks JSON-RPC straight to the Python process through our stdin/stdout.
+  // Server logs (structured JSON on stderr) are passed through untouched rather than re-coloured line by line.
+  stdio: stdio ? 'inherit' : ['ignore', 'inherit', 'inherit']
 });
 
-// Start the proxy server
-app.listen(PORT + 1, () => {
+if (!stdio) {
   console.log(chalk.green(`
 ╔════════════════════════════════════════════════════════════╗
 ║                                                            ║
 ║  Venice AI Images MCP Server is running!                   ║
 ║                                                            ║
-║  - MCP Server URL: http://localhost:${PORT}                 ║
+║  - MCP Endpoint:   http://localhost:${PORT}/mcp             ║
 ║  - MCP Tools List: http://localhost:${PORT}/mcp/tools/list  ║
 ║  - MCP Tools Call: http://localhost:${PORT}/mcp/tools/call  ║
 ║                                                            ║
@@ -87,7 +126,8 @@ app.listen(PORT + 1, () => {
 ║  {                                                         ║
 ║    "mcpServers": {                                         ║
 ║      "venice-ai": {                                        ║
-║        "url": "http://localhost:${PORT}"                   ║
+║        "command": "npx",                                   ║
+║        "args": ["venice-ai-images-mcp", "-t", "stdio"]     ║
 ║      }                                                     ║
 ║    }                                                       ║
 ║  }                                                         ║
@@ -95,11 +135,20 @@ app.listen(PORT + 1, () => {
 ╚════════════════════════════════════════════════════════════╝
 `));
   console.log(chalk.blue('Press Ctrl+C to stop the server'));
+}
+
+// Handle Python server exit
+pythonProcess.on('close', (code) => {
+  if (code !== 0) {
+    console.error(chalk.red(`Python server exited with code ${code}`));
+  }
+  process.exit(code || 0);
 });
 
 // Handle process termination
-process.on('SIGINT', () => {
-  console.log(chalk.yellow('\nShutting down Venice AI MCP Server...'));
-  pythonProcess.kill();
-  process.exit(0);
-});
+for (const signal of ['SIGINT', 'SIGTERM']) {
+  process.on(signal, () => {
+    log(chalk.yellow('\nShutting down Venice AI MCP Server...'));
+    pythonProcess.kill(signal);
+  });
+}
@@ -1,6 +1,22 @@
 // This file is required for npm packages but we're using cli.js as the main entry point
-// for the executable. This file just exports the version number.
+// for the executable. It exports the version number and how the Python server is found.
+
+const fs = require('fs');
+const path = require('path');
+
+// Prefer the server from a repository checkout, falling back to the copy bundled
+// into python/ when the package is packed (see scripts/prepack.js)
+const SERVER_CANDIDATES = [
+  path.join(__dirname, '..', 'server.py'),
+  path.join(__dirname, 'python', 'server.py')
+];
+
+function findServer() {
+  return SERVER_CANDIDATES.find((candidate) => fs.existsSync(candidate)) || null;
+}
 
 module.exports = {
-  version: require('./package.json').version
+  version: require('./package.json').version,
+  SERVER_CANDIDATES,
+  findServer
 };
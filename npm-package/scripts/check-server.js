@@ -0,0 +1,33 @@
+#!/usr/bin/env node
+// Checks that the server cli.js would launch accepts the flags cli.js passes it.
+// Usage: node scripts/check-server.js [--python python3] [--bundled]
+
+const { spawnSync } = require('child_process');
+const { findServer, SERVER_CANDIDATES } = require('..');
+
+const args = process.argv.slice(2);
+const pythonIndex = args.indexOf('--python');
+const python = pythonIndex >= 0 ? args[pythonIndex + 1] : 'python';
+// --bundled checks the copy in python/ (what npm users get) even inside a checkout
+const serverPath = args.includes('--bundled') ? SERVER_CANDIDATES[1] : findServer();
+
+// Flags cli.js forwards; a server that doesn't know them would ignore stdio mode or fail
+const REQUIRED_FLAGS = ['--transport', '--port', '--workers', '--loop', '--http', '--keep-alive',
+  '--backlog', '--reuse-port', '--limit-concurrency', '--reload'];
+
+if (!serverPath || !require('fs').existsSync(serverPath)) {
+  console.error('No Python server found; run `npm run prepack` first');
+  process.exit(1);
+}
+
+const result = spawnSync(python, [serverPath, '--help'], { encoding: 'utf8' });
+if (result.error || result.status !== 0) {
+  console.error(`${serverPath} --help failed:\n${result.error || result.stderr}`);
+  process.exit(1);
+}
+const missing = REQUIRED_FLAGS.filter((flag) => !result.stdout.includes(flag));
+if (missing.length) {
+  console.error(`${serverPath} does not accept ${missing.join(', ')}`);
+  process.exit(1);
+}
+console.log(`${serverPath} accepts ${REQUIRED_FLAGS.join(', ')}`);
@@ -0,0 +1,30 @@
+#!/usr/bin/env node
+// Copies the repository's Python server into python/ so the published package runs
+// the same code as a checkout. Runs automatically before `npm pack` and `npm publish`.
+
+const fs = require('fs');
+const path = require('path');
+
+const repoRoot = path.join(__dirname, '..', '..');
+const target = path.join(__dirname, '..', 'python');
+
+// Runtime modules only: tests, benchmarks and caches stay out of the package
+const isModule = (name) => name.endsWith('.py') && !name.startsWith('test_');
+
+function copyModules(fromDir, toDir) {
+  fs.mkdirSync(toDir, { recursive: true });
+  const names = fs.readdirSync(fromDir).filter(isModule);
+  for (const name of names) {
+    fs.copyFileSync(path.join(fromDir, name), path.join(toDir, name));
+  }
+  return names.length;
+}
+
+if (!fs.existsSync(path.join(repoRoot, 'server.py'))) {
+  console.error(`No server.py in ${repoRoot}; pack the package from a repository checkout`);
+  process.exit(1);
+}
+
+fs.rmSync(target, { recursive: true, force: true });
+const copied = copyModules(repoRoot, target) + copyModules(path.join(repoRoot, 'gemini'), path.join(target, 'gemini'));
+console.log(`Bundled ${copied} Python modules into ${path.relative(process.cwd(), target) || '.'}`);
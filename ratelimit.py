@@ -0,0 +1,178 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for outbound requests.
+
+    Tokens refill at `rate` per second up to `burst`. pause() blocks every
+    caller until a deadline, which is how a server's Retry-After is honoured
+    across all in-flight work rather than only by the request that saw it.
+
+    Args:
+        rate (float): Sustained requests per second (0 disables limiting)
+        burst (int): Maximum number of requests allowed back to back
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waits = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            else:
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            self.waits += 1
+            await asyncio.sleep(delay)
+
+    def try_acquire(self):
+        """Take a token if one is available now; return False instead of waiting."""
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause(self, seconds):
+        """Hold back all callers for the given number of seconds."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "waits": self.waits
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter.
+
+    The limit grows by roughly one slot per window of successful requests
+    (additive increase) and is cut by `decrease` when the upstream signals
+    overload with a 429 or latency above `latency_target` (multiplicative
+    decrease). Decreases are spaced at least `cooldown` seconds apart so one
+    burst of failures counts as one signal.
+
+    Args:
+        initial (int): Starting concurrency limit
+        min_limit (int): Lowest allowed limit
+        max_limit (int): Highest allowed limit
+        decrease (float): Factor applied to the limit on overload
+        latency_target (float): Seconds above which a response counts as overload (0 disables)
+        cooldown (float): Minimum seconds between decreases
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=32, decrease=0.5, latency_target=0.0, cooldown=1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+        self.decreases = 0
+
+    def _wake(self):
+        """Wake as many waiters as there are free slots."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass the wake-up on if we were woken and cancelled at once
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        """Free a slot."""
+        self.in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of a request."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @property
+    def waiting(self):
+        """Number of callers queued for a slot."""
+        return sum(1 for w in self._waiters if not w.done())
+
+    def on_success(self, latency):
+        """Record a successful request and adjust the limit."""
+        if self.latency_target and latency > self.latency_target:
+            self.on_overload()
+            return
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_overload(self):
+        """Record an overload signal (429 or slow response) and back off."""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self.decreases += 1
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "decreases": self.decreases
+        }
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Return a full-jitter exponential backoff delay for a retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
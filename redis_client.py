@@ -0,0 +1,357 @@
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import unquote, urlparse
+from ratelimit import backoff_delay
+
+# Connection pool defaults
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", "32"))
+DEFAULT_TIMEOUT = float(os.environ.get("REDIS_TIMEOUT", "5"))
+
+
+class RedisError(Exception):
+    """Raised for error replies from the server."""
+
+
+class RedisConnectionError(RedisError):
+    """Raised when the server can't be reached or the connection breaks."""
+
+
+def encode_command(*args):
+    """Encode one command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisConnection:
+    """
+    One socket speaking the Redis protocol (RESP2).
+
+    Args:
+        host (str): Server host
+        port (int): Server port
+        db (int): Database selected after connecting
+        password (str): Password sent with AUTH (optional)
+        username (str): ACL user sent with AUTH (optional)
+        timeout (float): Connect and read timeout in seconds
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, username=None, timeout=DEFAULT_TIMEOUT):
+        try:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        except OSError as e:
+            raise RedisConnectionError(f"Could not connect to Redis at {host}:{port}: {e}")
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        self.closed = False
+        # Whether the connection came back out of the pool, and how many replies it has read
+        self.reused = False
+        self.replies = 0
+        if password:
+            self.execute(*(("AUTH", username, password) if username else ("AUTH", password)))
+        if db:
+            self.execute("SELECT", db)
+
+    def send(self, commands):
+        """Write several commands in a single send, without waiting for replies."""
+        try:
+            self._sock.sendall(b"".join(encode_command(*command) for command in commands))
+        except OSError as e:
+            self.close()
+            raise RedisConnectionError(f"Could not send to Redis: {e}")
+
+    def read_reply(self):
+        """
+        Read one reply.
+
+        Error replies are returned as RedisError instances rather than raised,
+        so one failed command doesn't lose the rest of a pipeline.
+        """
+        reply = self._read()
+        self.replies += 1
+        return reply
+
+    def _read(self):
+        try:
+            line = self._reader.readline()
+            if not line.endswith(b"\r\n"):
+                raise RedisConnectionError("Connection closed by Redis")
+            kind, rest = line[:1], line[1:-2]
+            if kind == b"+":
+                return rest.decode("utf-8")
+            if kind == b"-":
+                return RedisError(rest.decode("utf-8"))
+            if kind == b":":
+                return int(rest)
+            if kind == b"$":
+                length = int(rest)
+                if length < 0:
+                    return None
+                data = self._reader.read(length + 2)
+                if len(data) != length + 2:
+                    raise RedisConnectionError("Connection closed by Redis")
+                return data[:-2]
+            if kind == b"*":
+                length = int(rest)
+                return None if length < 0 else [self._read() for _ in range(length)]
+            raise RedisConnectionError(f"Unexpected reply from Redis: {line!r}")
+        except OSError as e:
+            self.close()
+            raise RedisConnectionError(f"Could not read from Redis: {e}")
+        except RedisConnectionError:
+            self.close()
+            raise
+
+    def execute(self, *args):
+        """Run one command and return its reply (raising error replies)."""
+        self.send([args])
+        reply = self.read_reply()
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Redis connections.
+
+    Idle connections are reused most recently used first; at most
+    max_connections are open at once and further callers wait for one to be
+    returned. Connections that failed are discarded instead of reused.
+
+    Args:
+        url (str): redis://[[user]:password@]host[:port][/db]
+        max_connections (int): Maximum number of open connections
+        timeout (float): Connect and read timeout in seconds
+    """
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", max_connections=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DEFAULT_TIMEOUT):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL '{url}'")
+        self.url = url
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self):
+        connection = RedisConnection(self.host, self.port, self.db, self.password, self.username, self.timeout)
+        self.created += 1
+        return connection
+
+    @contextmanager
+    def connection(self, fresh=False):
+        """Borrow a connection for the duration of the block (a newly opened one if fresh is set)."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RedisConnectionError(f"No Redis connection available within {self.timeout}s")
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle and not fresh else None
+            if connection is None:
+                connection = self._connect()
+            else:
+                connection.reused = True
+                self.reused += 1
+            try:
+                yield connection
+            except BaseException:
+                # The reply stream may be out of step; never hand this connection out again
+                connection.close()
+                raise
+            if not connection.closed:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self):
+        return {"idle": len(self._idle), "created": self.created, "reused": self.reused,
+                "max_connections": self.max_connections}
+
+
+class RedisClient:
+    """
+    Minimal Redis client over a connection pool.
+
+    Args:
+        url (str): redis://[[user]:password@]host[:port][/db]
+        max_connections (int): Maximum number of pooled connections
+        timeout (float): Connect and read timeout in seconds
+    """
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        self.pool = ConnectionPool(url, max_connections, timeout)
+        self.commands = 0
+        self.round_trips = 0
+        self.reconnects = 0
+
+    def _run(self, operation):
+        """
+        Run operation(connection) on a pooled connection.
+
+        A connection the server (or a load balancer) closed while it sat idle
+        in the pool usually only fails once a reply is read. If a reused
+        connection breaks before any reply of the operation arrived, nothing
+        was processed, so the idle connections are dropped and the operation
+        runs once more on a fresh connection.
+        """
+        connection = None
+        try:
+            with self.pool.connection() as connection:
+                replies = connection.replies
+                return operation(connection)
+        except RedisConnectionError:
+            if connection is None or not connection.reused or connection.replies != replies:
+                raise
+        self.reconnects += 1
+        self.pool.close()
+        with self.pool.connection(fresh=True) as connection:
+            return operation(connection)
+
+    def pipeline(self, commands, raise_on_error=True):
+        """
+        Send several commands in one round trip and return their replies in order.
+
+        Args:
+            commands (list): Commands as argument tuples, e.g. [("GET", "a"), ("GET", "b")]
+            raise_on_error (bool): Raise the first error reply (otherwise errors are returned in place)
+        """
+        if not commands:
+            return []
+
+        def send(connection):
+            connection.send(commands)
+            return [connection.read_reply() for _ in commands]
+
+        replies = self._run(send)
+        self.commands += len(commands)
+        self.round_trips += 1
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+        return replies
+
+    def execute(self, *args):
+        """Run one command and return its reply."""
+        return self.pipeline([args])[0]
+
+    def ping(self):
+        return self.execute("PING") == "PONG"
+
+    def get(self, key):
+        return self.execute("GET", key)
+
+    def mget(self, keys):
+        return self.execute("MGET", *keys) if keys else []
+
+    def set(self, key, value, px=None):
+        """Set a key, optionally expiring after px milliseconds."""
+        return self.execute(*(("SET", key, value, "PX", px) if px else ("SET", key, value)))
+
+    def delete(self, *keys):
+        return self.execute("DEL", *keys) if keys else 0
+
+    def update(self, key, update, px=None, max_attempts=10):
+        """
+        Atomically replace the value of key with update(current value).
+
+        Uses WATCH/MULTI/EXEC on one connection: if another client writes
+        the key between the read and the write, the write is dropped and
+        update() runs again on the new value, after a short jittered backoff.
+
+        Args:
+            key (str): Key to update
+            update (callable): Takes the current value (None if missing) and returns
+                               the new one, or None to leave the key alone
+            px (int): Expiry of the new value in milliseconds (optional)
+            max_attempts (int): Attempts before giving up under contention
+
+        Returns:
+            bytes: The value written, or None if update() returned None
+        """
+        return self._run(lambda connection: self._update(connection, key, update, px, max_attempts))
+
+    def _update(self, connection, key, update, px, max_attempts):
+        for attempt in range(max_attempts):
+            if attempt:
+                # Back off a little so writers racing on the same key don't keep colliding
+                time.sleep(backoff_delay(attempt - 1, base=0.002, cap=0.1))
+            connection.send([("WATCH", key), ("GET", key)])
+            replies = [connection.read_reply(), connection.read_reply()]
+            self.commands += 2
+            self.round_trips += 1
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+            value = update(replies[1])
+            if value is None:
+                connection.execute("UNWATCH")
+                return None
+            commands = [("MULTI",), ("SET", key, value, "PX", px) if px else ("SET", key, value), ("EXEC",)]
+            connection.send(commands)
+            replies = [connection.read_reply() for _ in commands]
+            self.commands += len(commands)
+            self.round_trips += 1
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+            # EXEC answers nil when a watched key changed
+            if replies[-1] is not None:
+                return value
+        raise RedisError(f"Gave up updating {key!r} after {max_attempts} conflicting writes")
+
+    def scan_iter(self, match=None, count=1000):
+        """Iterate over keys (optionally matching a glob pattern) with SCAN."""
+        cursor = b"0"
+        while True:
+            args = ["SCAN", cursor]
+            if match is not None:
+                args += ["MATCH", match]
+            cursor, keys = self.execute(*args, "COUNT", count)
+            yield from keys
+            if cursor in (b"0", "0"):
+                return
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        return {**self.pool.stats(), "commands": self.commands, "round_trips": self.round_trips,
+                "reconnects": self.reconnects}
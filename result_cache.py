@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Default lifetime and size of the generation result cache (TTL 0 disables caching, not coalescing)
+DEFAULT_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+# Parameters that determine the generated image
+KEY_FIELDS = ("prompt", "width", "height", "steps", "model")
+
+
+def generation_key(params):
+    """
+    Return a canonical hash of the generation parameters.
+
+    Args:
+        params (dict): Parameters with prompt, width, height, steps and model
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request
+    """
+    canonical = json.dumps({k: params.get(k) for k in KEY_FIELDS}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of upstream results with single-flight coalescing.
+
+    Concurrent callers asking for the same key share one in-flight call;
+    successful results are kept for a per-entry TTL in a bounded LRU.
+
+    Args:
+        ttl (float): Default seconds a result is reused (0 disables caching)
+        max_entries (int): Maximum number of cached results
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (result, expires_at), least recently used first
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key, result, ttl):
+        if ttl <= 0:
+            return
+        self._entries[key] = (result, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_create(self, key, factory, ttl=None, should_cache=None):
+        """
+        Return the cached result for key, or compute it once for all waiters.
+
+        Args:
+            key (str): Cache key (see generation_key)
+            factory (callable): Coroutine function producing the result
+            ttl (float): Lifetime of this entry (defaults to the cache TTL)
+            should_cache (callable): Predicate deciding whether a result is stored
+
+        Returns:
+            The cached or freshly computed result
+        """
+        result = self._lookup(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            ttl = self.ttl if ttl is None else ttl
+
+            async def run():
+                try:
+                    value = await factory()
+                    if should_cache is None or should_cache(value):
+                        self._store(key, value, ttl)
+                    return value
+                finally:
+                    self._in_flight.pop(key, None)
+
+            task = self._in_flight[key] = asyncio.ensure_future(run())
+
+        # Shield so one caller going away doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    def invalidate(self, key):
+        """Drop a cached result."""
+        self._entries.pop(key, None)
+
+    def stats(self):
+        """Return size and hit/miss/coalescing counters."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "ttl": self.ttl
+        }
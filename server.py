@@ -1,34 +1,265 @@
 import os
+import logging
+import time
 import uuid
 import json
-from typing import Dict, List, Optional
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import re
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-import uvicorn
-from venice import generate_image
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from venice import VeniceClient, VeniceError, VeniceRateLimitError
+from model_catalog import ModelCatalog
+from image_cache import ImageRecord, create_image_cache
+from result_cache import ResultCache, generation_key
+from blob_store import BlobStore
+import shared_state
+from templates import ImageWidget, WIDGET_ASSET_PATH
+from fast_json import FastJSONResponse, PreSerializedJSON, add_compression, dumps
+from tool_registry import ToolRegistry, ToolNotFoundError, ToolValidationError
+from mcp_protocol import MCPProtocol, StdioTransport
+from metrics import (MetricsRegistry, EventLoopLagMonitor, InFlightMiddleware, RequestTracker,
+                     METRICS_ENABLED, LAG_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE)
+from json_logging import (setup_logging, logging_configured, correlation, new_request_id, request_id_var,
+                          CorrelationMiddleware, stats as logging_stats)
+from jobs import JobQueue, QueueFullError, PENDING, RUNNING, DONE, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BATCH
+from speculation import Speculator, SPECULATION_ENABLED
+
+# Gemini multi-view generation is optional (it needs google-genai and Pillow);
+# without it generate_object_views answers 503
+try:
+    from gemini import multi_view
+except ImportError:
+    multi_view = None
+
+logger = logging.getLogger("server")
+
+# Shared async Venice client (one keep-alive connection pool for all tool calls)
+venice_client = VeniceClient()
+
+# Cached model catalog used for listing and validating models
+model_catalog = ModelCatalog(venice_client)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Structured logs go through a queue to a writer thread on stderr (LOG_LEVEL, LOG_FORMAT);
+    # the launcher sets this up already, but workers it spawns and `uvicorn server:app` need it here
+    if not logging_configured():
+        setup_logging()
+    # Warm the model catalog in the background so the first call doesn't wait
+    model_catalog.refresh()
+    await job_queue.start()
+    if METRICS_ENABLED:
+        lag_monitor.start()
+    yield
+    await lag_monitor.stop()
+    await speculator.stop()
+    await job_queue.stop()
+    # Release pooled upstream connections and flush persisted records on shutdown
+    await venice_client.aclose()
+    image_cache.close()
 
 # Create the FastAPI app
-app = FastAPI(title="Venice AI Image Generator MCP Server")
+app = FastAPI(title="Venice AI Image Generator MCP Server", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+add_compression(app)
+app.add_middleware(CorrelationMiddleware)
+
+# State shared by every worker and host (SHARED_STATE_URL=redis://... or sqlite:///...);
+# None keeps image records and job status in this process
+state_backend = shared_state.connect()
+
+# Bounded cache for tracking generated images and their approval status
+# (set IMAGE_CACHE_BACKEND=sqlite to persist records across restarts)
+image_cache = create_image_cache("shared", state=state_backend) if state_backend else create_image_cache()
+
+# Upstream results keyed on the generation parameters (dedupes retries and double-clicks)
+result_cache = ResultCache()
+
+# Where generated images are served from: "remote" passes through the Venice URL,
+# "local" keeps the bytes in a content-addressed blob store served by /images
+IMAGE_STORAGE = os.environ.get("IMAGE_STORAGE", "remote")
+PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "").rstrip("/")
+blob_store = BlobStore()
+
+# Precompiled hover widget; INCLUDE_HTML=false omits the html field by default
+image_widget = ImageWidget(PUBLIC_BASE_URL)
+INCLUDE_HTML = os.environ.get("INCLUDE_HTML", "true").lower() != "false"
+
+# Queue of pending generations, drained by a pool of workers (JOB_WORKERS, JOB_QUEUE_MAX).
+# The pool defaults to the Venice concurrency ceiling, so the adaptive limiter rather than
+# the pool decides how many generations are in flight
+# (the lambda defers the lookup of _run_generation, which is defined further down)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", str(venice_client.concurrency.max_limit)))
+job_queue = JobQueue(lambda job_payload: _run_generation(job_payload), workers=JOB_WORKERS, state=state_backend)
 
-# In-memory cache for tracking generated images and their approval status
-image_cache = {}
+# Next-candidate pre-generation for instant regenerates (SPECULATIVE_REGENERATE, SPECULATION_RATE);
+# it holds back whenever real generations are waiting in the queue
+speculator = Speculator(lambda generation_params: _fetch_image(generation_params),
+                        busy=lambda: job_queue.depth > 0)
+
+# Batch generation limits
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "50"))
+BATCH_DEFAULT_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "16"))
+
+# Seconds between progress events on streamed tool calls
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get("SSE_HEARTBEAT_INTERVAL", "2"))
+
+# Object views rendered by Gemini, cached per source image and angle; the
+# views themselves are stored in the blob store and served by /images
+VIEW_ANGLES = (0, 90, 180, 270)
+VIEWS_MAX_ANGLES = int(os.environ.get("VIEWS_MAX_ANGLES", "8"))
+object_view_cache = ResultCache(ttl=float(os.environ.get("VIEW_CACHE_TTL", str(7 * 24 * 60 * 60))),
+                         max_entries=int(os.environ.get("VIEW_CACHE_MAX_ENTRIES", "10000")))
+# Gemini requests in flight across all calls
+gemini_semaphore = asyncio.Semaphore(int(os.environ.get("GEMINI_CONCURRENCY", "4")))
+
+# Progressive mode (PROGRESSIVE_GENERATION=true, or progressive per call) first returns a draft
+# rendered with at most DRAFT_STEPS steps at DRAFT_SCALE of the requested size; approving the
+# draft renders the full image, which replaces the draft's image_url
+PROGRESSIVE_GENERATION = os.environ.get("PROGRESSIVE_GENERATION", "false").lower() == "true"
+DRAFT_STEPS = int(os.environ.get("DRAFT_STEPS", "8"))
+DRAFT_SCALE = float(os.environ.get("DRAFT_SCALE", "0.5"))
+DRAFT_MIN_SIZE = 256
+
+# Tools whose result is a newly generated image
+IMAGE_PRODUCING_TOOLS = ("generate_venice_image", "regenerate_image")
+
+# Registered MCP tools; each tool's schema is generated from its parameter model
+tools = ToolRegistry()
+
+# Prometheus metrics served at /metrics
+metrics = MetricsRegistry()
+tool_calls = metrics.counter("mcp_tool_calls_total", "Tool calls", ["tool"])
+tool_errors = metrics.counter("mcp_tool_errors_total", "Tool calls that raised or returned an error response", ["tool"])
+tool_latency = metrics.histogram("mcp_tool_duration_seconds", "Tool call latency", ["tool"])
+venice_latency = metrics.histogram("venice_generate_duration_seconds",
+                                   "Upstream Venice generation latency, including retries", ["model", "size"])
+venice_errors = metrics.counter("venice_generate_errors_total", "Failed upstream Venice generations", ["model", "size"])
+gemini_latency = metrics.histogram("gemini_view_duration_seconds", "Gemini object view generation latency")
+gemini_errors = metrics.counter("gemini_view_errors_total", "Failed Gemini object view generations")
+lag_monitor = EventLoopLagMonitor(metrics.histogram("event_loop_lag_seconds", "Event loop lag", buckets=LAG_BUCKETS))
+request_tracker = RequestTracker()
+
+# Counters that components already keep are read at scrape time
+metrics.stats("http", request_tracker.stats, counters=("requests",), gauges=("in_flight",),
+              documentation="HTTP requests")
+metrics.stats("image_cache", image_cache.stats, counters=("hits", "misses", "evictions", "expirations"),
+              gauges=("size", "hit_ratio"), documentation="Image record cache")
+metrics.stats("result_cache", result_cache.stats, counters=("hits", "misses", "coalesced"),
+              gauges=("size", "in_flight", "hit_ratio"), documentation="Upstream result cache")
+metrics.stats("view_cache", object_view_cache.stats, counters=("hits", "misses", "coalesced"),
+              gauges=("size", "in_flight", "hit_ratio"), documentation="Object view cache")
+metrics.stats("job_queue", job_queue.stats, counters=("completed", "failed", "rejected"),
+              gauges=("queued", "running", "workers"), documentation="Generation job queue")
+metrics.stats("speculation", speculator.stats,
+              counters=("started", "hits", "misses", "wasted", "cancelled", "failed", "rate_limited", "skipped"),
+              gauges=("pending", "in_flight", "hit_ratio", "waste_ratio"),
+              documentation="Speculative regenerate candidates")
+metrics.stats("venice", lambda: {**venice_client.concurrency.stats(), "retries": venice_client.retries},
+              counters=("retries",), gauges=("in_flight", "limit", "waiting"), documentation="Venice API client")
+if venice_client.hedging is not None:
+    metrics.stats("venice_hedging", venice_client.hedging.stats,
+                  counters=("requests", "hedged", "hedge_wins", "primary_wins", "budget_exhausted"),
+                  gauges=("hedge_fraction", "hedge_win_ratio"), documentation="Hedged Venice generations")
+metrics.stats("event_loop", lag_monitor.stats, gauges=("current_lag_seconds", "max_lag_seconds"), documentation="Event loop")
+
+@tools.use
+async def correlate_tool(spec, params, call_next):
+    """Give tool calls that didn't arrive over HTTP (e.g. over stdio) a request ID."""
+    if request_id_var.get() is not None:
+        return await call_next(spec, params)
+    with correlation(request_id=new_request_id()):
+        return await call_next(spec, params)
+
+if METRICS_ENABLED:
+    app.add_middleware(InFlightMiddleware, tracker=request_tracker)
+
+    @tools.use
+    async def measure_tool(spec, params, call_next):
+        """Record the call count, latency and errors of every tool call."""
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await call_next(spec, params)
+            # Tools report some failures as an error response rather than raising
+            failed = isinstance(result, Response) and result.status_code >= 400
+            return result
+        finally:
+            tool_calls.inc(spec.name)
+            tool_latency.observe(time.perf_counter() - started, spec.name)
+            if failed:
+                tool_errors.inc(spec.name)
 
 class ImageGenerationParams(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     prompt: str = Field(..., description="The prompt describing the image to generate")
     height: int = Field(1024, description="Image height in pixels")
     width: int = Field(1024, description="Image width in pixels")
     steps: int = Field(20, description="Number of diffusion steps")
-    model: str = Field("fluently-xl", description="Model to use for generation")
+    model: str = Field("fluently-xl", description="Model ID to use for generation (optional). If not specified, the default model will be used. Call list_available_models to see all options.")
+    run_async: bool = Field(False, alias="async", description="Return the image_id immediately and poll get_image_status for the result")
+    include_html: bool = Field(INCLUDE_HTML, description="Include the html field with the hover thumbs up/down widget")
+    speculate: bool = Field(SPECULATION_ENABLED, description="Generate a second candidate in the background so a thumbs down (regenerate_image) returns instantly")
+    progressive: bool = Field(PROGRESSIVE_GENERATION, description="Return a fast low-step, low-resolution draft first; approve_image then renders the full-quality image")
+
+    def generation_params(self):
+        """Return the parameters sent to Venice."""
+        return self.model_dump(include={"prompt", "height", "width", "steps", "model"})
 
 class ImageResponse(BaseModel):
     image_id: str = Field(..., description="Unique identifier for the generated image")
     image_url: str = Field(..., description="URL of the generated image")
     thumbs_up_url: str = Field(..., description="URL to approve the image")
     thumbs_down_url: str = Field(..., description="URL to regenerate the image")
+    html: Optional[str] = Field(None, description="HTML with hover-based thumbs up/down UI for the image (omitted when include_html is false)")
+    draft: Optional[bool] = Field(None, description="True when image_url is a progressive-mode draft; approving it renders the full-quality image")
 
 class ImageApprovalParams(BaseModel):
     image_id: str = Field(..., description="ID of the image to approve")
+    include_html: bool = Field(INCLUDE_HTML, description="Include the html field in the full-quality result of an approved draft (reported by get_image_status)")
+
+class ApprovalResponse(BaseModel):
+    message: str = Field(..., description="Confirmation message")
+    success: bool = Field(..., description="Whether the image was approved")
+    refining: bool = Field(False, description="Whether the full-quality render of an approved draft was started; get_image_status reports the final image_url")
+
+class RegenerateParams(BaseModel):
+    image_id: str = Field(..., description="ID of the image to regenerate")
+    include_html: bool = Field(INCLUDE_HTML, description="Include the html field with the hover thumbs up/down widget")
+    speculate: bool = Field(SPECULATION_ENABLED, description="Generate the next candidate in the background so another thumbs down returns instantly")
+
+class BatchGenerationParams(BaseModel):
+    items: Optional[List[Dict[str, Any]]] = Field(None, min_length=1, max_length=BATCH_MAX_ITEMS, description="Parameter sets, each accepting the same fields as generate_venice_image")
+    prompt: Optional[str] = Field(None, description="Prompt to generate count variations of (used when items is omitted)")
+    count: int = Field(1, ge=1, le=BATCH_MAX_ITEMS, description="Number of variations of prompt to generate")
+    height: int = Field(1024, description="Image height in pixels (with prompt/count)")
+    width: int = Field(1024, description="Image width in pixels (with prompt/count)")
+    steps: int = Field(20, description="Number of diffusion steps (with prompt/count)")
+    model: str = Field("fluently-xl", description="Model ID to use for generation (with prompt/count)")
+    concurrency: int = Field(BATCH_DEFAULT_CONCURRENCY, description="Maximum number of images generated at the same time")
+    stream: bool = Field(False, description="Stream each result as newline-delimited JSON as soon as it finishes")
+    include_html: bool = Field(INCLUDE_HTML, description="Include the html field in each result with the hover thumbs up/down widget")
+
+class BatchResponse(BaseModel):
+    results: List[Dict[str, Any]] = Field(..., description="One entry per requested image, in request order: the generate_venice_image result, or an object with an error message")
+
+class ImageStatusParams(BaseModel):
+    image_id: str = Field(..., description="ID of the image to check")
+
+class ImageStatusResponse(BaseModel):
+    image_id: str = Field(..., description="ID of the image")
+    status: str = Field(..., description="One of pending, running, done or failed")
+    result: Optional[Dict[str, Any]] = Field(None, description="The generate_venice_image result once the status is done")
+    error: Optional[str] = Field(None, description="Error message if the status is failed")
 
 class ModelInfo(BaseModel):
     id: str = Field(..., description="Model identifier")
@@ -37,391 +268,616 @@ class ModelInfo(BaseModel):
 
 class ModelsResponse(BaseModel):
     models: List[ModelInfo] = Field(..., description="List of available models")
+    usage_hint: str = Field(..., description="How to use a model from the list")
 
-# MCP Tool definitions
-MCP_TOOLS = [
-    {
-        "name": "generate_venice_image",
-        "description": "Generate an image using Venice AI based on a text prompt",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The prompt describing the image to generate"
-                },
-                "height": {
-                    "type": "integer",
-                    "description": "Image height in pixels",
-                    "default": 1024
-                },
-                "width": {
-                    "type": "integer",
-                    "description": "Image width in pixels",
-                    "default": 1024
-                },
-                "steps": {
-                    "type": "integer",
-                    "description": "Number of diffusion steps",
-                    "default": 20
-                },
-                "model": {
-                    "type": "string",
-                    "description": "Model ID to use for generation (optional). If not specified, the default model will be used. Call list_available_models to see all options.",
-                    "default": "fluently-xl"
-                }
-            },
-            "required": ["prompt"]
-        },
-        "returns": {
-            "type": "object",
-            "properties": {
-                "image_id": {
-                    "type": "string",
-                    "description": "Unique identifier for the generated image"
-                },
-                "image_url": {
-                    "type": "string",
-                    "description": "URL of the generated image"
-                },
-                "thumbs_up_url": {
-                    "type": "string",
-                    "description": "URL to approve the image"
-                },
-                "thumbs_down_url": {
-                    "type": "string",
-                    "description": "URL to regenerate the image"
-                },
-                "html": {
-                    "type": "string",
-                    "description": "HTML with hover-based thumbs up/down UI for the image"
-                }
-            }
-        }
-    },
-    {
-        "name": "approve_image",
-        "description": "Mark an image as approved when the user gives a thumbs up",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "image_id": {
-                    "type": "string",
-                    "description": "ID of the image to approve"
-                }
-            },
-            "required": ["image_id"]
-        },
-        "returns": {
-            "type": "object",
-            "properties": {
-                "message": {
-                    "type": "string",
-                    "description": "Confirmation message"
-                }
-            }
-        }
-    },
-    {
-        "name": "regenerate_image",
-        "description": "Create a new image with the same parameters when the user gives a thumbs down",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "image_id": {
-                    "type": "string",
-                    "description": "ID of the image to regenerate"
-                }
-            },
-            "required": ["image_id"]
-        },
-        "returns": {
-            "type": "object",
-            "properties": {
-                "image_id": {
-                    "type": "string",
-                    "description": "Unique identifier for the generated image"
-                },
-                "image_url": {
-                    "type": "string",
-                    "description": "URL of the generated image"
-                },
-                "thumbs_up_url": {
-                    "type": "string",
-                    "description": "URL to approve the image"
-                },
-                "thumbs_down_url": {
-                    "type": "string",
-                    "description": "URL to regenerate the image"
-                },
-                "html": {
-                    "type": "string",
-                    "description": "HTML with hover-based thumbs up/down UI for the image"
-                }
-            }
-        }
-    },
-    {
-        "name": "list_available_models",
-        "description": "Provide information about available Venice AI models",
-        "parameters": {
-            "type": "object",
-            "properties": {}
-        },
-        "returns": {
-            "type": "object",
-            "properties": {
-                "models": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "id": {
-                                "type": "string",
-                                "description": "Model identifier"
-                            },
-                            "name": {
-                                "type": "string",
-                                "description": "Human-readable model name"
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "Description of the model's capabilities"
-                            }
-                        }
-                    }
-                }
-            }
-        }
-    }
-]
+class ObjectViewsParams(BaseModel):
+    image_id: Optional[str] = Field(None, description="ID of a generated image to render views of")
+    image_data: Optional[str] = Field(None, description="Base64-encoded source image, used instead of image_id")
+    angles: List[float] = Field(default_factory=lambda: list(VIEW_ANGLES), min_length=1, max_length=VIEWS_MAX_ANGLES,
+                                description="Rotations in degrees: 0 front, 90 right, 180 back, 270 left")
 
-# MCP endpoints
-@app.get("/mcp/tools/list")
-async def list_tools():
-    """List all available MCP tools."""
-    return {"tools": MCP_TOOLS}
+class ObjectView(BaseModel):
+    angle: float = Field(..., description="Rotation in degrees")
+    name: str = Field(..., description="Name of the view, e.g. front or 45deg")
+    image_url: Optional[str] = Field(None, description="URL of the view image")
+    error: Optional[str] = Field(None, description="Error message if this view could not be generated")
 
-@app.post("/mcp/tools/call")
-async def call_tool(request: Request):
-    """Call an MCP tool with the provided parameters."""
-    try:
-        data = await request.json()
-        tool_name = data.get("tool_name")
-        parameters = data.get("parameters", {})
-        
-        if not tool_name:
-            return JSONResponse(status_code=400, content={"error": "Missing tool_name"})
-        
-        # Call the appropriate tool function
-        if tool_name == "generate_venice_image":
-            return await generate_venice_image(parameters)
-        elif tool_name == "approve_image":
-            return await approve_image(parameters)
-        elif tool_name == "regenerate_image":
-            return await regenerate_image(parameters)
-        elif tool_name == "list_available_models":
-            return await list_available_models()
-        else:
-            return JSONResponse(status_code=404, content={"error": f"Tool {tool_name} not found"})
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+class ObjectViewsResponse(BaseModel):
+    image_id: Optional[str] = Field(None, description="ID of the source image, if one was given")
+    source_digest: str = Field(..., description="SHA-256 of the source image")
+    views: List[ObjectView] = Field(..., description="Generated views in request order")
 
 # Tool implementations
-async def generate_venice_image(params):
+@tools.tool("generate_venice_image", "Generate an image using Venice AI based on a text prompt",
+            params=ImageGenerationParams, returns=ImageResponse)
+async def generate_venice_image(params, bypass_cache=False, new_image_id=None, priority=PRIORITY_NORMAL):
     """Generate an image using Venice AI based on a text prompt."""
-    # Generate a unique ID for this image
-    image_id = str(uuid.uuid4())
-    
-    # Get the model from parameters
-    model = params.get("model", "fluently-xl")
+    # Generate a unique ID for this image (unless the caller pre-assigned one)
+    image_id = new_image_id or str(uuid.uuid4())
     
     # Validate model exists if a specific model was requested
-    if "model" in params:
-        try:
-            # Try to fetch available models
-            models_response = await list_available_models()
-            available_models = [m["id"] for m in models_response.get("models", [])]
-            
-            if model not in available_models:
-                # If model doesn't exist, return helpful error and suggest using default
-                return JSONResponse(
-                    status_code=400, 
-                    content={
-                        "error": f"Model '{model}' not found. Use list_available_models to see available options or omit the model parameter to use the default model."
-                    }
-                )
-        except Exception as e:
-            # If we can't validate, log but continue with requested model
-            print(f"Warning: Could not validate model '{model}': {str(e)}")
+    # (an O(1) lookup against the cached catalog; never waits on the API)
+    if "model" in params.model_fields_set and not await model_catalog.has_model(params.model):
+        # If model doesn't exist, return helpful error and suggest using default
+        return FastJSONResponse(
+            status_code=400, 
+            content={
+                "error": f"Model '{params.model}' not found. Use list_available_models to see available options or omit the model parameter to use the default model."
+            }
+        )
     
-    # Call Venice AI API to generate the image
-    response = generate_image(
-        prompt=params.get("prompt"),
-        height=params.get("height", 1024),
-        width=params.get("width", 1024),
-        steps=params.get("steps", 20),
-        model=model
+    # Queue the generation; the worker pool calls Venice
+    try:
+        job = job_queue.submit(image_id, {
+            "image_id": image_id,
+            "generation_params": params.generation_params(),
+            "include_html": params.include_html,
+            "bypass_cache": bypass_cache,
+            "draft": params.progressive,
+            # Batch work isn't reviewed one image at a time, so it isn't speculated on
+            "speculate": params.speculate and priority != PRIORITY_BATCH,
+            "request_id": request_id_var.get()
+        }, priority)
+    except QueueFullError as e:
+        return FastJSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
+    
+    # Asynchronous callers get the image ID right away and poll get_image_status
+    if params.run_async:
+        return {"image_id": image_id, "status": job.status}
+    
+    return await job_queue.wait(job)
+
+async def _fetch_image(generation_params):
+    """Generate an image upstream, storing it locally when IMAGE_STORAGE is "local"."""
+    # Upstream latency is recorded by model and image size
+    labels = (generation_params["model"], f"{generation_params['width']}x{generation_params['height']}")
+    started = time.perf_counter()
+    try:
+        if IMAGE_STORAGE != "local":
+            response = await venice_client.generate_image(**generation_params)
+        else:
+            image_bytes = await venice_client.generate_image_bytes(**generation_params)
+    except Exception:
+        venice_errors.inc(*labels)
+        raise
+    venice_latency.observe(time.perf_counter() - started, *labels)
+    if IMAGE_STORAGE != "local":
+        return response
+    
+    digest = await blob_store.put_async(image_bytes)
+    return {"image_url": f"{PUBLIC_BASE_URL}/images/{digest}.png", "digest": digest}
+
+async def _run_generation(job_payload):
+    """Run a queued generation with the correlation IDs of the request that queued it."""
+    # Workers run outside the submitting request's context, so its ID travels in the payload
+    with correlation(request_id=job_payload.get("request_id"), image_id=job_payload["image_id"]):
+        if job_payload.get("refine"):
+            return await _refine_draft(job_payload)
+        return await _generate_and_record(job_payload)
+
+def _draft_params(generation_params):
+    """Return the parameters of a progressive-mode draft: fewer steps at a lower resolution."""
+    def scale(size):
+        # Sizes stay multiples of 64, and never exceed the requested size
+        return min(size, max(DRAFT_MIN_SIZE, int(size * DRAFT_SCALE) // 64 * 64))
+    return {
+        **generation_params,
+        "steps": min(generation_params["steps"], DRAFT_STEPS),
+        "width": scale(generation_params["width"]),
+        "height": scale(generation_params["height"])
+    }
+
+async def _fetch_cached(generation_params):
+    """Generate an image, sharing identical requests and reusing their result for the TTL."""
+    return await result_cache.get_or_create(
+        generation_key(generation_params),
+        lambda: _fetch_image(generation_params),
+        should_cache=lambda r: "image_url" in r
     )
+
+async def _generate_and_record(job_payload):
+    """Call Venice for a queued generation, record the image and build the tool response."""
+    image_id = job_payload["image_id"]
+    generation_params = job_payload["generation_params"]
+    bypass_cache = job_payload["bypass_cache"]
+    draft = job_payload.get("draft", False)
+    
+    # Drafts are rendered cheaply; the record keeps the full parameters for the final render
+    fetch_params = _draft_params(generation_params) if draft else generation_params
+    
+    # Call Venice AI API to generate the image
+    if bypass_cache:
+        response = await _fetch_image(fetch_params)
+    else:
+        response = await _fetch_cached(fetch_params)
     
+    result = await _record_image(image_id, generation_params, response, job_payload["include_html"], draft)
+    
+    # Start on the image a thumbs down would ask for while the user looks at this one
+    if job_payload.get("speculate"):
+        speculator.speculate(image_id, fetch_params)
+    
+    return result
+
+async def _refine_draft(job_payload):
+    """Render an approved draft at full quality and replace the image_url in its record."""
+    image_id = job_payload["image_id"]
+    generation_params = job_payload["generation_params"]
+    image_url = _response_image_url(await _fetch_cached(generation_params))
+    if await image_cache.update_async(image_id, image_url=image_url, draft=False) is None:
+        logger.warning("Draft record expired before its full render finished")
+    logger.info("Draft refined", extra={
+        "model": generation_params["model"],
+        "size": f"{generation_params['width']}x{generation_params['height']}"
+    })
+    return _image_response(image_id, image_url, job_payload["include_html"])
+
+def _response_image_url(response):
+    """Return the image URL from a Venice response."""
     # Extract the image URL from the response
-    print("Venice API Response:", response)  # Debug print
+    # (sampled at DEBUG; see LOG_DEBUG_SAMPLE_RATE)
+    logger.debug("Venice API response", extra={"response": response})
     
     # For testing purposes, if the API fails, use a placeholder image
     if "image_url" not in response:
         # Use a placeholder image URL for testing
+        logger.warning("Venice API response had no image_url; using a placeholder",
+                       extra={"response_keys": sorted(response)})
         image_url = "https://placehold.co/600x400?text=Venice+AI+Image"
     else:
         image_url = response["image_url"]
+    return image_url
+
+async def _record_image(image_id, generation_params, response, include_html, draft=False):
+    """Record a generated image and build the tool response."""
+    image_url = _response_image_url(response)
     
     # Store the image details in the cache
-    image_cache[image_id] = {
-        "prompt": params.get("prompt"),
-        "height": params.get("height", 1024),
-        "width": params.get("width", 1024),
-        "steps": params.get("steps", 20),
-        "model": params.get("model", "fluently-xl"),
-        "image_url": image_url,
-        "approved": False
-    }
+    await image_cache.put_async(image_id, ImageRecord(image_url=image_url, approved=False, draft=draft, **generation_params))
+    logger.info("Image generated", extra={
+        "model": generation_params["model"],
+        "size": f"{generation_params['width']}x{generation_params['height']}",
+        "draft": draft
+    })
     
+    return _image_response(image_id, image_url, include_html, draft)
+
+def _image_response(image_id, image_url, include_html, draft=False):
+    """Build the tool response for an image."""
     # Create approval URLs
     # These URLs will be used for the API calls
     thumbs_up_url = f"/mcp/tools/call?tool_name=approve_image&image_id={image_id}"
     thumbs_down_url = f"/mcp/tools/call?tool_name=regenerate_image&image_id={image_id}"
     
-    # Create HTML with thumbs up/down buttons that appear on hover
-    html_wrapper = f"""
-    <div class="venice-image-container" style="position: relative; display: inline-block;">
-        <img src="{image_url}" alt="Generated image" style="max-width: 100%; height: auto;" />
-        <div class="hover-controls" style="position: absolute; bottom: 10px; right: 10px; display: none; background-color: rgba(0,0,0,0.5); border-radius: 5px; padding: 5px;">
-            <a href="#" onclick="callApproveImage('{image_id}'); return false;" style="margin-right: 10px; font-size: 24px; text-decoration: none;">👍</a>
-            <a href="#" onclick="callRegenerateImage('{image_id}'); return false;" style="font-size: 24px; text-decoration: none;">👎</a>
-        </div>
-        <style>
-            .venice-image-container:hover .hover-controls {{
-                display: flex !important;
-            }}
-        </style>
-        <script>
-            function callApproveImage(id) {{
-                fetch('/mcp/tools/call', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        "tool_name": "approve_image",
-                        "parameters": {{"image_id": id}}
-                    }})
-                }});
-            }}
-            function callRegenerateImage(id) {{
-                fetch('/mcp/tools/call', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        "tool_name": "regenerate_image",
-                        "parameters": {{"image_id": id}}
-                    }})
-                }});
-            }}
-        </script>
-    </div>
-    """
-    
-    return {
+    response = {
         "image_id": image_id,
         "image_url": image_url,
         "thumbs_up_url": thumbs_up_url,
-        "thumbs_down_url": thumbs_down_url,
-        "html": html_wrapper
+        "thumbs_down_url": thumbs_down_url
     }
+    
+    # Add the hover thumbs up/down widget unless the client doesn't render HTML
+    if include_html:
+        response["html"] = image_widget.render(image_id, image_url)
+    if draft:
+        response["draft"] = True
+    
+    return response
 
+@tools.tool("approve_image", "Mark an image as approved when the user gives a thumbs up",
+            params=ImageApprovalParams, returns=ApprovalResponse)
 async def approve_image(params):
     """Mark an image as approved when the user gives a thumbs up."""
-    image_id = params.get("image_id")
-    
-    # Check if the image exists in the cache
-    if image_id not in image_cache:
+    # Mark the image as approved (None means it isn't in the cache)
+    record = await image_cache.update_async(params.image_id, approved=True)
+    if record is None:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Mark the image as approved
-    image_cache[image_id]["approved"] = True
+    # The user is done with this prompt, so a pre-generated candidate is no longer needed
+    speculator.discard(params.image_id)
+    
+    if not record.draft:
+        return {"message": f"Image {params.image_id} has been approved", "success": True}
     
-    return {"message": f"Image {image_id} has been approved", "success": True}
+    # Render the approved draft at full quality under the same image ID, so get_image_status
+    # reports the final image (unless a render is already queued or running on any worker)
+    status = await job_queue.status(params.image_id)
+    if status is None or status["status"] not in (PENDING, RUNNING):
+        try:
+            job_queue.submit(params.image_id, {
+                "image_id": params.image_id,
+                "generation_params": record.generation_params(),
+                "include_html": params.include_html,
+                "refine": True,
+                "request_id": request_id_var.get()
+            }, PRIORITY_INTERACTIVE)
+        except QueueFullError as e:
+            return FastJSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
+    return {"message": f"Image {params.image_id} has been approved; rendering it at full quality",
+            "success": True, "refining": True}
 
-async def regenerate_image(params):
+@tools.tool("regenerate_image", "Create a new image with the same parameters when the user gives a thumbs down",
+            params=RegenerateParams, returns=ImageResponse)
+async def regenerate_image(params, new_image_id=None):
     """Create a new image with the same parameters when the user gives a thumbs down."""
-    image_id = params.get("image_id")
-    
     # Check if the image exists in the cache
-    if image_id not in image_cache:
+    original = await image_cache.get_async(params.image_id)
+    if original is None:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Get the original parameters
-    original_params = image_cache[image_id]
+    # A candidate pre-generated when the original was returned makes this instant
+    # (if it is still being generated, waiting for it beats starting over)
+    # (a draft is replaced by another draft)
+    generation_params = original.generation_params()
+    response = await speculator.claim(params.image_id)
+    if response is not None:
+        image_id = new_image_id or str(uuid.uuid4())
+        with correlation(image_id=image_id):
+            result = await _record_image(image_id, generation_params, response, params.include_html, original.draft)
+        if params.speculate:
+            speculator.speculate(image_id, _draft_params(generation_params) if original.draft else generation_params)
+        return result
     
     # Generate a new image with the same parameters
-    return await generate_venice_image({
-        "prompt": original_params["prompt"],
-        "height": original_params["height"],
-        "width": original_params["width"],
-        "steps": original_params["steps"],
-        "model": original_params["model"]
-    })
+    # (bypassing the result cache, since the point is to get a different image)
+    # Interactive regenerations jump ahead of batch work in the job queue
+    new_params = ImageGenerationParams(**generation_params, include_html=params.include_html,
+                                       speculate=params.speculate, progressive=original.draft)
+    return await generate_venice_image(new_params, bypass_cache=True,
+                                       new_image_id=new_image_id, priority=PRIORITY_INTERACTIVE)
+
+def _batch_items(params):
+    """Expand batch tool parameters into a list of (parameters, bypass_cache) pairs."""
+    if params.items is not None:
+        return [(item, False) for item in params.items]
+    if not params.prompt:
+        raise ValueError("Provide either items or prompt")
+    # Only forward what the caller set, so an explicit model is still checked against the catalog
+    single = params.model_dump(include={"prompt", "height", "width", "steps", "model", "include_html"},
+                               exclude_unset=True)
+    # Variations of one prompt must not be deduplicated into a single image
+    return [(single, True) for _ in range(params.count)]
+
+async def _generate_batch_item(index, item, bypass_cache, semaphore):
+    """Generate one batch item, turning failures into a per-item error."""
+    try:
+        params = ImageGenerationParams.model_validate(item)
+    except ValidationError as e:
+        return index, {"error": "Invalid parameters", "details": e.errors(include_url=False, include_context=False)}
+    async with semaphore:
+        try:
+            result = await generate_venice_image(params, bypass_cache=bypass_cache, priority=PRIORITY_BATCH)
+        except Exception as e:
+            return index, {"error": str(e)}
+    # generate_venice_image reports model errors as a JSONResponse
+    if isinstance(result, JSONResponse):
+        return index, json.loads(result.body)
+    return index, result
 
-async def list_available_models():
+@tools.tool("generate_venice_images", "Generate several images in one call, either from a list of parameter sets or as count variations of a single prompt",
+            params=BatchGenerationParams, returns=BatchResponse)
+async def generate_venice_images(params):
+    """Generate several images concurrently and return the results in request order."""
+    try:
+        items = _batch_items(params)
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"error": str(e)})
+    
+    # Bound how many upstream generations this batch runs at once (more than the worker pool would only queue)
+    concurrency = max(1, min(params.concurrency, BATCH_MAX_CONCURRENCY, job_queue.workers))
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.ensure_future(_generate_batch_item(index, item, bypass_cache, semaphore))
+        for index, (item, bypass_cache) in enumerate(items)
+    ]
+    
+    if params.stream:
+        async def stream_results():
+            # Emit each result as it finishes, tagged with its position in the request
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    index, result = await next_done
+                    yield dumps({"index": index, "result": result}) + b"\n"
+                yield dumps({"done": True, "count": len(tasks)}) + b"\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    results = [result for _, result in await asyncio.gather(*tasks)]
+    return {"results": results}
+
+@tools.tool("get_image_status", "Check the status of an image generation started with async set to true",
+            params=ImageStatusParams, returns=ImageStatusResponse)
+async def get_image_status(params):
+    """Report the status of a queued or finished image generation."""
+    image_id = params.image_id
+    
+    # With shared state, jobs queued on other workers are found too
+    status = await job_queue.status(image_id)
+    if status is None:
+        # Finished jobs are forgotten after a while; the image record outlives them
+        record = await image_cache.get_async(image_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        return {"image_id": image_id, "status": DONE, "result": {"image_id": image_id, "image_url": record.image_url}}
+    
+    return {"image_id": image_id, **status}
+
+@tools.tool("list_available_models", "Provide information about available Venice AI models",
+            returns=ModelsResponse)
+async def list_available_models(params):
     """Provide information about available Venice AI models."""
+    # Served from the catalog cache; falls back to a static list if the API was never reachable
+    models = await model_catalog.get_models()
+    
+    return {
+        "models": models,
+        "usage_hint": "To use a model, call generate_venice_image with the model ID in the model parameter."
+    }
+
+def _gemini_client():
+    """Return the shared Gemini client, or raise a 503 if Gemini isn't available."""
+    if multi_view is None:
+        raise HTTPException(status_code=503, detail="Object views need the optional google-genai and Pillow packages")
+    try:
+        return multi_view.get_client()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+_LOCAL_IMAGE_URL = re.compile(r"/images/([0-9a-f]{64})\.png$")
+
+async def _image_bytes(image_url):
+    """Return the bytes of a generated image, reading locally stored images from the blob store."""
+    match = _LOCAL_IMAGE_URL.search(image_url)
+    if match and blob_store.exists(match.group(1)):
+        return await blob_store.read_async(match.group(1))
+    return await venice_client.download(image_url)
+
+def _decode_source(data):
+    """Decode a source image, reporting unreadable data as a ValueError."""
     try:
-        # Attempt to fetch models from the Venice AI API
-        api_key = os.environ.get("VENICE_API_KEY")
-        if not api_key:
-            raise ValueError("VENICE_API_KEY environment variable is not set")
-            
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        return multi_view.load_image(io.BytesIO(data))
+    except OSError:
+        raise ValueError("The source image could not be decoded")
+
+async def _render_view(client, source_image, angle):
+    """Render one view with Gemini, store it in the blob store and return its digest."""
+    started = time.perf_counter()
+    try:
+        view = await multi_view.generate_view(client, await source_image(), angle, gemini_semaphore)
+    except Exception:
+        gemini_errors.inc()
+        raise
+    gemini_latency.observe(time.perf_counter() - started)
+    if view is None:
+        raise ValueError(f"Gemini returned no image for the {multi_view.view_name(angle)} view")
+    return await blob_store.put_async(await asyncio.to_thread(multi_view.encode_png, view))
+
+@tools.tool("generate_object_views", "Generate front, right, back and left views (or any other angles) of the object in a generated or uploaded image",
+            params=ObjectViewsParams, returns=ObjectViewsResponse)
+async def generate_object_views(params):
+    """Render several views of an object concurrently, caching each view per source image and angle."""
+    if (params.image_id is None) == (params.image_data is None):
+        return FastJSONResponse(status_code=400, content={"error": "Provide either image_id or image_data"})
+    
+    # Look the source up before anything is fetched or decoded
+    record = None
+    if params.image_id is not None:
+        record = await image_cache.get_async(params.image_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+    client = _gemini_client()
+    
+    if record is not None:
+        data = await _image_bytes(record.image_url)
+    else:
+        try:
+            data = base64.b64decode(params.image_data, validate=True)
+        except (binascii.Error, ValueError):
+            return FastJSONResponse(status_code=400, content={"error": "image_data is not valid base64"})
+    source_digest = hashlib.sha256(data).hexdigest()
+    
+    # The source is decoded once, and only if some view isn't cached yet
+    decoded = None
+    def source_image():
+        nonlocal decoded
+        if decoded is None:
+            decoded = asyncio.ensure_future(asyncio.to_thread(_decode_source, data))
+        return decoded
+    
+    # All views are requested at once; concurrent calls for the same view share one render
+    angles = list(dict.fromkeys(multi_view.normalize_angle(angle) for angle in params.angles))
+    results = await asyncio.gather(*[
+        object_view_cache.get_or_create(f"{source_digest}:{angle}",
+                                 lambda angle=angle: _render_view(client, source_image, angle))
+        for angle in angles
+    ], return_exceptions=True)
+    
+    views = []
+    for angle, result in zip(angles, results):
+        view = {"angle": angle, "name": multi_view.view_name(angle)}
+        if isinstance(result, Exception):
+            logger.warning("Object view failed", extra={"angle": angle, "error": str(result)})
+            view["error"] = str(result)
+        else:
+            view["image_url"] = f"{PUBLIC_BASE_URL}/images/{result}.png"
+        views.append(view)
+    return {"image_id": params.image_id, "source_digest": source_digest, "views": views}
+
+# MCP endpoints
+# Tool definitions are generated from the registered parameter models; the list
+# never changes at runtime, so it is serialized and compressed once
+MCP_TOOLS = tools.schemas()
+tools_list = PreSerializedJSON({"tools": MCP_TOOLS})
+
+@app.get("/mcp/tools/list")
+async def list_tools(request: Request):
+    """List all available MCP tools."""
+    return tools_list.response(request)
+
+async def _read_tool_call(request: Request):
+    """Parse a tool call body into (tool_name, parameters), raising a 400 if it isn't a JSON object."""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return data.get("tool_name"), data.get("parameters", {})
+
+@app.post("/mcp/tools/call")
+async def call_tool(request: Request):
+    """Call an MCP tool with the provided parameters."""
+    try:
+        tool_name, parameters = await _read_tool_call(request)
         
-        # Import requests here to avoid global import if not needed
-        import requests
+        if not tool_name:
+            return FastJSONResponse(status_code=400, content={"error": "Missing tool_name"})
         
-        # Use the correct endpoint for Venice AI image models
-        response = requests.get("https://api.venice.ai/api/v1/models?type=image", headers=headers)
-        response.raise_for_status()
+        result = await tools.call(tool_name, parameters)
+        # Serialize plain results directly, skipping FastAPI's jsonable_encoder pass
+        return result if isinstance(result, Response) else FastJSONResponse(result)
+    except Exception as e:
+        return _tool_error_response(e)
+
+def _tool_error_response(e):
+    """Map an exception raised while calling a tool to an HTTP error response."""
+    if isinstance(e, ToolNotFoundError):
+        return FastJSONResponse(status_code=404, content={"error": str(e)})
+    if isinstance(e, ToolValidationError):
+        return FastJSONResponse(status_code=400, content={"error": str(e), "details": e.errors})
+    if isinstance(e, HTTPException):
+        return FastJSONResponse(status_code=e.status_code, content={"error": e.detail})
+    if isinstance(e, VeniceRateLimitError):
+        retry_after = str(max(1, int(e.retry_after or 1)))
+        return FastJSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": retry_after})
+    if isinstance(e, VeniceError):
+        return FastJSONResponse(status_code=502, content={"error": str(e), "upstream_status": e.status_code})
+    logger.error("Tool call failed", exc_info=e)
+    return FastJSONResponse(status_code=500, content={"error": str(e)})
+
+def _sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@app.post("/mcp/tools/call/stream")
+async def call_tool_stream(request: Request):
+    """
+    Call an MCP tool and stream its progress as Server-Sent Events.
+    
+    Emits an "accepted" event right away (with the new image_id for generation
+    tools), "progress" heartbeats while the tool runs, then a "result" event
+    carrying the same payload /mcp/tools/call would return, or an "error" event.
+    """
+    try:
+        tool_name, parameters = await _read_tool_call(request)
+    except HTTPException as e:
+        return _tool_error_response(e)
+    
+    if not tool_name:
+        return FastJSONResponse(status_code=400, content={"error": "Missing tool_name"})
+    
+    # Unknown tools and invalid parameters are rejected before the stream starts
+    try:
+        spec, params = tools.validate(tool_name, parameters)
+    except Exception as e:
+        return _tool_error_response(e)
+    
+    # Assign the image ID up front so the client learns it before generation finishes
+    image_id = str(uuid.uuid4()) if tool_name in IMAGE_PRODUCING_TOOLS else None
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        yield _sse_event("accepted", {"tool_name": tool_name, "image_id": image_id})
         
-        # Parse and return models from the API response
-        models_data = response.json()
-        return {
-            "models": models_data,
-            "usage_hint": "To use a model, call generate_venice_image with the model ID in the model parameter."
-        }
+        # Let the tool finish even if the client disconnects, so its image is still recorded
+        task = asyncio.ensure_future(tools.run(spec, params, new_image_id=image_id))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=SSE_HEARTBEAT_INTERVAL)
+            if done:
+                break
+            yield _sse_event("progress", {
+                "image_id": image_id,
+                "status": "running",
+                "elapsed": round(loop.time() - started, 1)
+            })
         
-    except Exception as e:
-        # Fallback to static list if API call fails
-        print(f"Error fetching models from API: {str(e)}")
-        # Return the existing fallback models
-        models = [
-            {
-                "id": "fluently-xl",
-                "name": "Fluently XL",
-                "description": "High-quality image generation model with excellent detail and composition"
-            },
-            {
-                "id": "fluently-base",
-                "name": "Fluently Base",
-                "description": "Standard image generation model with good quality and faster generation"
-            },
-            {
-                "id": "fluently-creative",
-                "name": "Fluently Creative",
-                "description": "Model optimized for creative and artistic image generation"
-            }
-        ]
+        try:
+            result = task.result()
+        except Exception as e:
+            result = _tool_error_response(e)
         
-        return {
-            "models": models,
-            "usage_hint": "To use a model, call generate_venice_image with the model ID in the model parameter."
-        }
+        if isinstance(result, StreamingResponse):
+            # Batch streams are forwarded item by item as partial results
+            async for line in result.body_iterator:
+                item = json.loads(line)
+                yield _sse_event("result" if item.get("done") else "partial", item)
+        elif isinstance(result, JSONResponse):
+            yield _sse_event("error", {"status_code": result.status_code, **json.loads(result.body)})
+        else:
+            yield _sse_event("result", result)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+# Standard MCP (JSON-RPC 2.0) transport, served at /mcp or over stdio with --transport stdio.
+# Browser origins other than localhost and PUBLIC_BASE_URL must be listed in MCP_ALLOWED_ORIGINS
+# (comma-separated, "*" for any) to call /mcp, which keeps DNS rebinding pages out
+MCP_ALLOWED_ORIGINS = [origin.strip().rstrip("/") for origin in os.environ.get("MCP_ALLOWED_ORIGINS", "").split(",")
+                       if origin.strip()] + ([PUBLIC_BASE_URL] if PUBLIC_BASE_URL else [])
+mcp = MCPProtocol(tools, _tool_error_response, {"name": "venice-ai-images", "version": "1.0.0"},
+                  allowed_origins=MCP_ALLOWED_ORIGINS)
+
+@app.post("/mcp")
+async def mcp_endpoint(request: Request):
+    """Streamable HTTP endpoint for JSON-RPC MCP messages and batches."""
+    return await mcp.http_response(request)
+
+@app.get("/mcp")
+def mcp_stream():
+    """Server-initiated streams aren't offered; clients get responses on their POSTs."""
+    return Response(status_code=405, headers={"Allow": "POST"})
+
+async def serve_stdio():
+    """Serve MCP over stdin/stdout with the same startup and shutdown as the HTTP server."""
+    # Created first so nothing printed during startup reaches the protocol stream
+    transport = StdioTransport(mcp)
+    async with lifespan(app):
+        await transport.run()
+
+@app.get("/images/{digest}.png")
+def get_image(digest: str, request: Request):
+    """Serve a locally stored image (supports Range requests and conditional GETs)."""
+    try:
+        path = blob_store.path(digest)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    # Blobs are content-addressed, so the digest is a strong ETag and never changes
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") in (f'"{digest}"', "*"):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
+
+@app.get(WIDGET_ASSET_PATH)
+def get_widget_asset(request: Request):
+    """Serve the shared CSS/JS of the hover widget."""
+    headers = {"ETag": image_widget.asset_etag, "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("if-none-match") == image_widget.asset_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image_widget.asset, media_type="application/javascript", headers=headers)
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose metrics in the Prometheus text format."""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 # Add a simple health check endpoint
 @app.get("/health")
@@ -429,10 +885,23 @@ def health_check():
     return {"status": "healthy"}
 
 # Add an endpoint to view the image cache (for debugging)
+# (a sync route, so FastAPI runs it in a thread; shared caches return a capped snapshot)
 @app.get("/debug/cache")
 def view_cache():
-    return JSONResponse(content=image_cache)
+    return FastJSONResponse(content={
+        "stats": image_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "view_cache": object_view_cache.stats(),
+        "jobs": job_queue.stats(),
+        "speculation": speculator.stats(),
+        "venice": venice_client.stats(),
+        "tools": tools.stats(),
+        "logging": logging_stats(),
+        "images": image_cache.snapshot()
+    })
 
 if __name__ == "__main__":
-    # Run the server
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Same flags as launcher.py: transport, workers, event loop, keep-alive, backlog, SO_REUSEPORT, ...
+    import sys
+    from launcher import main
+    main(server=sys.modules[__name__])
@@ -0,0 +1,390 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import replace
+from urllib.parse import urlparse
+from image_cache import ImageCache, ImageRecord, DEFAULT_TTL
+
+# Shared state for running several workers or hosts behind a load balancer:
+# redis://host:port/db or sqlite:///path/to/state.db (unset keeps state in process)
+SHARED_STATE_URL = os.environ.get("SHARED_STATE_URL", "")
+# Prefix of every key, so several deployments can share one Redis database
+SHARED_STATE_NAMESPACE = os.environ.get("SHARED_STATE_NAMESPACE", "venice-mcp:")
+# Keys read or written per round trip by bulk operations
+BULK_CHUNK_SIZE = 500
+# Seconds the record count reported in stats is reused (counting scans every key)
+SIZE_CACHE_SECONDS = 10.0
+# Records returned by snapshot() for /debug/cache (reading them all would scan every key)
+SNAPSHOT_LIMIT = int(os.environ.get("SHARED_STATE_SNAPSHOT_LIMIT", "100"))
+
+
+class StateBackend:
+    """
+    Interface for shared key-value state.
+
+    Values are bytes. Keys given to a backend are namespaced by it, so
+    callers use short keys such as "image:<id>". Backends must be safe to
+    use from several threads. Calls block on the network or disk, so async
+    code runs them with asyncio.to_thread.
+
+    Args:
+        namespace (str): Prefix added to every key
+    """
+
+    def __init__(self, namespace=SHARED_STATE_NAMESPACE):
+        self.namespace = namespace
+
+    def get(self, key):
+        """Return the value of key, or None if it is missing or expired."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Return the values of several keys (None for missing ones) in one round trip."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Store a value, expiring after ttl seconds (None or 0 keeps it)."""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl=None):
+        """Store several values in one round trip."""
+        raise NotImplementedError
+
+    def update(self, key, update, ttl=None):
+        """
+        Replace the value of key with update(current value), atomically where the backend allows.
+
+        Args:
+            key (str): Key to update
+            update (callable): Takes the current value (None if missing) and returns
+                               the new one, or None to leave the key alone
+            ttl (float): Expiry of the new value in seconds (None or 0 keeps it)
+
+        Returns:
+            bytes: The value written, or None if update() returned None
+        """
+        # Read-then-write; backends override this with an atomic version
+        value = update(self.get(key))
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        """Remove a key; return True if it existed."""
+        raise NotImplementedError
+
+    def scan(self, prefix):
+        """Iterate over the keys starting with prefix (without the namespace)."""
+        raise NotImplementedError
+
+    def count(self, prefix):
+        return sum(1 for _ in self.scan(prefix))
+
+    def close(self):
+        """Release connections."""
+
+    def stats(self):
+        return {"backend": type(self).__name__}
+
+
+class RedisStateBackend(StateBackend):
+    """
+    State kept in Redis (or anything speaking its protocol).
+
+    Bulk reads use MGET and bulk writes are pipelined, so each costs one
+    round trip per BULK_CHUNK_SIZE keys.
+
+    Args:
+        url (str): redis://[[user]:password@]host[:port][/db]
+        namespace (str): Prefix added to every key
+        **kwargs: Connection pool options passed to RedisClient
+    """
+
+    def __init__(self, url, namespace=SHARED_STATE_NAMESPACE, **kwargs):
+        # Imported here so deployments without shared state don't load it
+        from redis_client import RedisClient
+        super().__init__(namespace)
+        self.client = RedisClient(url, **kwargs)
+
+    def get_many(self, keys):
+        values = []
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[start:start + BULK_CHUNK_SIZE]
+            values.extend(self.client.mget([self.namespace + key for key in chunk]))
+        return values
+
+    def set_many(self, items, ttl=None):
+        commands = [("SET", self.namespace + key, value, "PX", int(ttl * 1000)) if ttl else
+                    ("SET", self.namespace + key, value) for key, value in items.items()]
+        for start in range(0, len(commands), BULK_CHUNK_SIZE):
+            self.client.pipeline(commands[start:start + BULK_CHUNK_SIZE])
+
+    def update(self, key, update, ttl=None):
+        # WATCH/MULTI/EXEC: a concurrent write to the key makes this retry on the new value
+        return self.client.update(self.namespace + key, update, int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        return self.client.delete(self.namespace + key) > 0
+
+    def scan(self, prefix):
+        # Glob characters in the namespace or prefix would widen the match, so results are checked too
+        full_prefix = (self.namespace + prefix).encode("utf-8")
+        for key in self.client.scan_iter(match=f"{self.namespace}{prefix}*"):
+            if key.startswith(full_prefix):
+                yield key[len(self.namespace.encode("utf-8")):].decode("utf-8")
+
+    def close(self):
+        self.client.close()
+
+    def stats(self):
+        return {**super().stats(), **self.client.stats()}
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_state_expires_at ON state (expires_at);
+"""
+
+SQLITE_UPSERT = """
+INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+"""
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State kept in a SQLite file shared by every process on the host.
+
+    Uses WAL mode so readers never block the writer, and one connection per
+    thread. Bulk writes go in a single transaction. Expired rows are ignored
+    on read and purged every purge_interval writes.
+
+    Args:
+        path (str): Database file path
+        namespace (str): Prefix added to every key
+        busy_timeout (float): Seconds to wait for another process's write lock
+        purge_interval (int): Writes between purges of expired rows
+    """
+
+    def __init__(self, path, namespace=SHARED_STATE_NAMESPACE, busy_timeout=5.0, purge_interval=1000):
+        super().__init__(namespace)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        found = {}
+        now = time.time()
+        conn = self._connection()
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = [self.namespace + key for key in keys[start:start + BULK_CHUNK_SIZE]]
+            rows = conn.execute(
+                f"SELECT key, value FROM state WHERE key IN ({','.join('?' * len(chunk))}) "
+                f"AND (expires_at IS NULL OR expires_at > ?)", (*chunk, now)
+            ).fetchall()
+            found.update(rows)
+        return [found.get(self.namespace + key) for key in keys]
+
+    def set_many(self, items, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        rows = [(self.namespace + key, value, expires_at) for key, value in items.items()]
+        with self._connection() as conn:
+            conn.executemany(SQLITE_UPSERT, rows)
+            self._writes += len(rows)
+            if self._writes >= self.purge_interval:
+                self._writes = 0
+                conn.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+
+    def update(self, key, update, ttl=None):
+        conn = self._connection()
+        # The write lock is taken before the read, so no other process can write in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                               (self.namespace + key, time.time())).fetchone()
+            value = update(row[0] if row else None)
+            if value is not None:
+                conn.execute(SQLITE_UPSERT, (self.namespace + key, value, time.time() + ttl if ttl else None))
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return value
+
+    def delete(self, key):
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                                (self.namespace + key, time.time())).rowcount > 0
+
+    def scan(self, prefix):
+        full_prefix = self.namespace + prefix
+        rows = self._connection().execute(
+            "SELECT key FROM state WHERE substr(key, 1, ?) = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (len(full_prefix), full_prefix, time.time())
+        ).fetchall()
+        for (key,) in rows:
+            yield key[len(self.namespace):]
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self):
+        return {**super().stats(), "path": self.path, "connections": len(self._connections)}
+
+
+def connect(url=None, **kwargs):
+    """
+    Create the state backend for a URL.
+
+    Args:
+        url (str): redis://... or sqlite:///path (defaults to SHARED_STATE_URL)
+
+    Returns:
+        StateBackend: The backend, or None if no URL is configured
+    """
+    url = SHARED_STATE_URL if url is None else url
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "redis":
+        return RedisStateBackend(url, **kwargs)
+    if scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteStateBackend(url[len("sqlite:///"):], **kwargs)
+    raise ValueError(f"Unsupported shared state URL '{url}'. Use redis://... or sqlite:///...")
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class SharedImageCache(ImageCache):
+    """
+    Image records kept in a shared state backend, visible to every worker.
+
+    Every read goes to the backend (there is no local copy that could go
+    stale when another worker approves an image). Records expire ttl
+    seconds after their last write. update() is atomic, so concurrent
+    updates from several workers are never lost. The *_async methods run
+    the blocking backend calls in a thread.
+
+    Args:
+        state (StateBackend): Where records are kept (defaults to connect())
+        ttl (float): Seconds a record lives after its last write (0 disables expiry)
+    """
+
+    PREFIX = "image:"
+
+    def __init__(self, state=None, ttl=DEFAULT_TTL):
+        super().__init__()
+        self.state = state or connect()
+        if self.state is None:
+            raise ValueError("SharedImageCache needs a state backend or SHARED_STATE_URL")
+        self.ttl = ttl
+        self._size = (0, 0.0)
+
+    def get(self, image_id):
+        data = self.state.get(self.PREFIX + image_id)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ImageRecord.from_dict(json.loads(data))
+
+    def get_many(self, image_ids):
+        """Return the records of several images (None for unknown ones) in one round trip."""
+        values = self.state.get_many([self.PREFIX + image_id for image_id in image_ids])
+        return [None if data is None else ImageRecord.from_dict(json.loads(data)) for data in values]
+
+    def put(self, image_id, record):
+        self.state.set(self.PREFIX + image_id, _dumps(record.to_dict()), self.ttl)
+
+    def put_many(self, records):
+        """Store several records in one round trip."""
+        self.state.set_many({self.PREFIX + image_id: _dumps(record.to_dict())
+                               for image_id, record in records.items()}, self.ttl)
+
+    def update(self, image_id, **changes):
+        updated = []
+
+        def apply(data):
+            if data is None:
+                return None
+            updated.append(replace(ImageRecord.from_dict(json.loads(data)), **changes))
+            return _dumps(updated[-1].to_dict())
+
+        if self.state.update(self.PREFIX + image_id, apply, self.ttl) is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # apply() runs again when a concurrent write forces a retry; the last run is the one written
+        return updated[-1]
+
+    async def get_async(self, image_id):
+        return await asyncio.to_thread(self.get, image_id)
+
+    async def put_async(self, image_id, record):
+        await asyncio.to_thread(self.put, image_id, record)
+
+    async def update_async(self, image_id, **changes):
+        return await asyncio.to_thread(lambda: self.update(image_id, **changes))
+
+    def delete(self, image_id):
+        return self.state.delete(self.PREFIX + image_id)
+
+    def items(self):
+        image_ids = [key[len(self.PREFIX):] for key in self.state.scan(self.PREFIX)]
+        return [(image_id, record) for image_id, record in zip(image_ids, self.get_many(image_ids))
+                if record is not None]
+
+    def snapshot(self, limit=SNAPSHOT_LIMIT):
+        """Return up to limit records as plain dicts keyed by image ID."""
+        image_ids = [key[len(self.PREFIX):] for key in itertools.islice(self.state.scan(self.PREFIX), limit)]
+        return {image_id: record.to_dict() for image_id, record in zip(image_ids, self.get_many(image_ids))
+                if record is not None}
+
+    def __len__(self):
+        size, counted_at = self._size
+        if time.monotonic() - counted_at > SIZE_CACHE_SECONDS:
+            size = self.state.count(self.PREFIX)
+            self._size = (size, time.monotonic())
+        return size
+
+    def close(self):
+        self.state.close()
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({"ttl": self.ttl, "state": self.state.stats()})
+        return stats
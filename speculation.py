@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+from ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Speculative pre-generation is opt-in (SPECULATIVE_REGENERATE=true, or speculate per call)
+SPECULATION_ENABLED = os.environ.get("SPECULATIVE_REGENERATE", "false").lower() == "true"
+# Speculative generations per second and back to back, for each model
+DEFAULT_RATE = float(os.environ.get("SPECULATION_RATE", "0.1"))
+DEFAULT_BURST = int(os.environ.get("SPECULATION_BURST", "3"))
+# Speculative generations sent upstream at once, across all models
+DEFAULT_CONCURRENCY = int(os.environ.get("SPECULATION_CONCURRENCY", "2"))
+# Seconds an unclaimed candidate is kept, and the most candidates kept at once
+DEFAULT_TTL = float(os.environ.get("SPECULATION_TTL", "600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SPECULATION_MAX_ENTRIES", "1000"))
+
+# Per-model outcome counters:
+#   started       candidate generation sent upstream (spend)
+#   hits          candidate returned by a regenerate
+#   wasted        sent upstream but never returned (approved, expired, evicted or cancelled in flight)
+#   cancelled     dropped before it was sent (no spend)
+#   failed        upstream error
+#   rate_limited  not started because the model's speculation budget was used up
+#   skipped       not started because real work was waiting
+OUTCOMES = ("started", "hits", "wasted", "cancelled", "failed", "rate_limited", "skipped")
+
+
+@dataclass(slots=True)
+class Candidate:
+    """A speculative generation for one image."""
+    model: str
+    task: Optional[asyncio.Task] = None
+    sent: bool = False
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class Speculator:
+    """
+    Pre-generates the image a thumbs down would ask for.
+
+    When an image is returned, speculate() starts one more generation with
+    the same parameters in the background. A later regenerate claims it with
+    claim() and returns at once; an approval drops it with discard().
+
+    Speculation runs on a low-priority budget: each model has its own token
+    bucket, at most `concurrency` candidates are sent upstream at once, and
+    nothing is started while busy() reports real work waiting. Candidates
+    stay in the process that made them.
+
+    Args:
+        generate (callable): Coroutine function generating an image from generation parameters
+        rate (float): Speculative generations per second for each model (0 disables limiting)
+        burst (int): Speculative generations allowed back to back for each model
+        concurrency (int): Candidates sent upstream at once
+        ttl (float): Seconds an unclaimed candidate is kept
+        max_entries (int): Most candidates kept; the oldest are dropped first
+        busy (callable): Returns True while real work is waiting (optional)
+    """
+
+    def __init__(self, generate, rate=DEFAULT_RATE, burst=DEFAULT_BURST, concurrency=DEFAULT_CONCURRENCY,
+                 ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, busy=None):
+        self.generate = generate
+        self.rate = rate
+        self.burst = burst
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.busy = busy
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        # image_id -> Candidate, oldest first
+        self._candidates = OrderedDict()
+        self._buckets = {}
+        self.counts = {}
+        self.misses = 0
+
+    def _count(self, model, outcome):
+        counts = self.counts.get(model)
+        if counts is None:
+            counts = self.counts[model] = dict.fromkeys(OUTCOMES, 0)
+        counts[outcome] += 1
+
+    def _bucket(self, model):
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets[model] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _drop(self, candidate):
+        """Cancel a candidate that will not be claimed and count what it cost."""
+        task = candidate.task
+        if not task.done():
+            task.cancel()
+        elif task.cancelled() or task.exception() is not None:
+            # Failures were counted when they happened
+            return
+        self._count(candidate.model, "wasted" if candidate.sent else "cancelled")
+
+    def _prune(self):
+        """Drop expired candidates, then the oldest ones while at capacity."""
+        now = time.monotonic()
+        while self._candidates:
+            image_id, candidate = next(iter(self._candidates.items()))
+            if now - candidate.created_at < self.ttl and len(self._candidates) < self.max_entries:
+                break
+            del self._candidates[image_id]
+            self._drop(candidate)
+
+    def speculate(self, image_id, generation_params):
+        """
+        Start generating the next candidate for image_id in the background.
+
+        Args:
+            image_id (str): Image a regenerate would replace
+            generation_params (dict): Parameters to generate with
+
+        Returns:
+            bool: Whether a candidate was started
+        """
+        self._prune()
+        model = generation_params["model"]
+        if image_id in self._candidates:
+            return False
+        if self.busy is not None and self.busy():
+            self._count(model, "skipped")
+            return False
+        if not self._bucket(model).try_acquire():
+            self._count(model, "rate_limited")
+            return False
+        candidate = Candidate(model=model)
+        candidate.task = asyncio.ensure_future(self._run(image_id, candidate, dict(generation_params)))
+        # Unclaimed failures are already logged; mark them as seen
+        candidate.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._candidates[image_id] = candidate
+        return True
+
+    async def _run(self, image_id, candidate, generation_params):
+        async with self._semaphore:
+            candidate.sent = True
+            self._count(candidate.model, "started")
+            try:
+                return await self.generate(generation_params)
+            except Exception as e:
+                self._count(candidate.model, "failed")
+                logger.warning("Speculative generation failed: %s", e)
+                # A regenerate falls back to generating the image itself
+                if self._candidates.get(image_id) is candidate:
+                    del self._candidates[image_id]
+                raise
+
+    async def claim(self, image_id):
+        """
+        Take the candidate for image_id, waiting for it if it is still being generated.
+
+        Returns:
+            The result of generate(), or None if there is no usable candidate
+        """
+        self._prune()
+        candidate = self._candidates.pop(image_id, None)
+        if candidate is None:
+            self.misses += 1
+            return None
+        try:
+            result = await candidate.task
+        except asyncio.CancelledError:
+            # The caller went away; the candidate can't be handed to anyone else
+            self._drop(candidate)
+            raise
+        except Exception:
+            self.misses += 1
+            return None
+        self._count(candidate.model, "hits")
+        return result
+
+    def discard(self, image_id):
+        """Drop the candidate for image_id (its image was approved); return True if there was one."""
+        candidate = self._candidates.pop(image_id, None)
+        if candidate is None:
+            return False
+        self._drop(candidate)
+        return True
+
+    async def stop(self):
+        """Cancel every outstanding candidate."""
+        candidates = list(self._candidates.values())
+        self._candidates.clear()
+        for candidate in candidates:
+            self._drop(candidate)
+        await asyncio.gather(*(candidate.task for candidate in candidates), return_exceptions=True)
+
+    def stats(self):
+        """Return outcome totals, hit and waste ratios, and the per-model breakdown."""
+        totals = {outcome: sum(counts[outcome] for counts in self.counts.values()) for outcome in OUTCOMES}
+        started = totals["started"]
+        return {
+            **totals,
+            "misses": self.misses,
+            "pending": len(self._candidates),
+            "in_flight": sum(1 for candidate in self._candidates.values()
+                             if candidate.sent and not candidate.task.done()),
+            "hit_ratio": totals["hits"] / started if started else 0.0,
+            "waste_ratio": totals["wasted"] / started if started else 0.0,
+            "models": {model: dict(counts) for model, counts in self.counts.items()}
+        }
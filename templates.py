@@ -0,0 +1,86 @@
+import hashlib
+import html
+import json
+from string import Template
+
+# Path the shared widget asset is served from
+WIDGET_ASSET_PATH = "/static/venice-widget.js"
+
+# Hover style shared by every widget, injected once per page by the asset
+WIDGET_CSS = ".venice-image-container:hover .hover-controls { display: flex !important; }"
+
+# Shared behaviour of the hover widget: injects the CSS and defines the button handlers
+WIDGET_JS_TEMPLATE = Template("""(function () {
+    if (!document.getElementById("venice-widget-style")) {
+        var style = document.createElement("style");
+        style.id = "venice-widget-style";
+        style.textContent = $css;
+        document.head.appendChild(style);
+    }
+    function callTool(toolName, id) {
+        return fetch($call_url, {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({"tool_name": toolName, "parameters": {"image_id": id}})
+        });
+    }
+    window.callApproveImage = function (id) { return callTool("approve_image", id); };
+    window.callRegenerateImage = function (id) { return callTool("regenerate_image", id); };
+})();
+""")
+
+# Per-image markup; every substituted value is escaped by render()
+FRAGMENT_TEMPLATE = Template(
+    '<div class="venice-image-container" style="position: relative; display: inline-block;">'
+    '<img src="$image_url" alt="Generated image" style="max-width: 100%; height: auto;" />'
+    '<div class="hover-controls" style="position: absolute; bottom: 10px; right: 10px; display: none; '
+    'background-color: rgba(0,0,0,0.5); border-radius: 5px; padding: 5px;">'
+    '<a href="#" onclick="callApproveImage($image_id_js); return false;" '
+    'style="margin-right: 10px; font-size: 24px; text-decoration: none;">&#128077;</a>'
+    '<a href="#" onclick="callRegenerateImage($image_id_js); return false;" '
+    'style="font-size: 24px; text-decoration: none;">&#128078;</a>'
+    '</div>'
+    '<script src="$asset_url" defer></script>'
+    '</div>'
+)
+
+
+class ImageWidget:
+    """
+    Precompiled thumbs up/down hover widget.
+
+    The shared CSS and JS are rendered once into a static asset (with a
+    content hash for its ETag); each image only needs the small fragment
+    returned by render().
+
+    Args:
+        base_url (str): Public base URL of the server ("" for relative URLs)
+    """
+
+    def __init__(self, base_url=""):
+        self.base_url = base_url
+        self.asset_url = f"{base_url}{WIDGET_ASSET_PATH}"
+        self.asset = WIDGET_JS_TEMPLATE.substitute(
+            css=json.dumps(WIDGET_CSS),
+            call_url=json.dumps(f"{base_url}/mcp/tools/call")
+        ).encode("utf-8")
+        self.asset_etag = f'"{hashlib.sha256(self.asset).hexdigest()[:32]}"'
+        self._escaped_asset_url = html.escape(self.asset_url, quote=True)
+
+    def render(self, image_id, image_url):
+        """
+        Render the widget markup for one image.
+
+        Args:
+            image_id (str): ID passed to the approve/regenerate handlers
+            image_url (str): Image source URL
+
+        Returns:
+            str: HTML fragment
+        """
+        return FRAGMENT_TEMPLATE.substitute(
+            image_url=html.escape(image_url, quote=True),
+            # A JS string literal, then escaped for the surrounding HTML attribute
+            image_id_js=html.escape(json.dumps(image_id), quote=True),
+            asset_url=self._escaped_asset_url
+        )
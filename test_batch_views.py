@@ -0,0 +1,91 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+from PIL import Image
+from gemini import batch_views
+
+
+class TestBatchViews(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmpdir.name, "in")
+        self.output_dir = os.path.join(self.tmpdir.name, "out")
+        for key in ("a.png", os.path.join("sub", "b.png"), "c.png"):
+            os.makedirs(os.path.dirname(os.path.join(self.input_dir, key)), exist_ok=True)
+            Image.new("RGB", (8, 8), "blue").save(os.path.join(self.input_dir, key))
+        self.calls = []
+        # Sources whose back view comes back without an image
+        self.failing = set()
+        patch = unittest.mock.patch.object(batch_views, "generate_views", self.generate_views)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    async def generate_views(self, path, angles, client=None, semaphore=None):
+        key = os.path.relpath(path, self.input_dir)
+        self.calls.append((key, list(angles)))
+        return {angle: None if angle == 180 and key in self.failing else Image.new("RGB", (8, 8), "red")
+                for angle in angles}
+
+    async def run_batch(self, **kwargs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            counts = await batch_views.run_batch(batch_views.iter_sources(self.input_dir), self.output_dir,
+                                                 workers=2, client=object(), **kwargs)
+        return counts, output.getvalue()
+
+    def output(self, key, name):
+        return os.path.join(self.output_dir, os.path.splitext(key)[0], f"{name}_view_output.png")
+
+    async def test_resume_skips_completed_sources(self):
+        self.failing = {"c.png"}
+        counts, _ = await self.run_batch()
+        self.assertEqual((counts["done"], counts["failed"], counts["views"]), (2, 1, 11))
+
+        self.failing = set()
+        self.calls = []
+        # Resuming relies on the outputs alone, not on the progress log
+        os.remove(os.path.join(self.output_dir, "progress.jsonl"))
+        counts, _ = await self.run_batch()
+        self.assertEqual((counts["done"], counts["skipped"], counts["failed"]), (1, 2, 0))
+        # Only the missing view of the failed source is requested again
+        self.assertEqual(self.calls, [("c.png", [180])])
+
+    async def test_valid_outputs_are_not_requested_again(self):
+        os.makedirs(os.path.dirname(self.output("a.png", "front")))
+        Image.new("RGB", (8, 8)).save(self.output("a.png", "front"))
+        with open(self.output("a.png", "back"), "wb") as f:
+            f.write(b"truncated")
+        await self.run_batch()
+        # The corrupt back view is regenerated; the valid front view is kept
+        self.assertIn(("a.png", [90, 180, 270]), self.calls)
+        self.assertTrue(batch_views.is_valid_image(self.output("a.png", "back")))
+
+    async def test_done_source_with_missing_output_is_redone(self):
+        await self.run_batch()
+        os.remove(self.output(os.path.join("sub", "b.png"), "left"))
+        self.calls = []
+        counts, _ = await self.run_batch()
+        self.assertEqual((counts["done"], counts["skipped"]), (1, 2))
+        self.assertEqual(self.calls, [(os.path.join("sub", "b.png"), [270])])
+
+    async def test_progress_file_and_report(self):
+        self.failing = {"a.png"}
+        counts, report = await self.run_batch(total=3)
+        self.assertIn("3 processed (2 generated, 0 skipped, 1 failed)", report)
+        self.assertIn("0 remaining", report)
+        with open(os.path.join(self.output_dir, "progress.jsonl")) as f:
+            entries = {entry["source"]: entry for entry in map(json.loads, f)}
+        self.assertEqual(entries["a.png"]["status"], "failed")
+        self.assertIn("back", entries["a.png"]["error"])
+        self.assertEqual(entries["c.png"]["views"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
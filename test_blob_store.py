@@ -0,0 +1,44 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from blob_store import BlobStore
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_put_is_content_addressed_and_sharded(self):
+        data = b"\x89PNG test image"
+        digest = self.store.put(data)
+        self.assertEqual(digest, hashlib.sha256(data).hexdigest())
+        path = self.store.path(digest)
+        self.assertEqual(os.path.relpath(path, self.tmpdir.name),
+                         os.path.join(digest[:2], digest[2:4], digest + ".png"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_put_is_idempotent(self):
+        self.assertEqual(self.store.put(b"same"), self.store.put(b"same"))
+        files = [name for _, _, names in os.walk(self.tmpdir.name) for name in names]
+        self.assertEqual(len(files), 1)
+
+    def test_read(self):
+        digest = self.store.put(b"stored bytes")
+        self.assertEqual(self.store.read(digest), b"stored bytes")
+        with self.assertRaises(FileNotFoundError):
+            self.store.read("0" * 64)
+
+    def test_invalid_digest(self):
+        with self.assertRaises(ValueError):
+            self.store.path("../../etc/passwd")
+        self.assertFalse(self.store.exists("not-a-digest"))
+
+
+if __name__ == "__main__":
+    unittest.main()
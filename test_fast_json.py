@@ -0,0 +1,35 @@
+import gzip
+import json
+import unittest
+from starlette.requests import Request
+from fast_json import FastJSONResponse, PreSerializedJSON, dumps
+
+
+def make_request(headers):
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [
+        (k.lower().encode(), v.encode()) for k, v in headers.items()
+    ]})
+
+
+class TestFastJSON(unittest.TestCase):
+    def test_dumps_round_trips(self):
+        content = {"image_id": "abc", "html": "<div>👍</div>", "n": [1, 2.5, None]}
+        self.assertEqual(json.loads(dumps(content)), content)
+        self.assertEqual(json.loads(FastJSONResponse(content).body), content)
+
+    def test_pre_serialized_etag_and_gzip(self):
+        doc = PreSerializedJSON({"tools": [{"name": "generate_venice_image"}] * 50})
+        plain = doc.response(make_request({}))
+        self.assertEqual(plain.body, doc.body)
+        self.assertEqual(plain.headers["etag"], doc.etag)
+
+        compressed = doc.response(make_request({"Accept-Encoding": "gzip, br"}))
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.body), doc.body)
+
+        not_modified = doc.response(make_request({"If-None-Match": doc.etag}))
+        self.assertEqual(not_modified.status_code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+from hedging import HedgePolicy, LatencyTracker
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_percentile_per_key(self):
+        tracker = LatencyTracker(window=100, min_samples=10)
+        for i in range(1, 101):
+            tracker.record("a", i / 100)
+        self.assertEqual(tracker.percentile("a", 50), 0.5)
+        self.assertEqual(tracker.percentile("a", 95), 0.95)
+        # Too few samples to say
+        tracker.record("b", 1.0)
+        self.assertIsNone(tracker.percentile("b", 95))
+
+    def test_window_keeps_recent_latencies(self):
+        tracker = LatencyTracker(window=10, min_samples=1)
+        for _ in range(10):
+            tracker.record("a", 5.0)
+        for _ in range(10):
+            tracker.record("a", 0.1)
+        self.assertEqual(tracker.percentile("a", 99), 0.1)
+
+
+class TestHedgePolicy(unittest.IsolatedAsyncioTestCase):
+    def policy(self, **kwargs):
+        policy = HedgePolicy(**{"percentile": 90, "max_fraction": 1.0, "min_samples": 5, "min_delay": 0.0,
+                                "burst": 5, **kwargs})
+        for _ in range(10):
+            policy.latency.record("k", 0.02)
+        return policy
+
+    async def test_slow_request_is_hedged_and_hedge_wins(self):
+        policy = self.policy()
+        delays = [1.0, 0.01]
+        cancelled = []
+
+        async def request():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        self.assertEqual(await policy.run("k", request), 0.01)
+        await asyncio.sleep(0)
+        # The slow primary was cancelled
+        self.assertEqual(cancelled, [1.0])
+        stats = policy.stats()
+        self.assertEqual((stats["hedged"], stats["hedge_wins"], stats["primary_wins"]), (1, 1, 0))
+
+    async def test_losing_primary_is_recorded_as_censored_sample(self):
+        policy = self.policy()
+        delays = [1.0, 0.05]
+
+        async def request():
+            await asyncio.sleep(delays.pop(0))
+            return "ok"
+
+        await policy.run("k", request)
+        samples = policy.latency._samples["k"]
+        # Only the primary is measured: the cancelled copy counts for the time it ran
+        self.assertEqual(len(samples), 11)
+        self.assertGreaterEqual(samples[-1], 0.07)
+
+    async def test_hedge_skipped_when_not_allowed(self):
+        policy = self.policy()
+        calls = []
+
+        async def request():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        self.assertEqual(await policy.run("k", request, allow=lambda: False), "ok")
+        self.assertEqual(len(calls), 1)
+        stats = policy.stats()
+        self.assertEqual((stats["hedged"], stats["skipped"]), (0, 1))
+
+    async def test_fast_request_is_not_hedged(self):
+        policy = self.policy()
+        calls = []
+
+        async def request():
+            calls.append(1)
+            return "ok"
+
+        self.assertEqual(await policy.run("k", request), "ok")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(policy.stats()["hedged"], 0)
+
+    async def test_unknown_key_is_not_hedged(self):
+        policy = self.policy()
+        self.assertIsNone(policy.delay("other"))
+        self.assertEqual(await policy.run("other", lambda: asyncio.sleep(0.05, "ok")), "ok")
+        self.assertEqual(policy.stats()["hedged"], 0)
+
+    async def test_hedges_capped_by_fraction(self):
+        policy = self.policy(max_fraction=0.25, burst=1)
+        # Enough fast samples that the slow calls below don't move the percentile
+        for _ in range(100):
+            policy.latency.record("k", 0.02)
+
+        async def request():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        for _ in range(8):
+            await policy.run("k", request)
+        stats = policy.stats()
+        self.assertEqual(stats["hedged"], 2)
+        self.assertEqual(stats["budget_exhausted"], 6)
+        self.assertLessEqual(stats["hedge_fraction"], 0.25)
+
+    async def test_failed_copy_falls_back_to_the_other(self):
+        policy = self.policy()
+        outcomes = [0.05, "error"]
+
+        async def request():
+            outcome = outcomes.pop(0)
+            if outcome == "error":
+                raise RuntimeError("upstream error")
+            await asyncio.sleep(outcome)
+            return "ok"
+
+        self.assertEqual(await policy.run("k", request), "ok")
+        self.assertEqual(policy.stats()["primary_wins"], 1)
+
+        async def failing():
+            raise RuntimeError("upstream error")
+
+        with self.assertRaises(RuntimeError):
+            await policy.run("k", failing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import time
+import unittest
+from image_cache import ImageRecord, MemoryImageCache, create_image_cache
+
+
+class TestMemoryImageCache(unittest.TestCase):
+    def test_get_put_and_counters(self):
+        cache = MemoryImageCache()
+        cache.put("a", ImageRecord(prompt="test image"))
+        self.assertEqual(cache.get("a").prompt, "test image")
+        self.assertIsNone(cache.get("missing"))
+        stats = cache.stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = MemoryImageCache(max_entries=2)
+        cache.put("a", ImageRecord(prompt="a"))
+        cache.put("b", ImageRecord(prompt="b"))
+        cache.get("a")
+        cache.put("c", ImageRecord(prompt="c"))
+        # "b" was least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_budget(self):
+        cache = MemoryImageCache(max_entries=0, max_bytes=2000)
+        for i in range(50):
+            cache.put(str(i), ImageRecord(prompt="x" * 100))
+        self.assertLessEqual(cache.current_bytes, 2000)
+        self.assertGreater(cache.evictions, 0)
+
+    def test_ttl_expiry(self):
+        cache = MemoryImageCache(ttl=0.01)
+        cache.put("a", ImageRecord(prompt="a"))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_update(self):
+        cache = MemoryImageCache()
+        cache.put("a", ImageRecord(prompt="a"))
+        self.assertTrue(cache.update("a", approved=True).approved)
+        self.assertTrue(cache.get("a").approved)
+        self.assertIsNone(cache.update("missing", approved=True))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_image_cache("nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
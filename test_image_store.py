@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from image_cache import ImageRecord, create_image_cache
+from image_store import SQLiteImageStore
+
+
+class TestSQLiteImageStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "images.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_write_behind_is_visible_before_flush(self):
+        store = SQLiteImageStore(self.path, flush_interval=60)
+        store.write("a", ImageRecord(prompt="test image"))
+        self.assertEqual(store.load("a").prompt, "test image")
+        self.assertEqual(store.rows_written, 0)
+        store.close()
+
+    def test_records_survive_restart(self):
+        cache = create_image_cache("sqlite", path=self.path)
+        cache.put("a", ImageRecord(prompt="test image", model="fluently-base"))
+        cache.update("a", approved=True)
+        cache.close()
+
+        cache = create_image_cache("sqlite", path=self.path, warm_limit=0)
+        self.assertEqual(len(cache), 0)
+        record = cache.get("a")
+        self.assertTrue(record.approved)
+        self.assertEqual(record.model, "fluently-base")
+        self.assertEqual(cache.stats()["store_hits"], 1)
+        cache.close()
+
+    def test_adds_draft_column_to_older_databases(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE images (image_id TEXT PRIMARY KEY, prompt TEXT NOT NULL, prompt_hash TEXT NOT NULL, "
+                     "height INTEGER NOT NULL, width INTEGER NOT NULL, steps INTEGER NOT NULL, model TEXT NOT NULL, "
+                     "image_url TEXT NOT NULL, approved INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+                     "updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO images VALUES ('old', 'cat', '', 1024, 1024, 20, 'fluently-xl', 'u', 1, 0, 0)")
+        conn.commit()
+        conn.close()
+
+        store = SQLiteImageStore(self.path)
+        self.assertFalse(store.load("old").draft)
+        store.write("new", ImageRecord(prompt="dog", draft=True))
+        store.flush()
+        store.close()
+        store = SQLiteImageStore(self.path)
+        self.assertTrue(store.load("new").draft)
+        store.close()
+
+    def test_warm_start_loads_only_hot_records(self):
+        store = SQLiteImageStore(self.path)
+        for i in range(10):
+            store.write(str(i), ImageRecord(prompt=f"image {i}"))
+            store.flush()
+        store.close()
+
+        cache = create_image_cache("sqlite", path=self.path, warm_limit=3)
+        self.assertEqual(sorted(image_id for image_id, _ in cache.items()), ["7", "8", "9"])
+        cache.close()
+
+    def test_indexed_lookups(self):
+        store = SQLiteImageStore(self.path)
+        store.write("a", ImageRecord(prompt="cat", model="fluently-xl", approved=True))
+        store.write("b", ImageRecord(prompt="cat", model="fluently-base"))
+        store.write("c", ImageRecord(prompt="dog", model="fluently-xl"))
+        self.assertEqual({i for i, _ in store.find(prompt="cat")}, {"a", "b"})
+        self.assertEqual({i for i, _ in store.find(model="fluently-xl", approved=False)}, {"c"})
+        plan = store._query("EXPLAIN QUERY PLAN SELECT * FROM images WHERE prompt_hash = ?", ("x",))
+        self.assertIn("idx_images_prompt_hash", str(plan))
+        store.close()
+
+    def test_concurrent_flushes_keep_the_latest_write(self):
+        store = SQLiteImageStore(self.path, flush_interval=0.001)
+        written = []
+        missing = []
+        done = threading.Event()
+
+        def load_loop():
+            while not done.is_set():
+                if written and store.load(written[-1]) is None:
+                    missing.append(written[-1])
+
+        def flush_loop():
+            while not done.is_set():
+                store.flush()
+
+        # Switch threads as often as possible to open up the race windows
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=load_loop)] + [threading.Thread(target=flush_loop) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for i in range(2000):
+            store.write("a", ImageRecord(prompt=f"version {i}"))
+            store.write(str(i), ImageRecord(prompt="test image"))
+            written.append(str(i))
+        done.set()
+        for thread in threads:
+            thread.join()
+        store.close()
+
+        # No record vanished mid-flush, and no older batch overwrote a newer one
+        self.assertEqual(missing, [])
+        store = SQLiteImageStore(self.path)
+        self.assertEqual(store.load("a").prompt, "version 1999")
+        store.close()
+
+    def test_async_miss_reads_from_disk(self):
+        cache = create_image_cache("sqlite", path=self.path)
+        cache.put("a", ImageRecord(prompt="test image"))
+        cache.close()
+
+        async def run():
+            cache = create_image_cache("sqlite", path=self.path, warm_limit=0)
+            self.assertEqual((await cache.get_async("a")).prompt, "test image")
+            self.assertTrue((await cache.update_async("a", approved=True)).approved)
+            self.assertIsNone(await cache.update_async("missing", approved=True))
+            self.assertEqual(cache.stats()["store_hits"], 1)
+            cache.close()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from jobs import JobQueue, QueueFullError, DONE, FAILED, RUNNING, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from shared_state import SQLiteStateBackend
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_job_result_and_status(self):
+        async def handler(payload):
+            return payload * 2
+        queue = JobQueue(handler, workers=2)
+        job = queue.submit("a", 21)
+        self.assertEqual(await queue.wait(job), 42)
+        self.assertEqual(job.status, DONE)
+        # The result was handed over, so the queue no longer holds it
+        self.assertIsNone(queue.get("a"))
+        await queue.stop()
+
+    async def test_finished_jobs_pruned_by_age_and_count(self):
+        async def handler(payload):
+            return payload
+        queue = JobQueue(handler, workers=2, max_finished=3)
+        jobs = [queue.submit(str(i), i) for i in range(5)]
+        await asyncio.gather(*[job.future for job in jobs])
+        # Pruning happens on submit, from the oldest finished job
+        queue.submit("next", None)
+        self.assertEqual(sorted(queue._finished), ["2", "3", "4"])
+        self.assertIsNone(queue.get("0"))
+        self.assertEqual(queue.get("4").result, 4)
+
+        queue.result_ttl = 0
+        await asyncio.sleep(0.01)
+        queue.submit("last", None)
+        self.assertLessEqual(set(queue._finished), {"next"})
+        self.assertEqual(queue.stats()["retained"], len(queue._finished))
+        await queue.stop()
+
+    async def test_resubmitted_id_replaces_finished_job(self):
+        async def handler(payload):
+            return payload
+        queue = JobQueue(handler, workers=1, max_finished=1)
+        first = queue.submit("a", 1)
+        await first.future
+        second = queue.submit("a", 2)
+        self.assertNotIn("a", queue._finished)
+        # Pruning the old job never drops the new one under the same ID
+        queue._forget(first)
+        self.assertIs(queue.get("a"), second)
+        self.assertEqual(await queue.wait(second), 2)
+        await queue.stop()
+
+    async def test_failed_job(self):
+        async def handler(payload):
+            raise ValueError("upstream failed")
+        queue = JobQueue(handler, workers=1)
+        job = queue.submit("a", None)
+        with self.assertRaises(ValueError):
+            await queue.wait(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "upstream failed")
+        await queue.stop()
+
+    async def test_interactive_jobs_run_before_batch(self):
+        order = []
+        release = asyncio.Event()
+
+        async def handler(payload):
+            if payload == "blocker":
+                await release.wait()
+            order.append(payload)
+
+        queue = JobQueue(handler, workers=1)
+        blocker = queue.submit("blocker", "blocker")
+        await asyncio.sleep(0)
+        jobs = [queue.submit(f"batch-{i}", f"batch-{i}", PRIORITY_BATCH) for i in range(3)]
+        jobs.append(queue.submit("interactive", "interactive", PRIORITY_INTERACTIVE))
+        release.set()
+        await asyncio.gather(*[queue.wait(job) for job in [blocker] + jobs])
+        self.assertEqual(order[:2], ["blocker", "interactive"])
+        await queue.stop()
+
+    async def test_backpressure(self):
+        async def handler(payload):
+            await asyncio.sleep(1)
+        queue = JobQueue(handler, workers=1, max_queued=2)
+        queue.submit("running", None)
+        await asyncio.sleep(0)
+        queue.submit("queued-1", None)
+        queue.submit("queued-2", None)
+        with self.assertRaises(QueueFullError):
+            queue.submit("rejected", None)
+        self.assertEqual(queue.stats()["rejected"], 1)
+        await queue.stop()
+
+    async def test_status_shared_with_other_workers(self):
+        release = asyncio.Event()
+
+        async def handler(payload):
+            await release.wait()
+            return {"image_url": payload}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = SQLiteStateBackend(os.path.join(tmpdir, "state.db"))
+            queue = JobQueue(handler, workers=1, state=state)
+            # A queue on another worker that never saw the job
+            other = JobQueue(handler, workers=1, state=state)
+            job = queue.submit("a", "http://x/a.png")
+            await asyncio.sleep(0)
+            await queue.flush()
+            self.assertEqual(await other.status("a"), {"status": RUNNING})
+            release.set()
+            await queue.wait(job)
+            await queue.flush()
+            self.assertEqual(await other.status("a"), {"status": DONE, "result": {"image_url": "http://x/a.png"}})
+            self.assertIsNone(await other.status("unknown"))
+            await queue.stop()
+            await other.stop()
+            state.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
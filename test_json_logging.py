@@ -0,0 +1,102 @@
+import io
+import json
+import logging
+import queue
+import unittest
+from json_logging import (setup_logging, shutdown_logging, logging_configured, correlation, NonBlockingQueueHandler,
+                          CorrelationMiddleware, request_id_var)
+
+
+class TestJSONLogging(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger("test_json_logging")
+
+    def tearDown(self):
+        shutdown_logging()
+        logging.getLogger().setLevel(logging.WARNING)
+
+    def records(self):
+        # Stopping the listener flushes everything queued so far
+        shutdown_logging()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_records_with_correlation_ids(self):
+        setup_logging(level="INFO", stream=self.stream)
+        with correlation(request_id="req-1", image_id="img-1"):
+            self.logger.info("Image %s generated", "img-1", extra={"model": "fluently-xl"})
+        self.logger.info("outside")
+
+        inside, outside = self.records()
+        self.assertEqual(inside["msg"], "Image img-1 generated")
+        self.assertEqual(inside["level"], "INFO")
+        self.assertEqual(inside["model"], "fluently-xl")
+        self.assertEqual((inside["request_id"], inside["image_id"]), ("req-1", "img-1"))
+        self.assertNotIn("request_id", outside)
+
+    def test_logging_configured(self):
+        self.assertFalse(logging_configured())
+        setup_logging(stream=self.stream)
+        self.assertTrue(logging_configured())
+        shutdown_logging()
+        self.assertFalse(logging_configured())
+
+    def test_exceptions_formatted(self):
+        setup_logging(level="INFO", stream=self.stream)
+        try:
+            raise ValueError("boom")
+        except ValueError as e:
+            self.logger.error("failed", exc_info=e)
+        record, = self.records()
+        self.assertIn("ValueError: boom", record["exc"])
+
+    def test_debug_sampling(self):
+        setup_logging(level="DEBUG", stream=self.stream, sample_rate=0)
+        for _ in range(20):
+            self.logger.debug("noisy")
+        self.logger.warning("kept")
+        self.assertEqual([r["msg"] for r in self.records()], ["kept"])
+
+    def test_level(self):
+        setup_logging(level="WARNING", stream=self.stream)
+        self.logger.info("hidden")
+        self.assertEqual(self.records(), [])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(2))
+        for i in range(5):
+            handler.handle(logging.LogRecord("x", logging.INFO, "", 0, "msg %d", (i,), None))
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(handler.queue.get().msg, "msg 0")
+
+
+class TestCorrelationMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def run_request(self, headers):
+        seen = {}
+        sent = []
+
+        async def app(scope, receive, send):
+            seen["request_id"] = request_id_var.get()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        async def send(message):
+            sent.append(message)
+
+        await CorrelationMiddleware(app)({"type": "http", "headers": headers}, None, send)
+        return seen["request_id"], dict(sent[0]["headers"])
+
+    async def test_uses_and_echoes_request_id(self):
+        request_id, headers = await self.run_request([(b"x-request-id", b"abc")])
+        self.assertEqual(request_id, "abc")
+        self.assertEqual(headers[b"x-request-id"], b"abc")
+        self.assertIsNone(request_id_var.get())
+
+    async def test_generates_request_id(self):
+        request_id, headers = await self.run_request([])
+        self.assertTrue(request_id)
+        self.assertEqual(headers[b"x-request-id"], request_id.encode())
+
+
+if __name__ == "__main__":
+    unittest.main()
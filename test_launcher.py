@@ -0,0 +1,39 @@
+import os
+import socket
+import unittest
+from launcher import APP, bind_socket, build_config, build_parser, parse_workers
+
+
+class TestLauncher(unittest.TestCase):
+    def test_parse_workers(self):
+        self.assertEqual(parse_workers("3"), 3)
+        self.assertEqual(parse_workers("auto"), os.cpu_count() or 1)
+        self.assertEqual(parse_workers("0"), os.cpu_count() or 1)
+
+    def test_build_config(self):
+        args = build_parser().parse_args(["--port", "9000", "--keep-alive", "30", "--backlog", "4096",
+                                          "--limit-concurrency", "100", "--loop", "asyncio", "--http", "h11"])
+        app = object()
+        config = build_config(args, app)
+        self.assertIs(config.app, app)
+        self.assertEqual((config.port, config.timeout_keep_alive, config.backlog), (9000, 30, 4096))
+        self.assertEqual((config.limit_concurrency, config.loop, config.http), (100, "asyncio", "h11"))
+
+    def test_workers_import_the_app(self):
+        config = build_config(build_parser().parse_args(["--workers", "4"]), object())
+        self.assertEqual((config.app, config.workers), (APP, 4))
+        with self.assertRaises(SystemExit):
+            build_config(build_parser().parse_args(["--workers", "2", "--reload"]))
+
+    @unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "SO_REUSEPORT not supported")
+    def test_reuse_port(self):
+        first = bind_socket("127.0.0.1", 0, 16, reuse_port=True)
+        port = first.getsockname()[1]
+        second = bind_socket("127.0.0.1", port, 16, reuse_port=True)
+        self.assertEqual(second.getsockname()[1], port)
+        first.close()
+        second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import io
+import json
+import unittest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from tool_registry import ToolRegistry
+from mcp_protocol import MCPProtocol, StdioTransport, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, origin_allowed
+
+
+class SleepParams(BaseModel):
+    seconds: float = Field(0, description="How long to sleep")
+    label: str = Field("", description="Returned when done")
+
+
+def error_response(e):
+    if isinstance(e, HTTPException):
+        return JSONResponse(status_code=e.status_code, content={"error": e.detail})
+    return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+def request(request_id, method, params=None):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        message["params"] = params
+    return message
+
+
+class TestMCPProtocol(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        registry = ToolRegistry()
+
+        @registry.tool("sleep", "Sleep, then return the label", params=SleepParams)
+        async def sleep(params):
+            await asyncio.sleep(params.seconds)
+            return {"label": params.label}
+
+        @registry.tool("missing", "Always fails")
+        async def missing(params):
+            raise HTTPException(status_code=404, detail="Image not found")
+
+        self.protocol = MCPProtocol(registry, error_response, {"name": "test", "version": "0"})
+
+    async def test_initialize_and_list(self):
+        response = await self.protocol.handle(request(1, "initialize", {"protocolVersion": "2024-11-05"}))
+        self.assertEqual(response["result"]["protocolVersion"], "2024-11-05")
+        self.assertIn("tools", response["result"]["capabilities"])
+
+        response = await self.protocol.handle(request(2, "tools/list"))
+        tool = response["result"]["tools"][0]
+        self.assertEqual(tool["name"], "sleep")
+        self.assertEqual(tool["inputSchema"]["properties"]["seconds"]["type"], "number")
+
+    async def test_call_results_and_errors(self):
+        response = await self.protocol.handle(request(1, "tools/call", {"name": "sleep", "arguments": {"label": "a"}}))
+        self.assertEqual(response["result"]["structuredContent"], {"label": "a"})
+        self.assertFalse(response["result"]["isError"])
+        self.assertEqual(json.loads(response["result"]["content"][0]["text"]), {"label": "a"})
+
+        response = await self.protocol.handle(request(2, "tools/call", {"name": "missing"}))
+        self.assertTrue(response["result"]["isError"])
+
+        response = await self.protocol.handle(request(3, "tools/call", {"name": "sleep", "arguments": {"seconds": "x"}}))
+        self.assertEqual(response["error"]["code"], INVALID_PARAMS)
+        response = await self.protocol.handle(request(4, "tools/call", {"name": "unknown"}))
+        self.assertEqual(response["error"]["code"], INVALID_PARAMS)
+        response = await self.protocol.handle(request(5, "resources/list"))
+        self.assertEqual(response["error"]["code"], METHOD_NOT_FOUND)
+        response = await self.protocol.handle({"id": 6, "method": "ping"})
+        self.assertEqual(response["error"]["code"], INVALID_REQUEST)
+
+    async def test_http_origin_validated(self):
+        def http_request(origin=None):
+            headers = {"origin": origin} if origin else {}
+
+            async def body():
+                return json.dumps(request(1, "tools/list")).encode()
+            return SimpleNamespace(headers=headers, body=body)
+
+        protocol = MCPProtocol(self.protocol.registry, error_response, {"name": "test", "version": "0"},
+                               allowed_origins=["https://app.example.com"])
+        for origin in (None, "http://localhost:3000", "http://127.0.0.1", "https://app.example.com"):
+            response = await protocol.http_response(http_request(origin))
+            self.assertEqual(response.status_code, 200, origin)
+        for origin in ("https://evil.example", "null", "http://localhost.evil.example"):
+            response = await protocol.http_response(http_request(origin))
+            self.assertEqual(response.status_code, 403, origin)
+            self.assertEqual(json.loads(response.body)["error"]["code"], INVALID_REQUEST)
+        self.assertTrue(origin_allowed("https://evil.example", ["*"]))
+
+    async def test_batch_runs_concurrently(self):
+        batch = [request(i, "tools/call", {"name": "sleep", "arguments": {"seconds": 0.1}}) for i in range(5)]
+        batch.append({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        responses = await self.protocol.handle_payload(batch)
+        self.assertLess(loop.time() - started, 0.3)
+        # The notification gets no response
+        self.assertEqual([r["id"] for r in responses], list(range(5)))
+        self.assertIsNone(await self.protocol.handle_payload({"jsonrpc": "2.0", "method": "notifications/initialized"}))
+
+
+class TestStdioTransport(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        registry = ToolRegistry()
+
+        @registry.tool("sleep", "Sleep, then return the label", params=SleepParams)
+        async def sleep(params):
+            await asyncio.sleep(params.seconds)
+            return {"label": params.label}
+
+        self.protocol = MCPProtocol(registry, error_response, {"name": "test", "version": "0"})
+
+    async def serve(self, messages):
+        reader = asyncio.StreamReader()
+        for message in messages:
+            reader.feed_data(message if isinstance(message, bytes) else json.dumps(message).encode() + b"\n")
+        reader.feed_eof()
+        output = io.BytesIO()
+        await StdioTransport(self.protocol, reader=reader, output=output).run()
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    async def test_pipelined_requests_answered_as_they_finish(self):
+        responses = await self.serve([
+            request(1, "tools/call", {"name": "sleep", "arguments": {"seconds": 0.1, "label": "slow"}}),
+            request(2, "tools/call", {"name": "sleep", "arguments": {"label": "fast"}}),
+            b"not json\n"
+        ])
+        self.assertEqual(responses[0]["error"]["message"], "Parse error")
+        self.assertEqual([r["id"] for r in responses[1:]], [2, 1])
+
+    async def test_cancelled_request_gets_no_response(self):
+        responses = await self.serve([
+            request(1, "tools/call", {"name": "sleep", "arguments": {"seconds": 5}}),
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}},
+            request(2, "ping")
+        ])
+        self.assertEqual(responses, [{"jsonrpc": "2.0", "id": 2, "result": {}}])
+
+
+if __name__ == "__main__":
+    unittest.main()
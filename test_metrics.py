@@ -0,0 +1,86 @@
+import asyncio
+import time
+import unittest
+from metrics import MetricsRegistry, EventLoopLagMonitor, InFlightMiddleware, RequestTracker
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def render(self):
+        return self.registry.render().decode().splitlines()
+
+    def test_counter(self):
+        calls = self.registry.counter("calls_total", "Calls", ["tool"])
+        calls.inc("a")
+        calls.inc("a")
+        calls.inc("b", amount=3)
+        lines = self.render()
+        self.assertIn("# TYPE calls_total counter", lines)
+        self.assertIn('calls_total{tool="a"} 2', lines)
+        self.assertIn('calls_total{tool="b"} 3', lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency", ["tool"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, "a")
+        lines = self.render()
+        self.assertIn('latency_seconds_bucket{tool="a",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{tool="a",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{tool="a",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{tool="a"} 2.65', lines)
+        self.assertIn('latency_seconds_count{tool="a"} 4', lines)
+
+    def test_label_values_escaped_and_series_bounded(self):
+        calls = self.registry.counter("calls_total", "Calls", ["model"], max_series=2)
+        calls.inc('say "hi"\n')
+        calls.inc("b")
+        calls.inc("c")
+        calls.inc("d")
+        lines = self.render()
+        self.assertIn('calls_total{model="say \\"hi\\"\\n"} 1', lines)
+        self.assertIn('calls_total{model="other"} 2', lines)
+
+    def test_stats_collector(self):
+        stats = {"hits": 3, "size": 10, "backend": "memory"}
+        self.registry.stats("cache", lambda: stats, counters=("hits",), gauges=("size", "backend"))
+        lines = self.render()
+        self.assertIn("cache_hits_total 3", lines)
+        self.assertIn("cache_size 10", lines)
+        # Non-numeric values are skipped
+        self.assertFalse(any(line.startswith("cache_backend") for line in lines))
+
+    def test_broken_collector_skipped(self):
+        self.registry.stats("broken", lambda: 1 / 0, gauges=("x",))
+        self.registry.counter("ok_total", "Fine").inc()
+        self.assertIn("ok_total 1", self.render())
+
+
+class TestRuntimeMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_event_loop_lag(self):
+        monitor = EventLoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        # Block the loop so the next probe wakes up late
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        self.assertGreaterEqual(monitor.stats()["max_lag_seconds"], 0.05)
+
+    async def test_in_flight_middleware(self):
+        tracker = RequestTracker()
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(tracker.in_flight)
+
+        middleware = InFlightMiddleware(app, tracker=tracker)
+        await middleware({"type": "http"}, None, None)
+        await middleware({"type": "lifespan"}, None, None)
+        self.assertEqual(seen, [1, 0])
+        self.assertEqual(tracker.stats(), {"in_flight": 0, "requests": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+from model_catalog import ModelCatalog, FALLBACK_MODELS
+
+
+class FakeClient:
+    """Stand-in for VeniceClient that counts list_models calls."""
+
+    def __init__(self, models=None, fail=False, delay=0.05):
+        self.models = models or [{"id": "model-a"}, {"id": "model-b"}]
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    async def list_models(self, model_type="image"):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("models endpoint unavailable")
+        return {"object": "list", "data": self.models}
+
+
+class TestModelCatalog(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_first_load_is_single_flight(self):
+        client = FakeClient()
+        catalog = ModelCatalog(client)
+        results = await asyncio.gather(*[catalog.get_models() for _ in range(10)])
+        self.assertEqual(client.calls, 1)
+        self.assertEqual([m["id"] for m in results[0]], ["model-a", "model-b"])
+
+    async def test_has_model(self):
+        catalog = ModelCatalog(FakeClient())
+        await catalog.get_models()
+        self.assertTrue(await catalog.has_model("model-a"))
+        self.assertFalse(await catalog.has_model("fluently-xl"))
+
+    async def test_has_model_never_waits_for_the_api(self):
+        client = FakeClient(fail=True, delay=0.3)
+        catalog = ModelCatalog(client)
+        start = time.monotonic()
+        self.assertTrue(await catalog.has_model("fluently-xl"))
+        self.assertLess(time.monotonic() - start, 0.1)
+        # The first load was started in the background and is shared by later calls
+        await catalog.has_model("fluently-xl")
+        await asyncio.sleep(0)
+        self.assertEqual(client.calls, 1)
+        with self.assertLogs("model_catalog", "WARNING"):
+            await asyncio.gather(catalog.refresh(), return_exceptions=True)
+
+    async def test_stale_catalog_served_while_revalidating(self):
+        client = FakeClient()
+        catalog = ModelCatalog(client, ttl=0)
+        await catalog.get_models()
+        client.models = [{"id": "model-c"}]
+        # Stale data comes back immediately; the refresh happens in the background
+        models = await catalog.get_models()
+        self.assertEqual(models[0]["id"], "model-a")
+        await catalog.refresh()
+        self.assertTrue(await catalog.has_model("model-c"))
+
+    async def test_outage_falls_back_without_retrying_every_call(self):
+        client = FakeClient(fail=True)
+        catalog = ModelCatalog(client, error_ttl=60)
+        self.assertEqual(await catalog.get_models(), FALLBACK_MODELS)
+        self.assertTrue(await catalog.has_model("fluently-xl"))
+        # Only the fallback list is known, so models missing from it aren't rejected
+        with self.assertLogs("model_catalog", "WARNING"):
+            self.assertTrue(await catalog.has_model("flux-dev"))
+        self.assertEqual(client.calls, 1)
+        self.assertIsNotNone(catalog.stats()["last_error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from io import BytesIO
+from types import SimpleNamespace
+from PIL import Image
+from gemini import multi_view
+
+
+def png_bytes(color="red"):
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def image_response(data=None, text=None):
+    """Build a Gemini response holding an optional text part and an optional image part."""
+    parts = []
+    if text is not None:
+        parts.append(SimpleNamespace(text=text, inline_data=None))
+    if data is not None:
+        parts.append(SimpleNamespace(text=None, inline_data=SimpleNamespace(data=data)))
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts), finish_reason="STOP")])
+
+
+class FakeGeminiClient:
+    """
+    Stand-in for genai.Client that answers generate_content from a callback.
+
+    Args:
+        respond (callable): Maps the prompt to a response (defaults to a PNG for every view)
+        delay (float): Seconds each request takes
+    """
+
+    def __init__(self, respond=None, delay=0.0):
+        self.respond = respond or (lambda prompt: image_response(png_bytes()))
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate_content))
+
+    async def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents[0])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.respond(contents[0])
+        finally:
+            self.in_flight -= 1
+
+
+class TestMultiView(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "source.png")
+        Image.new("RGB", (8, 8), "blue").save(self.source)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    async def test_views_generated_concurrently_and_saved(self):
+        client = FakeGeminiClient(delay=0.05)
+        output_dir = os.path.join(self.tmpdir.name, "out")
+        with self.assertLogs("gemini.multi_view", "INFO") as logs:
+            views = await multi_view.generate_views(self.source, [0, 90, 180, 270, 360], output_dir=output_dir,
+                                                    max_concurrency=2, client=client)
+        # 360 is the front view again, so it is only requested once
+        self.assertEqual(sorted(views), [0, 90, 180, 270])
+        self.assertEqual(len(client.prompts), 4)
+        self.assertEqual(client.max_in_flight, 2)
+        for angle in views:
+            self.assertTrue(os.path.exists(multi_view.output_path_for(output_dir, angle)))
+        self.assertEqual(sum("saved to" in line for line in logs.output), 4)
+
+    async def test_source_is_loaded_off_the_event_loop(self):
+        threads = []
+        load_image = multi_view.load_image
+
+        def recording_load_image(path):
+            threads.append(threading.current_thread())
+            return load_image(path)
+
+        with unittest.mock.patch.object(multi_view, "load_image", recording_load_image):
+            await multi_view.generate_views(self.source, [0], client=FakeGeminiClient())
+        self.assertNotEqual(threads, [threading.main_thread()])
+
+    async def test_text_only_response_has_no_image(self):
+        client = FakeGeminiClient(lambda prompt: image_response(text="I can't draw that"))
+        with self.assertLogs("gemini.multi_view", "INFO") as logs:
+            views = await multi_view.generate_views(self.source, [0], client=client)
+        self.assertIsNone(views[0])
+        self.assertIn("I can't draw that", logs.output[0])
+
+    async def test_empty_candidates_raise_a_clear_error(self):
+        blocked = SimpleNamespace(candidates=None, prompt_feedback=SimpleNamespace(block_reason="SAFETY"))
+        client = FakeGeminiClient(lambda prompt: blocked)
+        with self.assertRaisesRegex(ValueError, r"no candidates for the back view \(blocked: SAFETY\)"):
+            await multi_view.generate_view(client, Image.new("RGB", (8, 8)), 180)
+
+        empty = SimpleNamespace(candidates=[SimpleNamespace(content=None, finish_reason="PROHIBITED_CONTENT")])
+        client = FakeGeminiClient(lambda prompt: empty)
+        with self.assertRaisesRegex(ValueError, "empty response for the left view"):
+            await multi_view.generate_view(client, Image.new("RGB", (8, 8)), 270)
+
+
+if __name__ == "__main__":
+    unittest.main()
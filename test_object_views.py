@@ -0,0 +1,68 @@
+import asyncio
+import base64
+import tempfile
+import unittest
+import unittest.mock
+from blob_store import BlobStore
+from result_cache import ResultCache
+from test_multi_view import FakeGeminiClient, image_response, png_bytes
+import server
+
+SOURCE = base64.b64encode(png_bytes("blue")).decode()
+
+
+class TestGenerateObjectViews(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.blob_store = BlobStore(self.tmpdir.name)
+        self.client = FakeGeminiClient(delay=0.05)
+        patches = [
+            unittest.mock.patch.object(server, "blob_store", self.blob_store),
+            unittest.mock.patch.object(server, "object_view_cache", ResultCache()),
+            unittest.mock.patch.object(server, "gemini_semaphore", asyncio.Semaphore(2)),
+            unittest.mock.patch.object(server.multi_view, "get_client", lambda: self.client),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    async def views(self, **parameters):
+        return await server.tools.call("generate_object_views", {"image_data": SOURCE, **parameters})
+
+    async def test_views_are_rendered_and_stored(self):
+        result = await self.views(angles=[0, 90])
+        self.assertEqual([view["name"] for view in result["views"]], ["front", "right"])
+        for view in result["views"]:
+            digest = view["image_url"].rsplit("/", 1)[1][:-len(".png")]
+            self.assertTrue(self.blob_store.exists(digest))
+        self.assertEqual(len(self.client.prompts), 2)
+
+    async def test_failed_view_is_reported_alongside_the_others(self):
+        self.client.respond = lambda prompt: (image_response(text="no") if "back view" in prompt
+                                              else image_response(png_bytes()))
+        result = await self.views(angles=[0, 180])
+        front, back = result["views"]
+        self.assertIn("image_url", front)
+        self.assertIn("no image for the back view", back["error"])
+
+    async def test_cached_views_are_not_rendered_again(self):
+        await self.views(angles=[0, 90])
+        with unittest.mock.patch.object(server.multi_view, "load_image") as load_image:
+            result = await self.views(angles=[90, 0])
+        self.assertEqual(len(self.client.prompts), 2)
+        # Every view was cached, so the source wasn't even decoded
+        load_image.assert_not_called()
+        self.assertTrue(all("image_url" in view for view in result["views"]))
+        self.assertEqual(server.object_view_cache.stats()["hits"], 2)
+
+    async def test_gemini_requests_are_capped(self):
+        result = await self.views(angles=[0, 90, 180, 270])
+        self.assertEqual(len(result["views"]), 4)
+        self.assertEqual(self.client.max_in_flight, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
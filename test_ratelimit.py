@@ -0,0 +1,66 @@
+import asyncio
+import time
+import unittest
+from ratelimit import AdaptiveConcurrencyLimiter, TokenBucket, backoff_delay
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=5)
+        start = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        # 5 immediate, 5 more at 20/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    async def test_pause_blocks_callers(self):
+        bucket = TokenBucket(rate=100, burst=10)
+        bucket.pause(0.1)
+        start = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_try_acquire_does_not_wait(self):
+        bucket = TokenBucket(rate=0.001, burst=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertTrue(TokenBucket(rate=0, burst=1).try_acquire())
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_limit_bounds_in_flight(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[work() for _ in range(10)])
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_aimd(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=32, cooldown=0)
+        limiter.on_overload()
+        self.assertEqual(int(limiter.limit), 4)
+        for _ in range(20):
+            limiter.on_success(0.1)
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 32)
+
+    def test_slow_responses_count_as_overload(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=8, latency_target=1.0, cooldown=0)
+        limiter.on_success(5.0)
+        self.assertEqual(int(limiter.limit), 4)
+
+    def test_backoff_is_capped(self):
+        for attempt in range(20):
+            self.assertLessEqual(backoff_delay(attempt, base=0.5, cap=2.0), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from result_cache import ResultCache, generation_key
+
+
+class TestResultCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    async def factory(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"image_url": f"https://example.com/{self.calls}.png"}
+
+    def test_key_is_canonical(self):
+        a = generation_key({"prompt": "cat", "width": 512, "height": 512, "steps": 20, "model": "fluently-xl"})
+        b = generation_key({"model": "fluently-xl", "steps": 20, "height": 512, "width": 512, "prompt": "cat"})
+        c = generation_key({"prompt": "cat", "width": 512, "height": 512, "steps": 30, "model": "fluently-xl"})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    async def test_concurrent_requests_share_one_call(self):
+        cache = ResultCache()
+        results = await asyncio.gather(*[cache.get_or_create("k", self.factory) for _ in range(5)])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len({r["image_url"] for r in results}), 1)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    async def test_results_reused_until_ttl(self):
+        cache = ResultCache(ttl=60)
+        await cache.get_or_create("k", self.factory)
+        await cache.get_or_create("k", self.factory)
+        self.assertEqual(self.calls, 1)
+        await cache.get_or_create("short", self.factory, ttl=0)
+        await cache.get_or_create("short", self.factory, ttl=0)
+        self.assertEqual(self.calls, 3)
+
+    async def test_uncacheable_results_not_stored(self):
+        cache = ResultCache()
+        await cache.get_or_create("k", self.factory, should_cache=lambda r: False)
+        await cache.get_or_create("k", self.factory, should_cache=lambda r: False)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,27 +6,39 @@ import time
 import subprocess
 import signal
 import sys
+from benchmarks.mock_venice import MockVenice
 
 class TestVeniceAIMCPServer(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
+        # Serve the Venice API locally so the tests run offline
+        cls.mock_venice = MockVenice().start()
+        
         # Start the server with a mock API key
         env = os.environ.copy()
         env["VENICE_API_KEY"] = "mock_api_key"
+        env["VENICE_API_BASE"] = cls.mock_venice.api_base
         cls.server_process = subprocess.Popen(
-            ["python", "server.py"],
+            [sys.executable, "server.py"],
             env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         # Wait for server to start
-        time.sleep(2)
+        for _ in range(100):
+            try:
+                if requests.get("http://localhost:8000/health").status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.1)
         
     @classmethod
     def tearDownClass(cls):
         # Kill the server process
         cls.server_process.send_signal(signal.SIGTERM)
         cls.server_process.wait()
+        cls.mock_venice.stop()
         
     def test_list_tools(self):
         response = requests.get("http://localhost:8000/mcp/tools/list")
@@ -38,6 +50,8 @@ class TestVeniceAIMCPServer(unittest.TestCase):
         self.assertIn("approve_image", tools)
         self.assertIn("regenerate_image", tools)
         self.assertIn("list_available_models", tools)
+        self.assertIn("generate_venice_images", tools)
+        self.assertIn("generate_object_views", tools)
         
     def test_list_models(self):
         response = requests.post(
@@ -108,5 +122,122 @@ class TestVeniceAIMCPServer(unittest.TestCase):
         # Verify it's a different image ID
         self.assertNotEqual(image_id, data["image_id"])
 
+    def test_speculative_regenerate(self):
+        def call(tool_name, parameters):
+            response = requests.post("http://localhost:8000/mcp/tools/call",
+                                     json={"tool_name": tool_name, "parameters": parameters})
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+        
+        hits = requests.get("http://localhost:8000/debug/cache").json()["speculation"]["hits"]
+        image = call("generate_venice_image", {"prompt": "speculative image", "speculate": True})
+        # The thumbs down is answered with the candidate generated in the background
+        regenerated = call("regenerate_image", {"image_id": image["image_id"], "speculate": True})
+        self.assertNotEqual(regenerated["image_id"], image["image_id"])
+        self.assertNotEqual(regenerated["image_url"], image["image_url"])
+        self.assertTrue(call("approve_image", {"image_id": regenerated["image_id"]})["success"])
+        stats = requests.get("http://localhost:8000/debug/cache").json()["speculation"]
+        self.assertEqual(stats["hits"], hits + 1)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_progressive_generation(self):
+        def call(tool_name, parameters):
+            response = requests.post("http://localhost:8000/mcp/tools/call",
+                                     json={"tool_name": tool_name, "parameters": parameters})
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+        
+        def upstream_request():
+            return requests.get(f"{self.mock_venice.url}/_stats").json()["last_request"]
+        
+        # The first image is a cheap draft
+        draft = call("generate_venice_image", {"prompt": "progressive image", "steps": 30, "progressive": True})
+        self.assertTrue(draft["draft"])
+        self.assertEqual(upstream_request(), {"model": "fluently-xl", "width": 512, "height": 512, "steps": 8})
+        
+        # Approving it renders the full image under the same ID, shaped as the approval asked
+        approval = call("approve_image", {"image_id": draft["image_id"], "include_html": False})
+        self.assertTrue(approval["refining"])
+        for _ in range(100):
+            status = call("get_image_status", {"image_id": draft["image_id"]})
+            if status["status"] == "done":
+                break
+            time.sleep(0.05)
+        self.assertEqual(status["status"], "done")
+        self.assertNotEqual(status["result"]["image_url"], draft["image_url"])
+        self.assertNotIn("draft", status["result"])
+        self.assertNotIn("html", status["result"])
+        self.assertEqual(upstream_request(), {"model": "fluently-xl", "width": 1024, "height": 1024, "steps": 30})
+        
+        # A second approval doesn't render it again
+        self.assertFalse(call("approve_image", {"image_id": draft["image_id"]}).get("refining"))
+
+    def test_generate_image_stream(self):
+        response = requests.post(
+            "http://localhost:8000/mcp/tools/call/stream",
+            json={"tool_name": "generate_venice_image", "parameters": {"prompt": "test image"}}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        self.assertEqual(events[0], "accepted")
+        self.assertEqual(events[-1], "result")
+
+    def test_malformed_tool_call_body(self):
+        for path in ("/mcp/tools/call", "/mcp/tools/call/stream"):
+            for body in ("{not json", "[1, 2]"):
+                response = requests.post(f"http://localhost:8000{path}", data=body,
+                                         headers={"Content-Type": "application/json"})
+                self.assertEqual(response.status_code, 400, (path, body))
+                self.assertIn("error", response.json())
+
+    def test_generate_image_async(self):
+        response = requests.post(
+            "http://localhost:8000/mcp/tools/call",
+            json={"tool_name": "generate_venice_image", "parameters": {"prompt": "test image", "async": True}}
+        )
+        self.assertEqual(response.status_code, 200)
+        image_id = response.json()["image_id"]
+        
+        # Poll until the job finishes
+        for _ in range(50):
+            response = requests.post(
+                "http://localhost:8000/mcp/tools/call",
+                json={"tool_name": "get_image_status", "parameters": {"image_id": image_id}}
+            )
+            self.assertEqual(response.status_code, 200)
+            if response.json()["status"] in ("done", "failed"):
+                break
+            time.sleep(0.1)
+        self.assertEqual(response.json()["status"], "done")
+        self.assertIn("image_url", response.json()["result"])
+
+    def test_generate_images_batch(self):
+        response = requests.post(
+            "http://localhost:8000/mcp/tools/call",
+            json={"tool_name": "generate_venice_images", "parameters": {
+                "items": [{"prompt": "first test image"}, {}, {"prompt": "second test image"}]
+            }}
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertIn("image_id", results[0])
+        self.assertIn("error", results[1])
+        self.assertIn("image_id", results[2])
+
+    def test_generate_object_views_needs_a_source(self):
+        response = requests.post(
+            "http://localhost:8000/mcp/tools/call",
+            json={"tool_name": "generate_object_views", "parameters": {}}
+        )
+        self.assertEqual(response.status_code, 400)
+        
+        response = requests.post(
+            "http://localhost:8000/mcp/tools/call",
+            json={"tool_name": "generate_object_views", "parameters": {"image_id": "non-existent-id"}}
+        )
+        self.assertEqual(response.status_code, 404)
+
 if __name__ == "__main__":
     unittest.main()
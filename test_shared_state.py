@@ -0,0 +1,135 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from benchmarks.mock_redis import MockRedis
+from image_cache import ImageRecord, create_image_cache
+from shared_state import RedisStateBackend, SQLiteStateBackend, SharedImageCache, connect
+
+
+class BackendTests:
+    """Tests run against every state backend."""
+
+    def test_get_set_many(self):
+        self.assertIsNone(self.backend.get("missing"))
+        self.backend.set_many({f"k{i}": str(i).encode() for i in range(1200)})
+        self.assertEqual(self.backend.get_many(["k0", "missing", "k1199"]), [b"0", None, b"1199"])
+        self.assertEqual(self.backend.count("k"), 1200)
+
+    def test_ttl(self):
+        self.backend.set("short", b"v", ttl=0.05)
+        self.backend.set("long", b"v", ttl=60)
+        self.assertEqual(self.backend.get("short"), b"v")
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get("short"))
+        self.assertEqual(list(self.backend.scan("")), ["long"])
+
+    def test_delete_and_scan_prefix(self):
+        self.backend.set_many({"image:a": b"1", "image:b": b"2", "job:a": b"3"})
+        self.assertTrue(self.backend.delete("image:a"))
+        self.assertFalse(self.backend.delete("image:a"))
+        self.assertEqual(list(self.backend.scan("image:")), ["image:b"])
+
+    def test_concurrent_updates_are_not_lost(self):
+        self.backend.set("counter", b"0")
+
+        def increment():
+            for _ in range(25):
+                self.backend.update("counter", lambda value: str(int(value) + 1).encode())
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.backend.get("counter"), b"100")
+        # Missing keys are left alone when update() returns None
+        self.assertIsNone(self.backend.update("missing", lambda value: value))
+        self.assertIsNone(self.backend.get("missing"))
+
+    def test_image_records_shared_between_workers(self):
+        worker_a, worker_b = SharedImageCache(self.backend), SharedImageCache(self.backend)
+        worker_a.put("img", ImageRecord(prompt="a cat", image_url="http://x/1.png"))
+        # An approval on one worker is seen by the other
+        self.assertEqual(worker_b.update("img", approved=True).prompt, "a cat")
+        self.assertTrue(worker_a.get("img").approved)
+        self.assertIsNone(worker_b.get("unknown"))
+        self.assertEqual([image_id for image_id, _ in worker_a.items()], ["img"])
+        self.assertEqual(len(worker_a), 1)
+        self.assertEqual(worker_b.stats()["misses"], 1)
+
+    def test_async_methods_and_capped_snapshot(self):
+        cache = SharedImageCache(self.backend)
+
+        async def run():
+            await cache.put_async("img", ImageRecord(prompt="a cat"))
+            self.assertTrue((await cache.update_async("img", approved=True)).approved)
+            self.assertTrue((await cache.get_async("img")).approved)
+            self.assertIsNone(await cache.update_async("unknown", approved=True))
+
+        asyncio.run(run())
+        cache.put_many({f"more{i}": ImageRecord(prompt="a dog") for i in range(10)})
+        self.assertEqual(len(cache.snapshot(limit=5)), 5)
+        self.assertEqual(len(cache.snapshot(limit=100)), 11)
+
+
+class TestRedisStateBackend(BackendTests, unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockRedis().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.backend = connect(self.server.url, namespace="test:")
+        self.assertIsInstance(self.backend, RedisStateBackend)
+        self.backend.client.execute("FLUSHDB")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_bulk_operations_are_pipelined(self):
+        round_trips = self.backend.stats()["round_trips"]
+        self.backend.set_many({f"k{i}": b"v" for i in range(100)})
+        self.backend.get_many([f"k{i}" for i in range(100)])
+        self.assertEqual(self.backend.stats()["round_trips"] - round_trips, 2)
+
+
+class TestSQLiteStateBackend(BackendTests, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "state.db")
+        self.backend = connect(f"sqlite:///{self.path}")
+        self.assertIsInstance(self.backend, SQLiteStateBackend)
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmpdir.cleanup()
+
+    def test_shared_between_processes(self):
+        # A second handle on the same file stands in for another worker process
+        other = SQLiteStateBackend(self.path)
+        self.backend.set("k", b"v")
+        self.assertEqual(other.get("k"), b"v")
+        other.close()
+
+
+class TestConnect(unittest.TestCase):
+    def test_unset_and_unsupported(self):
+        self.assertIsNone(connect(""))
+        with self.assertRaises(ValueError):
+            connect("memcached://localhost")
+
+    def test_image_cache_backend(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = create_image_cache("shared", state=connect(f"sqlite:///{tmpdir}/state.db"))
+            self.assertIsInstance(cache, SharedImageCache)
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
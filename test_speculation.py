@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from speculation import Speculator
+
+PARAMS = {"prompt": "a cat", "width": 1024, "height": 1024, "steps": 20, "model": "fluently-xl"}
+
+
+class TestSpeculator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.calls = 0
+        self.delay = 0.0
+        self.fail = False
+
+    async def generate(self, generation_params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream error")
+        return {"image_url": f"http://x/{generation_params['model']}/{self.calls}.png"}
+
+    def speculator(self, **kwargs):
+        return Speculator(self.generate, **{"rate": 0, "burst": 1, **kwargs})
+
+    async def test_claim_returns_candidate(self):
+        speculator = self.speculator()
+        self.assertTrue(speculator.speculate("img", PARAMS))
+        self.assertFalse(speculator.speculate("img", PARAMS))
+        self.assertEqual(await speculator.claim("img"), {"image_url": "http://x/fluently-xl/1.png"})
+        # A candidate is only handed out once
+        self.assertIsNone(await speculator.claim("img"))
+        stats = speculator.stats()
+        self.assertEqual((stats["started"], stats["hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["hit_ratio"], 1.0)
+
+    async def test_claim_waits_for_in_flight_candidate(self):
+        self.delay = 0.05
+        speculator = self.speculator()
+        speculator.speculate("img", PARAMS)
+        self.assertIsNotNone(await speculator.claim("img"))
+        self.assertEqual(self.calls, 1)
+
+    async def test_discard_counts_waste(self):
+        speculator = self.speculator()
+        speculator.speculate("done", PARAMS)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertTrue(speculator.discard("done"))
+        self.assertFalse(speculator.discard("done"))
+        stats = speculator.stats()
+        self.assertEqual((stats["wasted"], stats["waste_ratio"]), (1, 1.0))
+
+    async def test_discard_before_sending_costs_nothing(self):
+        self.delay = 0.05
+        speculator = self.speculator(concurrency=1)
+        speculator.speculate("first", PARAMS)
+        speculator.speculate("second", PARAMS)
+        await asyncio.sleep(0)
+        # "second" is still waiting for a slot, so dropping it sends nothing upstream
+        speculator.discard("second")
+        await speculator.claim("first")
+        stats = speculator.stats()
+        self.assertEqual((stats["started"], stats["cancelled"], stats["wasted"]), (1, 1, 0))
+        self.assertEqual(self.calls, 1)
+
+    async def test_rate_limit_per_model(self):
+        speculator = Speculator(self.generate, rate=0.001, burst=1)
+        self.assertTrue(speculator.speculate("a", PARAMS))
+        self.assertFalse(speculator.speculate("b", PARAMS))
+        self.assertTrue(speculator.speculate("c", {**PARAMS, "model": "flux-dev"}))
+        self.assertEqual(speculator.stats()["models"]["fluently-xl"]["rate_limited"], 1)
+        await speculator.stop()
+
+    async def test_skipped_while_busy(self):
+        speculator = self.speculator(busy=lambda: True)
+        self.assertFalse(speculator.speculate("img", PARAMS))
+        self.assertEqual(speculator.stats()["skipped"], 1)
+        self.assertEqual(self.calls, 0)
+
+    async def test_failed_candidate_falls_back(self):
+        self.fail = True
+        speculator = self.speculator()
+        speculator.speculate("img", PARAMS)
+        self.assertIsNone(await speculator.claim("img"))
+        self.assertEqual(speculator.stats()["failed"], 1)
+
+    async def test_expiry_and_capacity(self):
+        speculator = self.speculator(ttl=0.01, max_entries=2)
+        speculator.speculate("a", PARAMS)
+        await asyncio.sleep(0.02)
+        self.assertIsNone(await speculator.claim("a"))
+        for image_id in ("b", "c", "d"):
+            speculator.speculate(image_id, PARAMS)
+        # The oldest candidate makes room for the newest
+        self.assertEqual(speculator.stats()["pending"], 2)
+        self.assertIsNone(await speculator.claim("b"))
+        await speculator.stop()
+        self.assertEqual(speculator.stats()["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from templates import ImageWidget
+
+
+class TestImageWidget(unittest.TestCase):
+    def test_fragment_contains_controls(self):
+        html = ImageWidget().render("abc", "https://example.com/image.png")
+        self.assertIn("venice-image-container", html)
+        self.assertIn("hover-controls", html)
+        self.assertIn("callApproveImage(&quot;abc&quot;)", html)
+        self.assertIn("callRegenerateImage(&quot;abc&quot;)", html)
+        self.assertIn('src="/static/venice-widget.js"', html)
+        # Shared CSS/JS live in the asset, not in every fragment
+        self.assertNotIn("<style>", html)
+        self.assertNotIn("function", html)
+
+    def test_values_are_escaped(self):
+        html = ImageWidget().render("');alert(1);('", 'https://example.com/"><script>alert(1)</script>')
+        self.assertNotIn("<script>alert(1)", html)
+        self.assertNotIn("');alert(1)", html)
+        self.assertIn("&quot;&gt;&lt;script&gt;", html)
+
+    def test_asset_uses_base_url(self):
+        widget = ImageWidget("https://mcp.example.com")
+        self.assertIn(b'"https://mcp.example.com/mcp/tools/call"', widget.asset)
+        self.assertEqual(widget.asset_url, "https://mcp.example.com/static/venice-widget.js")
+        self.assertTrue(widget.asset_etag.startswith('"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from typing import Optional
+from pydantic import BaseModel, Field
+from tool_registry import ToolRegistry, ToolNotFoundError, ToolValidationError
+
+
+class EchoParams(BaseModel):
+    text: str = Field(..., description="Text to echo")
+    times: int = Field(1, description="Number of repetitions")
+    suffix: Optional[str] = Field(None, description="Appended to the result")
+
+
+class EchoResponse(BaseModel):
+    text: str = Field(..., description="Echoed text")
+
+
+class TestToolRegistry(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.registry = ToolRegistry()
+
+        @self.registry.tool("echo", "Echo text", params=EchoParams, returns=EchoResponse)
+        async def echo(params, prefix=""):
+            return {"text": prefix + params.text * params.times + (params.suffix or "")}
+
+    def test_schema_generated_from_models(self):
+        schema, = self.registry.schemas()
+        self.assertEqual(schema["name"], "echo")
+        self.assertEqual(schema["parameters"]["required"], ["text"])
+        properties = schema["parameters"]["properties"]
+        self.assertEqual(properties["times"], {"default": 1, "description": "Number of repetitions", "type": "integer"})
+        # Optional fields are advertised as their plain type
+        self.assertEqual(properties["suffix"], {"description": "Appended to the result", "type": "string"})
+        self.assertNotIn("title", schema["parameters"])
+        self.assertEqual(schema["returns"]["properties"]["text"]["type"], "string")
+
+    async def test_call_validates_and_dispatches(self):
+        result = await self.registry.call("echo", {"text": "ab", "times": "2"})
+        self.assertEqual(result, {"text": "abab"})
+
+    async def test_context_only_passed_to_handlers_accepting_it(self):
+        @self.registry.tool("noargs", "Takes nothing")
+        async def noargs(params):
+            return "ok"
+
+        self.assertEqual(await self.registry.call("echo", {"text": "x"}, prefix=">", other=1), {"text": ">x"})
+        self.assertEqual(await self.registry.call("noargs", None, prefix=">"), "ok")
+
+    async def test_errors(self):
+        with self.assertRaises(ToolNotFoundError):
+            await self.registry.call("missing", {})
+        with self.assertRaises(ToolValidationError) as ctx:
+            await self.registry.call("echo", {"times": 2})
+        self.assertEqual(ctx.exception.errors[0]["loc"], ("text",))
+
+    async def test_middleware_wraps_calls(self):
+        seen = []
+
+        @self.registry.use
+        async def record(spec, params, call_next):
+            seen.append((spec.name, params.text))
+            result = await call_next(spec, params)
+            return {**result, "wrapped": True}
+
+        result = await self.registry.call("echo", {"text": "x"})
+        self.assertEqual(seen, [("echo", "x")])
+        self.assertTrue(result["wrapped"])
+        self.assertEqual(self.registry.stats()["echo"]["calls"], 1)
+
+    async def test_max_concurrency(self):
+        running = {"now": 0, "peak": 0}
+
+        @self.registry.tool("slow", "Sleeps", max_concurrency=2)
+        async def slow(params):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.02)
+            running["now"] -= 1
+
+        await asyncio.gather(*[self.registry.call("slow", {}) for _ in range(6)])
+        self.assertEqual(running["peak"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
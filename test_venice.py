@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import time
+import unittest
+import unittest.mock
+import httpx
+from hedging import HedgePolicy
+from ratelimit import AdaptiveConcurrencyLimiter
+from venice import VeniceClient, VeniceError, VeniceRateLimitError, parse_retry_after
+
+
+def make_transport(delay=0.2):
+    """Build a mock Venice transport that answers after a fixed delay."""
+    async def handler(request):
+        await asyncio.sleep(delay)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json=[{"id": "fluently-xl", "name": "Fluently XL", "description": "test"}])
+        return httpx.Response(200, json={"image_url": "https://example.com/image.png"})
+    return httpx.MockTransport(handler)
+
+
+class TestVeniceClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = VeniceClient(api_key="mock_api_key", transport=make_transport())
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_generate_image(self):
+        response = await self.client.generate_image("test image")
+        self.assertEqual(response["image_url"], "https://example.com/image.png")
+
+    async def test_list_models(self):
+        models = await self.client.list_models()
+        self.assertEqual(models[0]["id"], "fluently-xl")
+
+    async def test_concurrent_generations_overlap(self):
+        # Five generations in flight should take about as long as one
+        start = time.monotonic()
+        results = await asyncio.gather(*[self.client.generate_image(f"image {i}") for i in range(5)])
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(results), 5)
+        self.assertLess(elapsed, 0.6)
+
+    async def test_generate_image_bytes_from_base64(self):
+        async def handler(request):
+            return httpx.Response(200, json={"images": [base64.b64encode(b"png bytes").decode()]})
+        client = VeniceClient(api_key="mock_api_key", transport=httpx.MockTransport(handler))
+        self.assertEqual(await client.generate_image_bytes("test image"), b"png bytes")
+        await client.aclose()
+
+    async def test_missing_api_key(self):
+        client = VeniceClient(transport=make_transport())
+        with unittest.mock.patch.dict("os.environ", {}, clear=True):
+            with self.assertRaises(ValueError):
+                await client.generate_image("test image")
+
+
+    async def test_slow_generation_is_hedged(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            # The first copy stalls; the hedge answers quickly
+            await asyncio.sleep(5 if len(calls) == 1 else 0.01)
+            return httpx.Response(200, json={"image_url": f"https://example.com/{len(calls)}.png"})
+
+        hedging = HedgePolicy(percentile=95, max_fraction=1.0, min_samples=1, min_delay=0.05)
+        hedging.latency.record(("fluently-xl", "1024x1024"), 0.05)
+        client = VeniceClient(api_key="mock_api_key", transport=httpx.MockTransport(handler), hedging=hedging)
+        start = time.monotonic()
+        response = await client.generate_image("test image")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(response["image_url"], "https://example.com/2.png")
+        self.assertEqual(client.stats()["hedging"]["hedge_wins"], 1)
+        # The abandoned copy doesn't hold a concurrency slot
+        await asyncio.sleep(0)
+        self.assertEqual(client.concurrency.in_flight, 0)
+        await client.aclose()
+
+    async def test_no_hedging_while_requests_wait_for_a_slot(self):
+        async def handler(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"image_url": "https://example.com/image.png"})
+
+        hedging = HedgePolicy(percentile=95, max_fraction=1.0, min_samples=1, min_delay=0.05)
+        for _ in range(20):
+            hedging.latency.record(("fluently-xl", "1024x1024"), 0.05)
+        concurrency = AdaptiveConcurrencyLimiter(initial=1, max_limit=1)
+        client = VeniceClient(api_key="mock_api_key", transport=httpx.MockTransport(handler),
+                              concurrency=concurrency, hedging=hedging)
+        await asyncio.gather(client.generate_image("first"), client.generate_image("second"))
+        stats = client.stats()["hedging"]
+        # The first was slow while the second waited for its slot; the second ran alone
+        self.assertEqual((stats["skipped"], stats["hedged"]), (1, 1))
+        await client.aclose()
+
+
+class TestVeniceClientRetries(unittest.IsolatedAsyncioTestCase):
+    def make_client(self, statuses, retry_after="0", **kwargs):
+        """Build a client whose generate endpoint answers with the given statuses in turn."""
+        self.calls = 0
+
+        async def handler(request):
+            status = statuses[min(self.calls, len(statuses) - 1)]
+            self.calls += 1
+            if status == 200:
+                return httpx.Response(200, json={"image_url": "https://example.com/image.png"})
+            return httpx.Response(status, headers={"Retry-After": retry_after}, json={"error": "failed"})
+
+        return VeniceClient(api_key="mock_api_key", transport=httpx.MockTransport(handler), **kwargs)
+
+    async def test_rate_limited_request_is_retried(self):
+        client = self.make_client([429, 429, 200])
+        response = await client.generate_image("test image")
+        self.assertEqual(response["image_url"], "https://example.com/image.png")
+        self.assertEqual(self.calls, 3)
+        await client.aclose()
+
+    async def test_rate_limit_error_after_retries(self):
+        client = self.make_client([429], max_retries=1)
+        with self.assertRaises(VeniceRateLimitError):
+            await client.generate_image("test image")
+        self.assertEqual(self.calls, 2)
+        await client.aclose()
+
+    async def test_generation_not_retried_on_server_error(self):
+        # A 500 on POST may mean the generation already ran, so it isn't repeated
+        client = self.make_client([500, 200])
+        with self.assertRaises(VeniceError) as ctx:
+            await client.generate_image("test image")
+        self.assertEqual(ctx.exception.status_code, 500)
+        self.assertEqual(self.calls, 1)
+        await client.aclose()
+
+    async def test_retry_after_is_capped(self):
+        client = self.make_client([429, 200], retry_after="86400")
+        with unittest.mock.patch("venice.DEFAULT_RETRY_AFTER_MAX", 0.05):
+            start = time.monotonic()
+            await client.generate_image("test image")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.calls, 2)
+        self.assertLessEqual(client.rate_limiter.stats()["paused_for"], 0.05)
+        await client.aclose()
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Type
+from pydantic import BaseModel, ValidationError
+
+
+class ToolNotFoundError(Exception):
+    """Raised when calling a tool that isn't registered."""
+
+
+class ToolValidationError(Exception):
+    """
+    Raised when tool parameters fail validation.
+
+    Args:
+        tool_name (str): Name of the tool
+        errors (list): Validation errors as reported by pydantic
+    """
+
+    def __init__(self, tool_name, errors):
+        super().__init__(f"Invalid parameters for {tool_name}")
+        self.tool_name = tool_name
+        self.errors = errors
+
+
+def _simplify_schema(schema):
+    """Strip pydantic-specific noise from a JSON schema so it matches the MCP tool format."""
+    if isinstance(schema, list):
+        return [_simplify_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    # Optional[X] is rendered as anyOf [X, null]; advertise just X
+    any_of = schema.get("anyOf")
+    if any_of and len(any_of) == 2 and {"type": "null"} in any_of:
+        merged = dict(next(s for s in any_of if s != {"type": "null"}))
+        merged.update({k: v for k, v in schema.items() if k != "anyOf"})
+        schema = merged
+    return {k: _simplify_schema(v) for k, v in schema.items()
+            if k not in ("title", "additionalProperties") and not (k == "default" and v is None)}
+
+
+def model_schema(model):
+    """Return the MCP parameter/return schema for a pydantic model."""
+    schema = model.model_json_schema(by_alias=True)
+    definitions = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].split("/")[-1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    schema = _simplify_schema(resolve(schema))
+    result = {"type": "object", "properties": schema.get("properties", {})}
+    if schema.get("required"):
+        result["required"] = schema["required"]
+    return result
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool and its per-tool hooks."""
+    name: str
+    description: str
+    handler: Callable
+    params_model: Type[BaseModel]
+    returns_model: Optional[Type[BaseModel]] = None
+    context_args: frozenset = frozenset()
+    semaphore: Optional[asyncio.Semaphore] = None
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+
+    def schema(self):
+        """Return the MCP tool definition."""
+        definition = {
+            "name": self.name,
+            "description": self.description,
+            "parameters": model_schema(self.params_model)
+        }
+        if self.returns_model is not None:
+            definition["returns"] = model_schema(self.returns_model)
+        return definition
+
+
+class EmptyParams(BaseModel):
+    """Parameters of tools that take none."""
+
+
+class ToolRegistry:
+    """
+    Registry of MCP tools.
+
+    Tools are registered with the tool() decorator, which records the pydantic
+    models used to validate parameters and to generate the advertised schema.
+    Every call goes through call(), which is the single place where timing,
+    concurrency limits and any registered middleware apply.
+    """
+
+    def __init__(self):
+        self.tools = {}
+        self.middleware = []
+
+    def tool(self, name, description, params=EmptyParams, returns=None, max_concurrency=None):
+        """
+        Register a coroutine function as a tool.
+
+        The handler receives the validated params model, plus any keyword
+        arguments passed to call() that appear in its signature.
+
+        Args:
+            name (str): Tool name
+            description (str): Tool description shown to the LLM
+            params (type): Pydantic model for the parameters
+            returns (type): Pydantic model describing the result (for the schema only)
+            max_concurrency (int): Maximum concurrent calls of this tool
+        """
+        def decorator(handler):
+            signature = inspect.signature(handler)
+            self.tools[name] = ToolSpec(
+                name=name,
+                description=description,
+                handler=handler,
+                params_model=params,
+                returns_model=returns,
+                context_args=frozenset(list(signature.parameters)[1:]),
+                semaphore=asyncio.Semaphore(max_concurrency) if max_concurrency else None
+            )
+            return handler
+        return decorator
+
+    def use(self, middleware):
+        """
+        Add middleware around every tool call.
+
+        Args:
+            middleware (callable): async fn(spec, params, call_next) returning the result
+        """
+        self.middleware.append(middleware)
+        return middleware
+
+    def schemas(self):
+        """Return the MCP definitions of all registered tools."""
+        return [spec.schema() for spec in self.tools.values()]
+
+    def validate(self, name, raw_params):
+        """
+        Look up a tool and validate its parameters.
+
+        Returns:
+            tuple: (ToolSpec, validated params model)
+
+        Raises:
+            ToolNotFoundError: If the tool isn't registered
+            ToolValidationError: If the parameters are invalid
+        """
+        spec = self.tools.get(name)
+        if spec is None:
+            raise ToolNotFoundError(f"Tool {name} not found")
+        try:
+            return spec, spec.params_model.model_validate(raw_params or {})
+        except ValidationError as e:
+            raise ToolValidationError(name, e.errors(include_url=False, include_context=False))
+
+    async def call(self, name, raw_params, **context):
+        """
+        Validate parameters and run a tool.
+
+        Args:
+            name (str): Tool name
+            raw_params (dict): Unvalidated parameters
+            **context: Extra keyword arguments for handlers that accept them
+
+        Returns:
+            The tool result
+        """
+        spec, params = self.validate(name, raw_params)
+        return await self.run(spec, params, **context)
+
+    async def run(self, spec, params, **context):
+        """Run a tool with parameters already checked by validate()."""
+        kwargs = {k: v for k, v in context.items() if k in spec.context_args}
+
+        async def invoke(spec, params):
+            if spec.semaphore is None:
+                return await spec.handler(params, **kwargs)
+            async with spec.semaphore:
+                return await spec.handler(params, **kwargs)
+
+        call_next = invoke
+        for middleware in reversed(self.middleware):
+            call_next = (lambda mw, nxt: lambda s, p: mw(s, p, nxt))(middleware, call_next)
+
+        started = time.perf_counter()
+        spec.calls += 1
+        try:
+            return await call_next(spec, params)
+        except Exception:
+            spec.errors += 1
+            raise
+        finally:
+            spec.total_time += time.perf_counter() - started
+
+    def stats(self):
+        """Return per-tool call counts, error counts and mean latency."""
+        return {
+            name: {
+                "calls": spec.calls,
+                "errors": spec.errors,
+                "mean_seconds": spec.total_time / spec.calls if spec.calls else 0.0
+            }
+            for name, spec in self.tools.items()
+        }
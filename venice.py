@@ -1,49 +1,428 @@
+import asyncio
+import base64
 import os
+import time
+from email.utils import parsedate_to_datetime
+import httpx
 import requests
+from ratelimit import AdaptiveConcurrencyLimiter, TokenBucket, backoff_delay
+from hedging import HedgePolicy
 
-def generate_image(prompt, height=1024, width=1024, steps=20, model="fluently-xl"):
+# Base URL of the Venice AI API (overridable for proxies and local stand-ins)
+VENICE_API_BASE = os.environ.get("VENICE_API_BASE", "https://api.venice.ai/api/v1")
+
+# Connection pool and timeout defaults for the async client
+DEFAULT_TIMEOUT = float(os.environ.get("VENICE_TIMEOUT", "120"))
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("VENICE_CONNECT_TIMEOUT", "10"))
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("VENICE_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE = int(os.environ.get("VENICE_MAX_KEEPALIVE", "20"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.environ.get("VENICE_KEEPALIVE_EXPIRY", "30"))
+
+# Rate limiting, adaptive concurrency and retry defaults
+DEFAULT_RATE_LIMIT = float(os.environ.get("VENICE_RATE_LIMIT", "10"))
+DEFAULT_BURST = int(os.environ.get("VENICE_BURST", "20"))
+DEFAULT_MIN_CONCURRENCY = int(os.environ.get("VENICE_MIN_CONCURRENCY", "1"))
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("VENICE_MAX_CONCURRENCY", "32"))
+DEFAULT_INITIAL_CONCURRENCY = int(os.environ.get("VENICE_INITIAL_CONCURRENCY", "8"))
+DEFAULT_LATENCY_TARGET = float(os.environ.get("VENICE_LATENCY_TARGET", "0"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("VENICE_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = float(os.environ.get("VENICE_BACKOFF_BASE", "0.5"))
+DEFAULT_BACKOFF_MAX = float(os.environ.get("VENICE_BACKOFF_MAX", "30"))
+# Longest Retry-After honoured; a larger (or bogus) value would stall every outbound call
+DEFAULT_RETRY_AFTER_MAX = float(os.environ.get("VENICE_RETRY_AFTER_MAX", str(DEFAULT_BACKOFF_MAX)))
+
+# Hedged generations (opt-in): a generation still running after the given percentile of recent
+# latency for its model and size is sent again, and the first response wins
+HEDGE_ENABLED = os.environ.get("VENICE_HEDGE", "false").lower() == "true"
+DEFAULT_HEDGE_PERCENTILE = float(os.environ.get("VENICE_HEDGE_PERCENTILE", "95"))
+DEFAULT_HEDGE_MAX_FRACTION = float(os.environ.get("VENICE_HEDGE_MAX_FRACTION", "0.05"))
+DEFAULT_HEDGE_MIN_SAMPLES = int(os.environ.get("VENICE_HEDGE_MIN_SAMPLES", "20"))
+DEFAULT_HEDGE_MIN_DELAY = float(os.environ.get("VENICE_HEDGE_MIN_DELAY", "1.0"))
+
+# Statuses meaning the request was rejected before any work was done (safe to retry any method)
+REJECTED_STATUSES = (429, 503)
+
+# Statuses worth retrying for idempotent (GET) requests only
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+# Transport errors raised before the request reached the server (safe to retry any method)
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class VeniceError(Exception):
     """
-    Generate an image using the Venice AI API.
-    
+    An error returned by (or while reaching) the Venice AI API.
+
     Args:
-        prompt (str): The prompt describing the image to generate
-        height (int): Image height in pixels
-        width (int): Image width in pixels
-        steps (int): Number of diffusion steps
-        model (str): Model to use for generation
-        
-    Returns:
-        dict: The API response containing image data
+        message (str): Description of the failure
+        status_code (int): HTTP status returned by Venice, if any
+        retry_after (float): Seconds Venice asked us to wait, if given
     """
-    url = "https://api.venice.ai/api/v1/image/generate"
-    
-    payload = {
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class VeniceRateLimitError(VeniceError):
+    """Venice kept rejecting the request with HTTP 429 after all retries."""
+
+
+class _FailedResponse(Exception):
+    """Carries an error response out of a hedged send, so a copy that may still succeed wins."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_payload(prompt, height, width, steps, model, return_binary=False):
+    """Build the request body for the image generation endpoint."""
+    return {
         "height": height,
         "width": width,
         "steps": steps,
-        "return_binary": False,
+        "return_binary": return_binary,
         "hide_watermark": True,
         "format": "png",
         "embed_exif_metadata": False,
         "model": model,
         "prompt": prompt
     }
-    
+
+
+def _build_headers(api_key=None):
+    """Build the authorization headers, reading the API key from the environment if needed."""
     # Get API key from environment variable
-    api_key = os.environ.get("VENICE_API_KEY")
-    
+    api_key = api_key or os.environ.get("VENICE_API_KEY")
+
     # Check if API key is available
     if not api_key:
         raise ValueError("VENICE_API_KEY environment variable is not set")
-    
-    headers = {
+
+    return {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
-    
+
+
+def generate_image(prompt, height=1024, width=1024, steps=20, model="fluently-xl"):
+    """
+    Generate an image using the Venice AI API.
+
+    This is the blocking variant for scripts; the server uses VeniceClient.
+
+    Args:
+        prompt (str): The prompt describing the image to generate
+        height (int): Image height in pixels
+        width (int): Image width in pixels
+        steps (int): Number of diffusion steps
+        model (str): Model to use for generation
+
+    Returns:
+        dict: The API response containing image data
+    """
+    url = f"{VENICE_API_BASE}/image/generate"
+
+    payload = _build_payload(prompt, height, width, steps, model)
+    headers = _build_headers()
+
     response = requests.request("POST", url, json=payload, headers=headers)
     return response.json()
 
+
+class VeniceClient:
+    """
+    Async client for the Venice AI API.
+
+    A single instance owns one httpx.AsyncClient, so every call made through it
+    shares the same keep-alive connection pool. The underlying client is created
+    lazily on first use so the instance can be built at import time.
+
+    Args:
+        api_key (str): Venice API key (defaults to VENICE_API_KEY at call time)
+        base_url (str): Base URL of the Venice API
+        timeout (float): Read/write/pool timeout in seconds
+        connect_timeout (float): Connection timeout in seconds
+        max_connections (int): Maximum number of concurrent connections
+        max_keepalive_connections (int): Maximum number of idle keep-alive connections
+        keepalive_expiry (float): Seconds an idle connection is kept open
+        transport (httpx.AsyncBaseTransport): Custom transport (mainly for tests)
+        rate_limit (float): Sustained requests per second across all calls (0 disables)
+        burst (int): Requests allowed back to back before rate limiting applies
+        max_retries (int): Retries for failures that are safe to repeat
+        concurrency (AdaptiveConcurrencyLimiter): Limiter for in-flight requests
+        hedging (HedgePolicy): Policy for hedging slow generations (defaults to one if VENICE_HEDGE is set)
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, transport=None,
+                 rate_limit=DEFAULT_RATE_LIMIT, burst=DEFAULT_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES, concurrency=None, hedging=None):
+        self.api_key = api_key
+        self.base_url = (base_url or VENICE_API_BASE).rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.transport = transport
+        self._client = None
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self.concurrency = concurrency or AdaptiveConcurrencyLimiter(
+            initial=DEFAULT_INITIAL_CONCURRENCY,
+            min_limit=DEFAULT_MIN_CONCURRENCY,
+            max_limit=DEFAULT_MAX_CONCURRENCY,
+            latency_target=DEFAULT_LATENCY_TARGET
+        )
+        self.max_retries = max_retries
+        self.retries = 0
+        if hedging is None and HEDGE_ENABLED:
+            hedging = HedgePolicy(
+                percentile=DEFAULT_HEDGE_PERCENTILE,
+                max_fraction=DEFAULT_HEDGE_MAX_FRACTION,
+                min_samples=DEFAULT_HEDGE_MIN_SAMPLES,
+                min_delay=DEFAULT_HEDGE_MIN_DELAY
+            )
+        self.hedging = hedging
+
+    def _get_client(self):
+        """Return the shared httpx client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport
+            )
+        return self._client
+
+    async def _request(self, method, path, hedge_key=None, **kwargs):
+        """
+        Send a request through the rate limiter and concurrency limiter, retrying safe failures.
+
+        Rejections (429/503) and connection failures are retried for any
+        method; other 5xx responses and timeouts only for GET, since a POST
+        may already have started a (billed) generation. Retries use jittered
+        exponential backoff, or the server's Retry-After when given (capped
+        at VENICE_RETRY_AFTER_MAX seconds), which also pauses every other
+        outbound call.
+
+        Args:
+            method (str): HTTP method
+            path (str): Path below the API base URL
+            hedge_key: Latency key to hedge the upstream send under, e.g. (model, size) (optional)
+            **kwargs: Passed to httpx
+
+        Returns:
+            httpx.Response: The successful response
+
+        Raises:
+            VeniceRateLimitError: If Venice still answers 429 after all retries
+            VeniceError: For any other failed request
+        """
+        idempotent = method == "GET"
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            async with self.concurrency.slot():
+                started = time.monotonic()
+                try:
+                    response = await self._send(method, path, hedge_key, kwargs)
+                except httpx.TransportError as e:
+                    error = VeniceError(f"Could not reach Venice API: {e!r}")
+                    retryable = idempotent or isinstance(e, UNSENT_ERRORS)
+                    retry_after = None
+                else:
+                    if response.is_success:
+                        self.concurrency.on_success(time.monotonic() - started)
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429:
+                        self.concurrency.on_overload()
+                        error = VeniceRateLimitError("Venice API rate limit exceeded", 429, retry_after)
+                    else:
+                        error = VeniceError(f"Venice API returned HTTP {response.status_code}: {response.text[:200]}",
+                                            response.status_code, retry_after)
+                    retryable = (response.status_code in REJECTED_STATUSES
+                                 or (idempotent and response.status_code in TRANSIENT_STATUSES))
+
+            if not retryable or attempt >= self.max_retries:
+                raise error
+            if retry_after is not None:
+                delay = min(retry_after, DEFAULT_RETRY_AFTER_MAX)
+                self.rate_limiter.pause(delay)
+            else:
+                delay = backoff_delay(attempt, DEFAULT_BACKOFF_BASE, DEFAULT_BACKOFF_MAX)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, method, path, hedge_key, kwargs):
+        """
+        Send one request upstream, hedging it when hedging is enabled and a key is given.
+
+        Only the HTTP exchange is hedged and timed; rate limiting, slot waits
+        and retry backoff happen around it in _request(). A hedge shares its
+        primary's concurrency slot.
+        """
+        client = self._get_client()
+        if self.hedging is None or hedge_key is None:
+            return await client.request(method, path, **kwargs)
+
+        async def send():
+            response = await client.request(method, path, **kwargs)
+            if not response.is_success:
+                raise _FailedResponse(response)
+            return response
+
+        try:
+            return await self.hedging.run(hedge_key, send, allow=self._can_hedge)
+        except _FailedResponse as e:
+            return e.response
+
+    def _can_hedge(self):
+        """Hedge only while nothing is queued for a slot and the rate limit has a token to spare."""
+        return not self.concurrency.waiting and self.rate_limiter.try_acquire()
+
+    async def _generate(self, payload, headers):
+        """
+        Send a generation request, hedging slow ones when hedging is enabled.
+
+        Latency is tracked per model and image size, since those set how
+        long a generation takes.
+        """
+        key = (payload["model"], f"{payload['width']}x{payload['height']}")
+        return await self._request("POST", "/image/generate", hedge_key=key, json=payload, headers=headers)
+
+    def stats(self):
+        """Return rate limiter, concurrency, retry and hedging counters."""
+        stats = {
+            "rate_limiter": self.rate_limiter.stats(),
+            "concurrency": self.concurrency.stats(),
+            "retries": self.retries
+        }
+        if self.hedging is not None:
+            stats["hedging"] = self.hedging.stats()
+        return stats
+
+    async def generate_image(self, prompt, height=1024, width=1024, steps=20, model="fluently-xl"):
+        """
+        Generate an image using the Venice AI API without blocking the event loop.
+
+        Args:
+            prompt (str): The prompt describing the image to generate
+            height (int): Image height in pixels
+            width (int): Image width in pixels
+            steps (int): Number of diffusion steps
+            model (str): Model to use for generation
+
+        Returns:
+            dict: The API response containing image data
+
+        Raises:
+            VeniceError: If the request failed after any retries
+        """
+        payload = _build_payload(prompt, height, width, steps, model)
+        headers = _build_headers(self.api_key)
+
+        response = await self._generate(payload, headers)
+        return response.json()
+
+    async def generate_image_bytes(self, prompt, height=1024, width=1024, steps=20, model="fluently-xl"):
+        """
+        Generate an image and return its PNG bytes.
+
+        Requests binary output; base64 "images" and "image_url" responses
+        are also accepted (the latter is downloaded once).
+
+        Args:
+            prompt (str): The prompt describing the image to generate
+            height (int): Image height in pixels
+            width (int): Image width in pixels
+            steps (int): Number of diffusion steps
+            model (str): Model to use for generation
+
+        Returns:
+            bytes: The encoded image
+
+        Raises:
+            VeniceError: If the request failed or the response held no image
+        """
+        payload = _build_payload(prompt, height, width, steps, model, return_binary=True)
+        headers = _build_headers(self.api_key)
+
+        response = await self._generate(payload, headers)
+        if response.headers.get("content-type", "").startswith("image/"):
+            return response.content
+        data = response.json()
+        if data.get("images"):
+            return base64.b64decode(data["images"][0])
+        if data.get("image_url"):
+            return await self.download(data["image_url"])
+        raise VeniceError("Venice API response contained no image")
+
+    async def download(self, url):
+        """
+        Download an image produced by Venice (e.g. from its CDN) over the shared pool.
+
+        Args:
+            url (str): Absolute image URL
+
+        Returns:
+            bytes: The downloaded content
+        """
+        try:
+            response = await self._get_client().get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise VeniceError(f"Could not download image: {e!r}")
+        return response.content
+
+    async def list_models(self, model_type="image"):
+        """
+        Fetch the models offered by the Venice AI API.
+
+        Args:
+            model_type (str): Model type to filter on
+
+        Returns:
+            The parsed JSON body of the models endpoint
+
+        Raises:
+            VeniceError: If the request failed after any retries
+        """
+        headers = _build_headers(self.api_key)
+
+        response = await self._request("GET", "/models", params={"type": model_type}, headers=headers)
+        return response.json()
+
+    async def aclose(self):
+        """Close the shared connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
 if __name__ == "__main__":
     # Example usage
     result = generate_image("A low-poly rabbit with black background. 3d file")